@@ -0,0 +1 @@
+"""Hilfsmodule für den Tambora-Workflow (Asche-Interpolation, LULC-Overlay, Statistik)."""
@@ -0,0 +1,6 @@
+"""python -m klima run|figures config.toml (siehe klima.cli)."""
+import sys
+
+from klima.cli import main
+
+sys.exit(main())
@@ -0,0 +1,206 @@
+"""Adaptive Auswertung vom Aschefeld: RBF nur dort, wo es auf die Konturen ankommt.
+
+Ein feines Grid (z.B. 5000 x 5000, nx/ny in PipelineConfig) überall mit der
+RBF auszuwerten, verschwendet fast alle Knoten auf Meer und auf Gebieten weit
+unter jedem Threshold. Hier läuft ein Quadtree über die Gridindizes:
+
+  - Start mit Zellen von max_cell x max_cell Knoten, RBF nur an den Ecken
+  - eine Zelle wird geviertelt, wenn die Dicke an ihren Ecken einen der
+    Thresholds (0.1/1/10/100 cm ...) kreuzt oder die Ecken teils NaN sind,
+    bis hinunter auf einzelne Knoten
+  - Zellen mit einer Messung drin ebenfalls bis auf Knoten (da sitzen die
+    Spitzen der RBF, die sieht man an den Ecken nicht)
+  - Zellen über Land werden bis mindestens land_cell Knoten verfeinert
+  - alle übrigen Knoten: bilinear aus den Ecken ihrer Zelle (in log10, wie die RBF)
+
+Danach wie immer finish_field() (Rücktransformation, Clipping, Taper) auf
+dem ganzen Grid. Konturen liegen so auf Knotengenauigkeit des feinen Grids,
+ausgewertet wird nur ein kleiner Teil der Knoten. Das Ergebnis liegt direkt
+auf dem Pipeline-Grid, Overlay/Masken/Statistik brauchen kein Resampling.
+"""
+import numpy as np
+from rasterio.features import rasterize
+
+from klima.field import finish_field, finish_points
+from klima.interp import DEFAULT_CHUNK_SIZE, rbf_interpolator
+
+
+def land_mask(geometries, transform, shape):
+    """bool-Raster (ny, nx): Knotenzelle berührt Land (all_touched)."""
+    geometries = [g for g in geometries if g is not None and not g.is_empty]
+    if not geometries:
+        return np.zeros(shape, dtype=bool)
+    return rasterize([(g, 1) for g in geometries], out_shape=shape, transform=transform, fill=0,
+                     all_touched=True, dtype="uint8").astype(bool)
+
+
+def _integral(mask):
+    # Summed-Area-Table mit Nullrand: Summe über [r0:r1, c0:c1] in O(1)
+    out = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int32)
+    np.cumsum(np.cumsum(mask, axis=0, dtype=np.int32), axis=1, out=out[1:, 1:])
+    return out
+
+
+def _any_in(sat, r0, r1, c0, c1):
+    # Knoten r0..r1, c0..c1 (inklusive)
+    return (sat[r1 + 1, c1 + 1] - sat[r0, c1 + 1] - sat[r1 + 1, c0] + sat[r0, c0]) > 0
+
+
+def _point_nodes(x, y, xi, yi, coords=None):
+    # Knoten direkt um jede Messung (in Grad über die Achsen, projiziert: nächster Knoten)
+    if coords is None:
+        ci = np.searchsorted(xi, x)
+        ri = np.searchsorted(yi, y)
+    else:
+        from scipy.spatial import cKDTree
+
+        X, Y = coords
+        _, flat = cKDTree(np.column_stack([X.ravel(), Y.ravel()])).query(np.column_stack([x, y]))
+        ri, ci = np.divmod(flat, len(xi))
+    rows = np.clip(np.concatenate([ri - 1, ri]), 0, len(yi) - 1)
+    cols = np.clip(np.concatenate([ci - 1, ci]), 0, len(xi) - 1)
+    return rows, cols
+
+
+def _has_point(pts_r, pts_c, r0, r1, c0, c1, chunk_size=65536):
+    # Zelle [r0, r1] x [c0, c1] enthält einen der Knoten (pts_r, pts_c)? (wenige Messungen -> Broadcast)
+    out = np.zeros(len(r0), dtype=bool)
+    step = max(1, chunk_size // max(1, len(pts_r)))
+    for a in range(0, len(r0), step):
+        s = slice(a, a + step)
+        out[s] = ((pts_r >= r0[s, None]) & (pts_r <= r1[s, None])
+                  & (pts_c >= c0[s, None]) & (pts_c <= c1[s, None])).any(axis=1)
+    return out
+
+
+def _split(lo, hi):
+    # Intervall [lo, hi] halbieren, wo es geht (hi - lo > 1), sonst bleibt es ganz
+    mid = (lo + hi) // 2
+    can = hi - lo > 1
+    return can, mid
+
+
+def adaptive_field(x, y, z, xi, yi, thresholds, function="linear", smooth=0.005, eps=1e-3, epsilon=None,
+                   neighbors=None, lon0=118.0, lat0=-8.25, r0=3.5, r1=20.0, south_boost=2.0,
+                   max_cell=64, land=None, land_cell=8, margin=1.25, chunk_size=DEFAULT_CHUNK_SIZE,
+                   dtype=np.float64, coords=None, taper_coords=None):
+    """Aschedicke [cm] auf np.meshgrid(xi, yi) wie ash_field(), RBF nur an den Quadtree-Knoten.
+
+    thresholds = Dicken [cm], an deren Konturen bis auf Knotenebene verfeinert
+    wird, margin = Sicherheitsfaktor: verfeinert wird schon, wenn ein Threshold
+    zwischen min/margin und max*margin der Ecken liegt (Konturen, die zwischen
+    den Ecken kurz auftauchen). land = bool-Raster (ny, nx) oder None. coords/taper_coords wie in
+    ash_field() (klima.projection). Gibt (ZI, Anzahl ausgewerteter Knoten) zurück.
+    """
+    xi = np.asarray(xi, dtype=float)
+    yi = np.asarray(yi, dtype=float)
+    nx, ny = len(xi), len(yi)
+    thresholds = np.sort(np.asarray(thresholds, dtype=float))
+
+    rbf = rbf_interpolator(x, y, np.log10(z + eps), function=function, smooth=smooth,
+                           epsilon=epsilon, neighbors=neighbors)
+    taper = dict(lon0=lon0, lat0=lat0, r0=r0, r1=r1, south_boost=south_boost)
+    z_max = np.nanmax(z)
+
+    L = np.empty((ny, nx), dtype=dtype)     # log10-Werte der RBF
+    done = np.zeros((ny, nx), dtype=bool)   # Knoten ausgewertet?
+    pending = np.zeros(ny * nx, dtype=bool)
+
+    def evaluate(rows, cols):
+        # Ecken teilen sich Nachbarzellen -> über ein Flag-Array eindeutig machen (billiger als np.unique)
+        flat = rows * nx + cols
+        pending[flat[~done.ravel()[flat]]] = True
+        flat = np.flatnonzero(pending)
+        pending[flat] = False
+        for a in range(0, len(flat), chunk_size):
+            r, c = np.divmod(flat[a:a + chunk_size], nx)
+            if coords is None:
+                pts = np.column_stack([xi[c], yi[r]])
+            else:
+                pts = np.column_stack([coords[0][r, c], coords[1][r, c]])
+            L[r, c] = rbf(pts)
+            done[r, c] = True
+
+    def thickness(rows, cols):
+        vals = L[rows, cols].astype(np.float64)
+        if taper_coords is None:
+            return finish_points(vals, z_max, eps, xi[cols], yi[rows], taper)
+        return finish_points(vals, z_max, eps, taper_coords[0][rows, cols], taper_coords[1][rows, cols],
+                             dict(taper, lon0=0.0, lat0=0.0))
+
+    # Startzellen: Knotenindizes [r0, r1] x [c0, c1], Ränder geteilt
+    rb = np.unique(np.r_[np.arange(0, ny - 1, max_cell), ny - 1])
+    cb = np.unique(np.r_[np.arange(0, nx - 1, max_cell), nx - 1])
+    R0, C0 = np.meshgrid(rb[:-1], cb[:-1], indexing="ij")
+    R1, C1 = np.meshgrid(rb[1:], cb[1:], indexing="ij")
+    cells = [a.ravel() for a in (R0, R1, C0, C1)]
+    sat = None if land is None else _integral(np.asarray(land, dtype=bool))
+    pts_r, pts_c = _point_nodes(x, y, xi, yi, coords)
+
+    leaves = []
+    while len(cells[0]):
+        r0_, r1_, c0_, c1_ = cells
+        corner_r = np.stack([r0_, r0_, r1_, r1_])
+        corner_c = np.stack([c0_, c1_, c0_, c1_])
+        evaluate(corner_r.ravel(), corner_c.ravel())
+
+        t = thickness(corner_r, corner_c)
+        nan = np.isnan(t)
+        t_min = np.where(nan, np.inf, t).min(axis=0)
+        t_max = np.where(nan, -np.inf, t).max(axis=0)
+        # Threshold zwischen kleinster und größter Ecke (plus margin)
+        k_lo = np.searchsorted(thresholds, t_min / margin, side="left")
+        k_hi = np.searchsorted(thresholds, t_max * margin, side="left")
+        refine = (k_lo != k_hi) | (nan.any(axis=0) & ~nan.all(axis=0))
+        if sat is not None:
+            big = np.maximum(r1_ - r0_, c1_ - c0_) > land_cell
+            refine |= big & _any_in(sat, r0_, r1_, c0_, c1_)
+
+        split_r, rm = _split(r0_, r1_)
+        split_c, cm = _split(c0_, c1_)
+        refine &= split_r | split_c
+        # Messungen nur für die Zellen prüfen, die noch nicht verfeinert werden
+        rest = np.flatnonzero(~refine & (split_r | split_c))
+        refine[rest] = _has_point(pts_r, pts_c, r0_[rest], r1_[rest], c0_[rest], c1_[rest])
+        leaves.append([a[~refine] for a in cells])
+
+        # Kinder: Zeilen/Spalten halbieren, wo möglich (sonst nur in einer Richtung)
+        children = []
+        halves_r = ((r0_, np.where(split_r, rm, r1_), refine), (rm, r1_, refine & split_r))
+        halves_c = ((c0_, np.where(split_c, cm, c1_), True), (cm, c1_, split_c))
+        for ra, rb_, keep_r in halves_r:
+            for ca, cb_, keep_c in halves_c:
+                keep = keep_r & keep_c
+                children.append([ra[keep], rb_[keep], ca[keep], cb_[keep]])
+        cells = [np.concatenate([ch[i] for ch in children]) for i in range(4)]
+
+    _fill_leaves(L, done, [np.concatenate([lf[i] for lf in leaves]) for i in range(4)])
+    n_eval = int(done.sum())
+
+    finish_field(L, z_max, eps, xi, yi, taper, chunk_size, taper_coords)
+    return L, n_eval
+
+
+def _fill_leaves(L, done, leaves):
+    """Nicht ausgewertete Knoten bilinear aus den Ecken ihrer Blattzelle (in place)."""
+    nx = L.shape[1]
+    L_flat, done_flat = L.ravel(), done.ravel()
+    r0, r1, c0, c1 = leaves
+    h, w = r1 - r0, c1 - c0
+    inner = (h > 1) | (w > 1)
+    r0, r1, c0, c1, h, w = (a[inner] for a in (r0, r1, c0, c1, h, w))
+
+    # gleich große Zellen zusammen -> ein Broadcast pro Größe. Große zuerst: Kanten
+    # zu feineren Nachbarn schreiben die feineren danach genauer drüber
+    for hh, ww in sorted(set(zip(h.tolist(), w.tolist())), key=lambda s: -s[0] * s[1]):
+        sel = (h == hh) & (w == ww)
+        a, c = r0[sel], c0[sel]
+        fy = (np.arange(hh + 1) / hh)[None, :, None]
+        fx = (np.arange(ww + 1) / ww)[None, None, :]
+        top = L[a, c][:, None, None] + (L[a, c + ww] - L[a, c])[:, None, None] * fx
+        bottom = L[a + hh, c][:, None, None] + (L[a + hh, c + ww] - L[a + hh, c])[:, None, None] * fx
+        vals = top + (bottom - top) * fy
+
+        idx = (a * nx + c)[:, None, None] + (np.arange(hh + 1) * nx)[None, :, None] + np.arange(ww + 1)[None, None, :]
+        free = ~done_flat[idx]
+        L_flat[idx[free]] = vals[free]
@@ -0,0 +1,241 @@
+"""Animationen (GIF/MP4) für Threshold- oder Taper-Sweeps.
+
+Die statischen Ebenen (Weltkarte, LULC-Raster, Legende, Colorbar) werden
+EINMAL gerendert und als Hintergrund gemerkt. Pro Frame wird nur der
+Hintergrund zurückkopiert und das Asche-Overlay (neue Daten per set_array,
+ggf. neue Norm) plus die Messpunkte darüber gezeichnet (Blitting). Das
+Overlay ist hier ein Bild statt QuadMesh (gleiches Grid, rendert viel schneller).
+Jeder Frame geht sofort in die Datei, es wird nichts gesammelt -> Speicher
+unabhängig von der Anzahl der Frames:
+
+    python -m klima.animate asche_threshold.gif --sweep threshold --start 0.1 --stop 100 --frames 50
+    python -m klima.animate asche_south_boost.mp4 --sweep south_boost --start 1 --stop 3
+
+GIF schreibt Pillow Frame für Frame, MP4 braucht ffmpeg (wird per Pipe gefüttert).
+"""
+import argparse
+import os
+import shutil
+import subprocess
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+
+from PIL import GifImagePlugin, Image
+
+from klima.field import apply_taper, taper_weights
+from klima.pipeline import Pipeline, PipelineConfig
+from klima.plot import ash_colorbar, ash_overlay, base_map, field_norm, plot_mask
+from klima.support import apply_cutoff
+
+TAPER_SWEEPS = ("lon0", "lat0", "r0", "r1", "south_boost")
+
+
+def threshold_frames(pipe, thresholds, rescale=False):
+    """Frames (Titel, ZI maskiert, clim) für einen Sweep über den Plot-Threshold.
+
+    rescale=True setzt die Farbskala pro Frame auf [Threshold, max], sonst
+    bleibt sie fest (Farben zwischen den Frames vergleichbar).
+    """
+    ZI = pipe.ZI
+    vmax = np.nanmax(ZI)
+    for thr in thresholds:
+        clim = (thr, vmax) if rescale else None
+        yield f"Asche >= {thr:.3g} cm", np.ma.array(ZI, mask=~plot_mask(ZI, thr)), clim
+
+
+def taper_frames(pipe, param, values, rescale=False):
+    """Frames für einen Sweep über einen Taper-Parameter (RBF nur einmal, aus dem Cache).
+
+    rescale=True nimmt pro Frame die Log-Norm vom jeweiligen Feld.
+    """
+    if param not in TAPER_SWEEPS:
+        raise ValueError(f"Unbekannter Taper-Parameter: {param!r} (erlaubt: {list(TAPER_SWEEPS)})")
+
+    cfg = pipe.config
+    coords = pipe.taper_coords
+    if coords is not None and param in ("lon0", "lat0"):
+        # die km-Koordinaten sind um das feste Zentrum projiziert
+        raise ValueError(f"{param} lässt sich mit taper_units='km' nicht variieren.")
+    raw = pipe.raw_field()
+    xi, yi = pipe.grid
+    taper = dict(lon0=cfg.lon0, lat0=cfg.lat0, r0=cfg.r0, r1=cfg.r1, south_boost=cfg.south_boost)
+
+    for value in values:
+        taper[param] = value
+        ZI = apply_taper(raw, taper_weights(xi, yi, chunk_size=cfg.chunk_size, coords=coords, **taper))
+        if cfg.dmax is not None:
+            apply_cutoff(ZI, pipe.dist, cfg.dmax, out=ZI)
+
+        clim = None
+        if rescale:
+            norm = field_norm(ZI)
+            clim = (norm.vmin, norm.vmax)
+        masked = np.ma.array(ZI, mask=~plot_mask(ZI, cfg.threshold_plot))
+        yield f"{param} = {value:.3g}", masked, clim
+
+
+class GifStream:
+    """GIF Frame für Frame schreiben (Pillow), jeder Frame mit eigener Palette."""
+
+    def __init__(self, path, fps=5, loop=0):
+        self.path = path
+        self.duration = int(round(1000 / fps))
+        self.loop = loop
+        self._fp = None
+        self._first = True
+
+    def __enter__(self):
+        self._fp = open(self.path, "wb")
+        return self
+
+    def write(self, rgba):
+        frame = Image.fromarray(np.ascontiguousarray(rgba[..., :3])).quantize(
+            256, method=Image.Quantize.FASTOCTREE
+        )
+        if self._first:
+            header, _ = GifImagePlugin.getheader(frame, info={"loop": self.loop})
+            self._fp.write(b"".join(header))
+            self._first = False
+        for chunk in GifImagePlugin.getdata(frame, duration=self.duration, include_color_table=True):
+            self._fp.write(chunk)
+
+    def __exit__(self, *exc):
+        self._fp.write(b";")  # GIF-Trailer
+        self._fp.close()
+
+
+class FFmpegStream:
+    """Rohe RGBA-Frames per Pipe an ffmpeg (MP4 o.ä., Format aus der Dateiendung)."""
+
+    def __init__(self, path, size, fps=5):
+        ffmpeg = shutil.which(matplotlib.rcParams["animation.ffmpeg_path"])
+        if ffmpeg is None:
+            raise RuntimeError(f"{path}: für andere Formate als GIF wird ffmpeg gebraucht.")
+        w, h = size
+        self.cmd = [
+            ffmpeg, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{w}x{h}", "-r", str(fps), "-i", "-",
+            # yuv420p (läuft überall) braucht gerade Kantenlängen
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", path,
+        ]
+        self._proc = None
+
+    def __enter__(self):
+        self._proc = subprocess.Popen(self.cmd, stdin=subprocess.PIPE)
+        return self
+
+    def write(self, rgba):
+        self._proc.stdin.write(np.ascontiguousarray(rgba).tobytes())
+
+    def __exit__(self, *exc):
+        self._proc.stdin.close()
+        if self._proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg ist mit Code {self._proc.returncode} abgebrochen.")
+
+
+def frame_stream(path, size, fps=5):
+    """GifStream für .gif, sonst FFmpegStream."""
+    if os.path.splitext(path)[1].lower() == ".gif":
+        return GifStream(path, fps)
+    return FFmpegStream(path, size, fps)
+
+
+def render_animation(pipe, frames, path, fps=5, dpi=100, figsize=(12, 6)):
+    """Frames (Titel, maskiertes Feld, clim oder None) als Animation nach path schreiben.
+
+    Gibt die Anzahl der Frames zurück.
+    """
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError("Keine Frames.")
+    title, data, clim = first
+
+    norm = field_norm(pipe.ZI)
+    fig, ax = base_map(pipe, norm, figsize)
+    fig.set_dpi(dpi)
+    im = ash_overlay(ax, *pipe.grid, data, norm, image=True)
+    if clim is not None:
+        im.set_clim(*clim)
+    ash_colorbar(im, ax)
+    ax.set_title(title)
+    fig.tight_layout()
+
+    # dynamisch: Overlay, alles was darüber liegt (Messpunkte) und der Titel
+    dynamic = [im] + sorted(
+        (c for c in ax.collections if c.get_zorder() > im.get_zorder()), key=lambda c: c.get_zorder()
+    ) + [ax.title]
+    for artist in dynamic:
+        artist.set_animated(True)
+
+    canvas = fig.canvas
+    background = None
+    n = 0
+    with frame_stream(path, canvas.get_width_height(), fps) as stream:
+        while True:
+            if background is None:
+                # Hintergrund (ohne die dynamischen Artists) einmal rendern
+                canvas.draw()
+                background = canvas.copy_from_bbox(fig.bbox)
+            else:
+                canvas.restore_region(background)
+            for artist in dynamic:
+                ax.draw_artist(artist)
+            stream.write(np.asarray(canvas.buffer_rgba()))
+            n += 1
+
+            frame = next(frames, None)
+            if frame is None:
+                break
+            title, data, clim = frame
+
+            im.set_array(data)
+            ax.title.set_text(title)
+            if clim is not None and tuple(clim) != (im.norm.vmin, im.norm.vmax):
+                # neue Norm -> Colorbar ändert sich, Hintergrund neu rendern
+                im.set_clim(*clim)
+                background = None
+
+    plt.close(fig)
+    return n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Threshold- oder Taper-Sweep als GIF/MP4.")
+    parser.add_argument("output", help="Zieldatei (.gif, oder .mp4 mit ffmpeg)")
+    parser.add_argument("--sweep", default="threshold", choices=("threshold",) + TAPER_SWEEPS)
+    parser.add_argument("--start", type=float, default=None)
+    parser.add_argument("--stop", type=float, default=None)
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--fps", type=int, default=5)
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--rescale", action="store_true", help="Farbskala pro Frame anpassen")
+    parser.add_argument("--points", default="tambora_ashfall.csv")
+    parser.add_argument("--countries", default=PipelineConfig.countries_path)
+    parser.add_argument("--lulc", default=None, help="LULC-Raster (Default: COG, falls vorhanden)")
+    args = parser.parse_args(argv)
+
+    # kein Fenster, nur Datei
+    matplotlib.use("Agg")
+
+    pipe = Pipeline(PipelineConfig(points_path=args.points, countries_path=args.countries,
+                                   lulc_path=args.lulc))
+
+    if args.sweep == "threshold":
+        # Thresholds log-verteilt (0.1 -> 100 cm)
+        values = np.geomspace(args.start or 0.1, args.stop or 100.0, args.frames)
+        frames = threshold_frames(pipe, values, args.rescale)
+    else:
+        current = getattr(pipe.config, args.sweep)
+        start = current / 2 if args.start is None else args.start
+        stop = current * 2 if args.stop is None else args.stop
+        frames = taper_frames(pipe, args.sweep, np.linspace(start, stop, args.frames), args.rescale)
+
+    n = render_animation(pipe, frames, args.output, fps=args.fps, dpi=args.dpi)
+    print(f"{n} Frames -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
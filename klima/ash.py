@@ -0,0 +1,66 @@
+"""Aschefeld auf dem Interpolationsgrid: Masken, Threshold-Stufen, Polygone."""
+import numpy as np
+
+from affine import Affine
+from rasterio.features import shapes, sieve
+from scipy.ndimage import binary_fill_holes, binary_closing, binary_opening
+from shapely.geometry import shape
+
+
+def grid_transform(xi, yi):
+    """Affine Transformation für ein Feld auf np.meshgrid(xi, yi).
+
+    xi/yi sind die Knoten (Zellmitten) aus np.linspace. Zeile 0 ist yi[0],
+    also der SÜDrand -> das Grid steht "auf dem Kopf" (positive y-Schrittweite).
+    from_bounds() würde Zeile 0 an den Nordrand legen und das Feld spiegeln.
+    """
+    dx = (xi[-1] - xi[0]) / (len(xi) - 1)
+    dy = (yi[-1] - yi[0]) / (len(yi) - 1)
+    return Affine(dx, 0.0, xi[0] - dx / 2, 0.0, dy, yi[0] - dy / 2)
+
+
+def ash_mask(ZI, threshold, min_pixels=500):
+    """Binärmaske "Asche > threshold", geglättet wie im Hauptskript.
+
+    Löcher füllen, Closing verbindet, Opening entfernt dünne Ausläufer,
+    sieve wirft Inseln < min_pixels weg.
+    """
+    mask = (ZI > threshold) & np.isfinite(ZI)
+
+    mask = binary_fill_holes(mask)
+    mask = binary_closing(mask, iterations=2)
+    mask = binary_opening(mask, iterations=1)
+
+    mask_uint8 = sieve(mask.astype("uint8"), size=min_pixels)
+
+    # optional nochmal Löcher füllen (falls sieve neue Löcher erzeugt)
+    return binary_fill_holes(mask_uint8.astype(bool))
+
+
+def threshold_levels(ZI, thresholds, min_pixels=500):
+    """Alle Thresholds in einem uint8-Raster: Wert k = Zelle liegt in den Masken 1..k.
+
+    thresholds müssen aufsteigend sein. Die Masken werden verschachtelt
+    (Maske k nur innerhalb von Maske k-1), damit eine Zahl pro Zelle reicht.
+    """
+    thresholds = np.asarray(thresholds, dtype=float)
+    if np.any(np.diff(thresholds) <= 0):
+        raise ValueError("thresholds müssen streng aufsteigend sein.")
+
+    level = np.zeros(ZI.shape, dtype=np.uint8)
+    inside = np.ones(ZI.shape, dtype=bool)
+    for k, thr in enumerate(thresholds, start=1):
+        inside &= ash_mask(ZI, thr, min_pixels)
+        level[inside] = k
+
+    return level
+
+
+def polygonize(mask, transform):
+    """Maske -> Liste von shapely-Polygonen (nur Zellen mit Wert 1)."""
+    mask_uint8 = mask.astype("uint8")
+    return [
+        shape(geom)
+        for geom, val in shapes(mask_uint8, mask=mask_uint8, transform=transform)
+        if val == 1
+    ]
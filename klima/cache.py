@@ -0,0 +1,90 @@
+"""Cache auf Platte für teure Zwischenergebnisse (v.a. das interpolierte Aschefeld).
+
+Schlüssel = Hash über die bereinigte Messtabelle + alle Parameter, die das
+Ergebnis verändern. Gespeichert wird als komprimiertes .npz, die ältesten
+(zuletzt benutzten) Einträge fliegen raus, sobald max_bytes überschritten ist.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+
+def table_hash(table):
+    """Hash über eine Tabelle (DataFrame oder Array), nur Werte, keine Indizes."""
+    arr = np.ascontiguousarray(np.asarray(table, dtype=np.float64))
+    h = hashlib.sha256()
+    h.update(str(arr.shape).encode())
+    h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+class FieldCache:
+    """Inhaltsadressierter .npz-Cache mit LRU-Verdrängung nach Größe."""
+
+    def __init__(self, directory=".klima_cache", max_bytes=2 * 1024**3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, table, params):
+        """Schlüssel aus Messtabelle + Parameter-Dict (Reihenfolge egal)."""
+        h = hashlib.sha256()
+        h.update(table_hash(table).encode())
+        h.update(json.dumps(params, sort_keys=True, default=repr).encode())
+        return h.hexdigest()[:32]
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load(self, key):
+        """Dict mit den gespeicherten Arrays oder None, wenn nicht im Cache."""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        with np.load(path, allow_pickle=False) as data:
+            out = {name: data[name] for name in data.files}
+
+        # "zuletzt benutzt" merken -> LRU über die mtime
+        os.utime(path)
+        return out
+
+    def store(self, key, **arrays):
+        """Arrays unter key ablegen (atomar über eine temporäre Datei)."""
+        fd, tmp = tempfile.mkstemp(suffix=".npz", dir=self.directory)
+        os.close(fd)
+        try:
+            np.savez_compressed(tmp, **arrays)
+            os.replace(tmp, self._path(key))
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npz"):
+                continue
+            path = os.path.join(self.directory, name)
+            st = os.stat(path)
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def get_or_compute(self, key, compute):
+        """Aus dem Cache laden oder compute() aufrufen (muss ein Dict von Arrays liefern)."""
+        cached = self.load(key)
+        if cached is not None:
+            return cached
+        arrays = compute()
+        self.store(key, **arrays)
+        return arrays
@@ -0,0 +1,20 @@
+"""MapBiomas-Klassen (Indonesien, Coverage 2024): Code -> Name + Farbe."""
+
+# 0 ist Hintergrund / NoData -> transparent
+CLASS_INFO = {
+    0:  {"name": "NoData / background",          "color": (0, 0, 0, 0)},
+    3:  {"name": "Forest formation",             "color": "#1f8d49"},
+    5:  {"name": "Mangrove",                     "color": "#04381d"},
+    9:  {"name": "Planted forest",               "color": "#7a5900"},
+    13: {"name": "Other natural vegetation",     "color": "#d89f5c"},
+    21: {"name": "Other agriculture",            "color": "#ffefc3"},
+    24: {"name": "Urban area",                   "color": "#d4271e"},
+    25: {"name": "Other non-vegetation",         "color": "#db4d4f"},
+    30: {"name": "Mining pit",                   "color": "#9c0027"},
+    31: {"name": "Aquaculture",                  "color": "#091077"},
+    33: {"name": "River / Lake / Ocean",         "color": "#2532e4"},
+    35: {"name": "Oil palm",                     "color": "#9065d0"},
+    40: {"name": "Rice paddy",                   "color": "#c71585"},
+    76: {"name": "Peat swamp forest",            "color": "#2f7360"},
+}
+
@@ -0,0 +1,121 @@
+"""Sidecar-Index mit den Klassensummen eines LULC-Rasters.
+
+Für "Anteil Klasse belegt" braucht man die Pixel (bzw. Fläche) pro Klasse im
+GANZEN Raster. Das einmal pro Datei rechnen und als JSON daneben legen
+(<raster>.classes.json), statt bei jedem Lauf das ganze Raster zu scannen
+oder (wie graph_agriculture_1.py) aus Prozentwerten zurückzurechnen.
+
+Der Index ist an Größe, mtime und einen Hash über Anfang/Ende der Datei
+gebunden und wird neu gebaut, sobald sich das Raster ändert.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import rasterio
+
+from klima.lulc import N_CODES, class_totals
+
+# hochzählen, wenn sich die Berechnung ändert (z.B. Flächenmodell) -> alte Indizes ungültig
+INDEX_VERSION = 2
+
+_HASH_BYTES = 1024 * 1024
+
+
+def index_path(path):
+    return f"{path}.classes.json"
+
+
+def raster_signature(path):
+    """Billige Signatur: Größe, mtime und sha256 über das erste/letzte MiB."""
+    st = os.stat(path)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        h.update(f.read(_HASH_BYTES))
+        if st.st_size > _HASH_BYTES:
+            f.seek(max(_HASH_BYTES, st.st_size - _HASH_BYTES))
+            h.update(f.read(_HASH_BYTES))
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "head_tail_sha256": h.hexdigest()}
+
+
+def _level_entry(path, overview_level, factor, workers):
+    counts, area = class_totals(path, workers=workers, overview_level=overview_level)
+    kwargs = {} if overview_level is None else {"overview_level": overview_level}
+    with rasterio.open(path, **kwargs) as ds:
+        width, height = ds.width, ds.height
+
+    codes = np.nonzero(counts)[0]
+    return {
+        "overview_level": overview_level,
+        "factor": factor,
+        "width": width,
+        "height": height,
+        "classes": {
+            str(int(c)): {"pixels": int(counts[c]), "area_km2": float(area[c])}
+            for c in codes
+        },
+    }
+
+
+def build_class_index(path, workers=1, overviews=True):
+    """Index für path rechnen (volle Auflösung + alle Overview-Stufen) und schreiben."""
+    levels = [_level_entry(path, None, 1, workers)]
+
+    if overviews:
+        with rasterio.open(path) as ds:
+            factors = ds.overviews(1)
+        for i, factor in enumerate(factors):
+            levels.append(_level_entry(path, i, factor, workers))
+
+    index = {
+        "version": INDEX_VERSION,
+        "raster": os.path.basename(path),
+        "signature": raster_signature(path),
+        "levels": levels,
+    }
+
+    with open(index_path(path), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    return index
+
+
+def load_class_index(path, build=True, workers=1):
+    """Gültigen Index laden, sonst (build=True) neu bauen, sonst None.
+
+    Fehlt das Raster selbst, aber der Index ist da, wird er ungeprüft
+    benutzt (z.B. Analyse-Skripte auf einem Rechner ohne das große GeoTIFF).
+    """
+    ipath = index_path(path)
+    index = None
+    if os.path.exists(ipath):
+        with open(ipath, encoding="utf-8") as f:
+            index = json.load(f)
+
+    if not os.path.exists(path):
+        return index
+
+    if (
+        index is not None
+        and index.get("version") == INDEX_VERSION
+        and index.get("signature") == raster_signature(path)
+    ):
+        return index
+
+    return build_class_index(path, workers=workers) if build else None
+
+
+def index_totals(index, overview_level=None):
+    """(pixels, area_km2) pro Klassencode als Arrays der Länge 256."""
+    for level in index["levels"]:
+        if level["overview_level"] == overview_level:
+            break
+    else:
+        raise KeyError(f"Overview-Stufe {overview_level} nicht im Index.")
+
+    pixels = np.zeros(N_CODES, dtype=np.int64)
+    area = np.zeros(N_CODES, dtype=np.float64)
+    for code, entry in level["classes"].items():
+        pixels[int(code)] = entry["pixels"]
+        area[int(code)] = entry["area_km2"]
+    return pixels, area
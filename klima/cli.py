@@ -0,0 +1,201 @@
+"""Kommandozeile ohne Fenster: python -m klima run|figures config.toml
+
+Alle Pfade kommen aus einer TOML-Datei (relativ zur Datei), nicht aus
+hart kodierten Pfaden in den Skripten, matplotlib läuft mit Agg:
+
+    python -m klima run config.toml              # Report + Export (wie tambora_int_data.py)
+    python -m klima run config.toml --figures    # danach alle Abbildungen
+    python -m klima figures config.toml          # nur Abbildungen
+    python -m klima figures config.toml --only map affectedcountries
+
+Die Abbildungen (Hauptkarte + scripts/analysis/*.py) laufen gleichzeitig in
+einem Prozess-Pool, ein kompletter Report dauert so lange wie die langsamste.
+Die Analyse-Skripte laufen im work_dir und bekommen die Eingaben über
+KLIMA_COUNTRIES, KLIMA_LULC und KLIMA_EXPORT_DIR. Beispiel: config.example.toml.
+"""
+import argparse
+import dataclasses
+import os
+import runpy
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Abbildung -> Skript (relativ zum Repo); "map" ist die Übersichtskarte der Pipeline
+ANALYSIS_SCRIPTS = {
+    "affectedcountries": os.path.join("scripts", "analysis", "affectedcountries.py"),
+    "affectedcountries_procent": os.path.join("scripts", "analysis", "affectedcountries_procent.py"),
+    "graph_agriculture_1": os.path.join("scripts", "analysis", "graph_agriculture_1.py"),
+    "graph_partagriculture_2": os.path.join("scripts", "analysis", "graph_partagriculture_2.py"),
+}
+FIGURES = ("map",) + tuple(ANALYSIS_SCRIPTS)
+
+# Einträge in [pipeline], die Pfade sind (werden relativ zur TOML-Datei aufgelöst)
+PATH_KEYS = ("points_path", "countries_path", "lulc_path", "sweep_out_dir", "cache_dir",
+             "ash_shapes_path", "export_dir", "damage_raster_path")
+
+
+def _load_toml(path):
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        try:
+            import tomli as tomllib
+        except ImportError as err:
+            raise ImportError("TOML-Konfiguration braucht Python >= 3.11 oder tomli (pip install tomli).") from err
+
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def load_config(path):
+    """TOML lesen, gibt (PipelineConfig, Einstellungen) zurück.
+
+    [pipeline] = Felder von PipelineConfig, [figures] = work_dir, map_path,
+    dpi, workers, names. Relative Pfade gelten ab dem Ordner der TOML-Datei.
+    """
+    from klima.pipeline import PipelineConfig
+
+    data = _load_toml(path)
+    base = os.path.dirname(os.path.abspath(path))
+
+    unknown = set(data) - {"pipeline", "figures"}
+    if unknown:
+        raise ValueError(f"{path}: unbekannte Abschnitte {sorted(unknown)} (erlaubt: pipeline, figures)")
+
+    params = dict(data.get("pipeline", {}))
+    allowed = {f.name for f in dataclasses.fields(PipelineConfig)}
+    unknown = set(params) - allowed
+    if unknown:
+        raise ValueError(f"{path}: unbekannte Pipeline-Parameter {sorted(unknown)}")
+    for key in PATH_KEYS:
+        if params.get(key) is not None:
+            params[key] = os.path.join(base, params[key])
+    for key in ("support_levels", "damage_edges"):
+        if key in params:
+            params[key] = tuple(params[key])
+
+    figures = dict(data.get("figures", {}))
+    unknown = set(figures) - {"work_dir", "map_path", "dpi", "workers", "names"}
+    if unknown:
+        raise ValueError(f"{path}: unbekannte Einträge in [figures] {sorted(unknown)}")
+    figures["work_dir"] = os.path.normpath(os.path.join(base, figures.get("work_dir", ".")))
+    figures["map_path"] = os.path.join(figures["work_dir"], figures.get("map_path", "tambora_map.png"))
+    figures.setdefault("dpi", 200)
+    figures.setdefault("workers", None)
+    figures.setdefault("names", list(FIGURES))
+
+    return PipelineConfig(**params), figures
+
+
+def figure_env(config):
+    """Umgebungsvariablen, über die die Analyse-Skripte ihre Eingaben finden."""
+    env = {"KLIMA_COUNTRIES": os.path.abspath(config.countries_path)}
+    if config.lulc_path is not None:
+        env["KLIMA_LULC"] = os.path.abspath(config.lulc_path)
+    if config.export_dir is not None:
+        env["KLIMA_EXPORT_DIR"] = os.path.abspath(config.export_dir)
+    return env
+
+
+def _render(name, config, figures, env):
+    """Eine Abbildung rendern (läuft im Worker-Prozess), gibt (Name, Sekunden) zurück."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    t0 = time.perf_counter()
+    os.environ.update(env)
+    os.chdir(figures["work_dir"])
+    if name == "map":
+        from klima.pipeline import Pipeline
+
+        fig, _ = Pipeline(config).figure()
+        fig.savefig(figures["map_path"], dpi=figures["dpi"])
+    else:
+        # die Skripte enden mit plt.show() -> unter Agg nur eine Warnung
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message=".*non-interactive.*")
+            runpy.run_path(os.path.join(ROOT, ANALYSIS_SCRIPTS[name]), run_name="__main__")
+    plt.close("all")
+    return name, time.perf_counter() - t0
+
+
+def render_figures(config, figures, names=None, workers=None):
+    """Abbildungen parallel rendern, gibt {Name: Sekunden oder Exception} zurück."""
+    names = list(names or figures["names"])
+    unknown = set(names) - set(FIGURES)
+    if unknown:
+        raise ValueError(f"Unbekannte Abbildungen: {sorted(unknown)} (erlaubt: {list(FIGURES)})")
+
+    os.makedirs(figures["work_dir"], exist_ok=True)
+    env = figure_env(config)
+    workers = workers or figures["workers"] or min(len(names), os.cpu_count() or 1)
+
+    results = {}
+    with ProcessPoolExecutor(max(1, workers)) as executor:
+        futures = {executor.submit(_render, name, config, figures, env): name for name in names}
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                results[name] = fut.result()[1]
+            except Exception as err:  # eine kaputte Abbildung soll die anderen nicht stoppen
+                results[name] = err
+    return results
+
+
+def _print_figures(results):
+    failed = False
+    for name, res in results.items():
+        if isinstance(res, Exception):
+            failed = True
+            print(f"  {name:27s} FEHLER: {type(res).__name__}: {res}")
+        else:
+            print(f"  {name:27s} {res:6.1f} s")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m klima", description="Tambora-Workflow ohne Fenster.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Report + Export (und optional alle Abbildungen)")
+    p_run.add_argument("config", help="TOML-Konfiguration")
+    p_run.add_argument("--figures", action="store_true", help="danach alle Abbildungen rendern")
+    p_run.add_argument("--workers", type=int, default=None, help="Prozesse für die Abbildungen")
+
+    p_fig = sub.add_parser("figures", help="Abbildungen parallel rendern")
+    p_fig.add_argument("config", help="TOML-Konfiguration")
+    p_fig.add_argument("--only", nargs="+", choices=FIGURES, default=None)
+    p_fig.add_argument("--workers", type=int, default=None)
+
+    args = parser.parse_args(argv)
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    config, figures = load_config(args.config)
+
+    if args.command == "run":
+        from klima.pipeline import Pipeline
+
+        Pipeline(config).report()
+        if not args.figures:
+            return 0
+        names = None
+    else:
+        names = args.only
+
+    t0 = time.perf_counter()
+    results = render_figures(config, figures, names, args.workers)
+    print(f"\nAbbildungen ({time.perf_counter() - t0:.1f} s, work_dir {figures['work_dir']}):")
+    return 1 if _print_figures(results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Einmalige Vorverarbeitung: MapBiomas-Download -> Cloud-Optimized GeoTIFF in EPSG:4326.
+
+Das Original ist riesig und ggf. nicht in EPSG:4326, d.h. jeder Lauf hat
+on the fly gewarpt und für den Plot neu resampelt. Das COG ist gekachelt,
+komprimiert, schon in EPSG:4326 und hat interne Übersichten (Overviews),
+die Skripte lesen dann nur noch die passende Overview-Stufe.
+
+Aufruf:
+    python -m klima.cog indo_agri_map.tif indo_agri_map_cog.tif
+"""
+import argparse
+
+import rasterio
+import rasterio.shutil
+from rasterio.enums import Resampling
+from rasterio.vrt import WarpedVRT
+
+
+def build_lulc_cog(src_path, dst_path, blocksize=512, compress="DEFLATE", overview_resampling="MODE"):
+    """src_path als COG (EPSG:4326, gekachelt, Overviews) nach dst_path schreiben.
+
+    Reprojektion immer nearest (Klassencodes!), Overviews per Default "MODE"
+    (häufigste Klasse im Block) – "NEAREST" geht auch und ist schneller.
+    """
+    with rasterio.open(src_path) as src:
+        if src.crs is None:
+            raise RuntimeError(f"{src_path} hat kein CRS – bitte prüfen.")
+
+        options = dict(
+            driver="COG",
+            BLOCKSIZE=blocksize,
+            COMPRESS=compress,
+            PREDICTOR="NO",  # Klassencodes -> kein Prädiktor
+            OVERVIEW_RESAMPLING=overview_resampling,
+            BIGTIFF="IF_SAFER",
+            NUM_THREADS="ALL_CPUS",
+        )
+
+        if src.crs.to_string() != "EPSG:4326":
+            with WarpedVRT(src, crs="EPSG:4326", resampling=Resampling.nearest) as vrt:
+                rasterio.shutil.copy(vrt, dst_path, **options)
+        else:
+            rasterio.shutil.copy(src, dst_path, **options)
+
+    return dst_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("src", help="LULC-Raster, z.B. indo_agri_map.tif")
+    parser.add_argument("dst", help="Ziel-COG, z.B. indo_agri_map_cog.tif")
+    parser.add_argument("--blocksize", type=int, default=512)
+    parser.add_argument("--compress", default="DEFLATE")
+    parser.add_argument("--overview-resampling", default="MODE", choices=["MODE", "NEAREST"])
+    args = parser.parse_args(argv)
+
+    build_lulc_cog(args.src, args.dst, args.blocksize, args.compress, args.overview_resampling)
+    with rasterio.open(args.dst) as ds:
+        print(f"{args.dst}: {ds.width} x {ds.height} px, Overviews {ds.overviews(1)}")
+
+
+if __name__ == "__main__":
+    main()
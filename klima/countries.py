@@ -0,0 +1,103 @@
+"""Länder (Natural Earth) für die Zuordnung von Ascheflächen.
+
+Statt Länderpolygon ∩ Aschepolygon (gpd.overlay, wird bei feinen Grids und
+genaueren Grenzen sehr langsam) werden die Länder einmal als ID-Raster auf
+das Aschegrid gebrannt (gecacht) und die Flächen per bincount summiert.
+"""
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from affine import Affine
+from rasterio.features import rasterize
+
+from klima.lulc import row_cell_area_km2
+
+
+def load_countries(path):
+    """Länder-Shapefile laden, immer in EPSG:4326 (lon/lat)."""
+    return gpd.read_file(path).to_crs("EPSG:4326")
+
+
+def country_table(world_countries, name_col="ADMIN"):
+    """(Namen, Geometrien) in fester Reihenfolge.
+
+    Raster-IDs sind Listenindex + 1, 0 heißt "kein Land" (Meer/außerhalb).
+    """
+    return list(world_countries[name_col]), list(world_countries.geometry)
+
+
+def _fine_transform(transform, supersample):
+    return transform * Affine.scale(1.0 / supersample)
+
+
+def country_id_grid(country_shapes, transform, shape, supersample=4):
+    """Länder-ID-Raster (uint16, ID = Listenindex + 1) auf dem Aschegrid.
+
+    supersample=s brennt auf einem s-mal feineren Grid (jede Aschezelle wird
+    in s x s Teilzellen aufgeteilt), damit Küsten/Grenzen genauer werden.
+    """
+    height, width = shape
+    return rasterize(
+        [(g, i + 1) for i, g in enumerate(country_shapes)],
+        out_shape=(height * supersample, width * supersample),
+        transform=_fine_transform(transform, supersample),
+        fill=0,
+        dtype="uint16",
+    )
+
+
+def cached_country_id_grid(cache, shapefile, country_shapes, transform, shape, supersample=4):
+    """country_id_grid() über klima.cache.FieldCache (None = ohne Cache).
+
+    Schlüssel: Shapefile (Größe + mtime) + Grid-Transformation + Shape + supersample.
+    """
+    if cache is None:
+        return country_id_grid(country_shapes, transform, shape, supersample)
+
+    st = os.stat(shapefile)
+    key = cache.key(
+        np.array(list(transform)[:6] + list(shape), dtype=float),
+        {"what": "country_id_grid", "shapefile": os.path.abspath(shapefile),
+         "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+         "n_countries": len(country_shapes), "supersample": supersample},
+    )
+    data = cache.get_or_compute(
+        key, lambda: {"ids": country_id_grid(country_shapes, transform, shape, supersample)}
+    )
+    return data["ids"]
+
+
+def country_areas(mask, ids, transform, country_names, supersample=4):
+    """Fläche [km²] unter mask pro Land, als Series (nur Länder > 0, absteigend).
+
+    mask liegt auf dem Aschegrid, ids auf dem s-mal feineren Grid aus
+    country_id_grid(). Gewichtet wird mit der echten Zellfläche pro Zeile.
+    ids wird nur als View (Aschezelle x Teilzeile x Teilspalte) gelesen, kopiert
+    werden nur die Teilzellen unter der Maske -> geht auch direkt auf einem memmap.
+    """
+    s = supersample
+    mask = np.asarray(mask, dtype=bool)
+    ny, nx = mask.shape
+    row_area = row_cell_area_km2(_fine_transform(transform, s), 0, ny * s).reshape(ny, s)
+
+    rows, cols = np.nonzero(mask)
+    sub_ids = ids.reshape(ny, s, nx, s)[rows, :, cols, :]       # (Zellen, s, s)
+    weights = np.broadcast_to(row_area[rows][:, :, None], sub_ids.shape)
+    areas = np.bincount(sub_ids.ravel(), weights=weights.ravel(), minlength=len(country_names) + 1)
+
+    out = pd.Series(areas[1:], index=pd.Index(country_names, name="ADMIN"), name="area_km2")
+    out = out.groupby(level=0).sum()
+    return out[out > 0].sort_values(ascending=False)
+
+
+def country_areas_overlay(world_countries, ash_union, name_col="ADMIN"):
+    """Exakter Vektor-Modus (zur Validierung): Länderpolygon ∩ Aschepolygon.
+
+    Flächen korrekt nur in Equal Area bestimmen (EPSG:6933).
+    """
+    affected = gpd.overlay(world_countries, ash_union, how="intersection")
+    affected_eq = affected.to_crs("EPSG:6933")
+    affected_eq["area_km2"] = affected_eq.area / 1e6
+    return affected_eq.groupby(name_col)["area_km2"].sum().sort_values(ascending=False)
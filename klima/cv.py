@@ -0,0 +1,218 @@
+"""Kreuzvalidierung der RBF-Einstellungen (function, smooth, eps, epsilon, neighbors).
+
+Bisher wurde "linear" (Hauptskript) vs. "multiquadric" (interpolation_two_dots.py)
+und smooth/eps nach Augenmaß gewählt. Hier wird jede Einstellung an den
+Messpunkten selbst geprüft, Fehler in log10-Raum (da wird auch interpoliert):
+
+  - Leave-one-out, globaler Kernel: geschlossene Form nach Rippa (1999).
+    Für (K + smoothing*I) c = d ist der LOO-Fehler am Punkt i
+        d_i - f_{-i}(x_i) = c_i / (A^-1)_ii,
+    also eine Faktorisierung pro Einstellung statt N Neufits.
+  - Leave-one-out mit neighbors=k oder k-fold: echte Neufits (bei ~40
+    Messpunkten trotzdem schnell).
+
+Die Einstellungen laufen parallel in einem Prozess-Pool, Ergebnis ist eine
+nach rmse_log sortierte Tabelle. Mit projection="aeqd" in der Config wird wie
+in der Pipeline auf den projizierten Punkten [km] gerechnet (epsilon in km).
+
+    python -m klima.cv --function linear multiquadric --smooth 0 0.005 0.05 --eps 1e-3 1e-2
+    python -m klima.cv settings.yaml --folds 5 -o cv.csv
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import lu_factor, lu_solve
+from scipy.spatial.distance import cdist
+
+from klima.interp import LEGACY_KERNELS, legacy_epsilon, rbf_interpolator
+from klima.pipeline import Pipeline, PipelineConfig
+from klima.projection import PROJECTIONS, project_points
+from klima.scenarios import expand_grid, load_scenarios
+
+CV_PARAMS = ("function", "smooth", "eps", "epsilon", "neighbors")
+
+# Kernel von scipy.interpolate.RBFInterpolator (r = Distanz * epsilon)
+_KERNELS = {
+    "linear": lambda r: -r,
+    "cubic": lambda r: r**3,
+    "quintic": lambda r: -r**5,
+    "thin_plate_spline": lambda r: np.where(r > 0, r**2 * np.log(np.where(r > 0, r, 1.0)), 0.0),
+    "multiquadric": lambda r: -np.sqrt(1 + r**2),
+    "inverse_multiquadric": lambda r: 1 / np.sqrt(1 + r**2),
+    "gaussian": lambda r: np.exp(-r**2),
+}
+
+
+def system_matrix(x, y, function="linear", smooth=0.0, epsilon=None):
+    """Linke Seite K + smoothing*I, genau wie rbf_interpolator() sie aufstellt."""
+    kernel, sign, needs_eps = LEGACY_KERNELS[function]
+    scale = 1.0
+    if needs_eps:
+        scale = 1.0 / (legacy_epsilon(x, y) if epsilon is None else epsilon)
+
+    pts = np.column_stack([x, y])
+    A = _KERNELS[kernel](cdist(pts, pts) * scale)
+    A[np.diag_indices_from(A)] += -sign * smooth
+    return A
+
+
+def loo_residuals(x, y, values, function="linear", smooth=0.0, epsilon=None):
+    """LOO-Fehler d_i - f_{-i}(x_i) aller Punkte aus einer LU-Zerlegung (Rippa)."""
+    lu = lu_factor(system_matrix(x, y, function, smooth, epsilon))
+    A_inv = lu_solve(lu, np.eye(len(values)))
+    c = A_inv @ values
+    return c / np.diag(A_inv)
+
+
+def refit_residuals(x, y, values, folds, function="linear", smooth=0.0, epsilon=None, neighbors=None):
+    """Fehler mit echten Neufits: folds = Fold-Nummer pro Punkt (LOO: np.arange(n))."""
+    x, y, values = (np.asarray(a, dtype=float) for a in (x, y, values))
+    res = np.empty(len(values))
+    for f in np.unique(folds):
+        test = folds == f
+        train = ~test
+        k = None if neighbors is None else min(int(neighbors), int(train.sum()))
+        rbf = rbf_interpolator(x[train], y[train], values[train], function=function, smooth=smooth,
+                               epsilon=epsilon, neighbors=k)
+        res[test] = values[test] - rbf(np.column_stack([x[test], y[test]]))
+    return res
+
+
+def fold_ids(n, n_folds=None, seed=0):
+    """Fold-Nummer pro Punkt, n_folds=None -> Leave-one-out."""
+    if n_folds is None or n_folds >= n:
+        return np.arange(n)
+    return np.random.default_rng(seed).permutation(np.arange(n) % n_folds)
+
+
+def evaluate_setting(x, y, z, setting, n_folds=None, seed=0):
+    """Eine Einstellung kreuzvalidieren, gibt eine Tabellenzeile (Dict) zurück."""
+    values = np.log10(z + setting["eps"])
+    # Formparameter wie beim Fit auf allen Punkten (sonst hätte jeder Fold seinen eigenen Default)
+    epsilon = setting["epsilon"]
+    if epsilon is None and LEGACY_KERNELS[setting["function"]][2]:
+        epsilon = legacy_epsilon(x, y)
+    kwargs = dict(function=setting["function"], smooth=setting["smooth"], epsilon=epsilon)
+
+    if n_folds is None and setting["neighbors"] is None:
+        res = loo_residuals(x, y, values, **kwargs)
+        method = "loo (Rippa)"
+    else:
+        folds = fold_ids(len(values), n_folds, seed)
+        res = refit_residuals(x, y, values, folds, neighbors=setting["neighbors"], **kwargs)
+        method = "loo" if n_folds is None else f"{n_folds}-fold"
+
+    return {
+        **setting,
+        "method": method,
+        "n": len(res),
+        "rmse_log": float(np.sqrt(np.mean(res**2))),
+        "mae_log": float(np.mean(np.abs(res))),
+        "bias_log": float(np.mean(res)),
+        "max_abs_log": float(np.max(np.abs(res))),
+    }
+
+
+def _evaluate_batch(x, y, z, settings, n_folds, seed):
+    return [evaluate_setting(x, y, z, s, n_folds, seed) for s in settings]
+
+
+def settings_table(settings, config=None):
+    """Einstellungen prüfen und mit den Defaults aus config auffüllen (Spalten CV_PARAMS)."""
+    config = config if config is not None else PipelineConfig()
+    df = pd.DataFrame(settings).reset_index(drop=True)
+
+    unknown = set(df.columns) - set(CV_PARAMS)
+    if unknown:
+        raise ValueError(f"Unbekannte CV-Parameter: {sorted(unknown)} (erlaubt: {list(CV_PARAMS)})")
+    bad = set(df.get("function", [])) - set(LEGACY_KERNELS)
+    if bad:
+        raise ValueError(f"Unbekannte RBF-Funktion(en): {sorted(bad)} (erlaubt: {sorted(LEGACY_KERNELS)})")
+
+    for name in CV_PARAMS:
+        default = getattr(config, name, None)
+        if name not in df.columns:
+            df[name] = [default] * len(df)
+        else:
+            df[name] = df[name].astype(object).where(df[name].notna(), default)
+
+    df["smooth"] = df["smooth"].astype(float)
+    df["eps"] = df["eps"].astype(float)
+    df["epsilon"] = [None if v is None or pd.isna(v) else float(v) for v in df["epsilon"]]
+    df["neighbors"] = [None if v is None or pd.isna(v) else int(v) for v in df["neighbors"]]
+    return df[list(CV_PARAMS)]
+
+
+def run_cv(settings, config=None, n_folds=None, seed=0, workers=1):
+    """Alle Einstellungen kreuzvalidieren, gibt die Tabelle sortiert nach rmse_log zurück (Spalte rank).
+
+    Die Einstellungen werden auf workers Pakete verteilt (ein Paket pro Prozess).
+    """
+    pipe = Pipeline(config)
+    cfg = pipe.config
+    x, y, z = pipe.measurements
+    if cfg.projection is not None:
+        if cfg.projection not in PROJECTIONS:
+            raise ValueError(f"Unbekannte projection: {cfg.projection!r} (None/aeqd)")
+        x, y = project_points(x, y, cfg.lon0, cfg.lat0)
+    records = settings_table(settings, cfg).to_dict("records")
+
+    if workers is None or workers < 1:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(records))
+    batches = [list(b) for b in np.array_split(np.array(records, dtype=object), workers) if len(b)]
+    if workers == 1:
+        results = [_evaluate_batch(x, y, z, b, n_folds, seed) for b in batches]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(_evaluate_batch, x, y, z, b, n_folds, seed) for b in batches]
+            results = [fut.result() for fut in futures]
+
+    df = pd.DataFrame([r for batch in results for r in batch])
+    df = df.sort_values(["rmse_log", "mae_log"], kind="stable").reset_index(drop=True)
+    df.insert(0, "rank", np.arange(1, len(df) + 1))
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kreuzvalidierung der RBF-Einstellungen (Fehler in log10).")
+    parser.add_argument("settings", nargs="?", default=None,
+                        help="Einstellungen als .csv/.yaml (wie klima.scenarios), sonst aus den Optionen")
+    parser.add_argument("--function", nargs="+", default=["linear", "multiquadric"])
+    parser.add_argument("--smooth", nargs="+", type=float, default=[0.0, 0.005, 0.05])
+    parser.add_argument("--eps", nargs="+", type=float, default=[1e-3])
+    parser.add_argument("--epsilon", nargs="+", type=float, default=None, help="Formparameter [Grad, mit --projection km]")
+    parser.add_argument("--neighbors", nargs="+", type=int, default=None)
+    parser.add_argument("--folds", type=int, default=None, help="k-fold statt Leave-one-out")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--points", default="tambora_ashfall.csv")
+    parser.add_argument("--projection", default=None, choices=["aeqd"], help="auf AEQD-Koordinaten [km]")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("-o", "--output", default=None, help="Tabelle als .csv oder .parquet")
+    args = parser.parse_args(argv)
+
+    if args.settings is not None:
+        settings = load_scenarios(args.settings)
+    else:
+        grid = {"function": args.function, "smooth": args.smooth, "eps": args.eps}
+        if args.epsilon is not None:
+            grid["epsilon"] = args.epsilon
+        if args.neighbors is not None:
+            grid["neighbors"] = args.neighbors
+        settings = expand_grid(grid)
+
+    df = run_cv(settings, PipelineConfig(points_path=args.points, projection=args.projection, cache_dir=None), args.folds, args.seed,
+                args.workers)
+    print(df.to_string(index=False))
+    if args.output is not None:
+        if args.output.endswith(".parquet"):
+            df.to_parquet(args.output, index=False)
+        else:
+            df.to_csv(args.output, sep=";", index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Schadensklassen nach Damage_Assessment/Damage_Assessment.txt in einem Durchlauf.
+
+Statt einer Maske pro Dicke (und einem Pipeline-Lauf pro Maske) bekommt jede
+Zelle eine Schadensklasse als uint8 (klima.ash.threshold_levels mit den
+Klassengrenzen), die Statistik zählt Land x Klasse x Schadensklasse in einem
+bincount über den kombinierten Index (klima.lulc.sweep_counts):
+
+    0  keine Asche    < 0.1 cm (bzw. unter threshold_calc)
+    1  gering         0.1 - 1 cm
+    2  mittel         1 - 10 cm
+    3  schwer         10 - 100 cm
+    4  Verschüttung   > 100 cm
+
+write_damage_raster() schreibt dasselbe Raster auf dem LULC-Grid (uint8,
+gleiche Ausdehnung und Pixelgröße) für Karten im Schadensbericht.
+"""
+import numpy as np
+import pandas as pd
+import rasterio
+from rasterio.windows import bounds as window_bounds
+
+from klima.ash import threshold_levels
+from klima.lulc import (
+    N_CODES, iter_windows, level_bounds, open_lulc, sample_grid, sweep_counts, window_intersects,
+)
+
+# Untergrenzen der Schadensklassen 1..4 [cm]
+DAMAGE_EDGES = (0.1, 1.0, 10.0, 100.0)
+
+# Kurzfassung aus Damage_Assessment.txt
+DAMAGE_CLASSES = {
+    0: {"name": "keine Asche", "effect": "-"},
+    1: {"name": "gering", "effect": "Reizung von Haut/Augen, Säureschäden und Abrieb an Pflanzen, "
+                                    "nährstoffreiche Asche evtl. sogar positiv für den Boden"},
+    2: {"name": "mittel", "effect": "Trinkwasser/Futter beeinträchtigt, Ernteschäden durch Gewicht, "
+                                    "Beschattung und sauren Sickerwasser, Nahrungsknappheit möglich"},
+    3: {"name": "schwer", "effect": "Ernte verloren, keine Aussaat möglich, Boden muss saniert werden, "
+                                    "Bäume durch Last geschädigt"},
+    4: {"name": "Verschüttung", "effect": "alles verschüttet, Leben nur mit massiver Räumung möglich"},
+}
+
+
+def damage_labels(edges=DAMAGE_EDGES):
+    """Dickenbereich pro Schadensklasse 0..len(edges) als Text, z.B. "1-10 cm"."""
+    edges = [f"{e:g}" for e in edges]
+    labels = [f"< {edges[0]} cm"]
+    labels += [f"{a}-{b} cm" for a, b in zip(edges[:-1], edges[1:])]
+    labels.append(f"> {edges[-1]} cm")
+    return labels
+
+
+def damage_levels(ZI, edges=DAMAGE_EDGES, min_pixels=500):
+    """uint8-Raster Schadensklasse 0..len(edges) auf dem Aschegrid (wie threshold_levels)."""
+    if len(edges) > 254:
+        raise ValueError("Höchstens 254 Klassengrenzen (uint8).")
+    return threshold_levels(ZI, edges, min_pixels=min_pixels)
+
+
+def damage_cube(path, level, ash_transform, countries, n_classes, workers=1, overview_level=None):
+    """(counts, area_km2) mit Shape (Länder + 1, 256, n_classes + 1), ein Durchlauf.
+
+    Schadensklasse 0 ist nur in Fenstern mit Asche gezählt (full=False),
+    für "ohne Asche" die Klassensummen aus klima.classindex nehmen.
+    """
+    return sweep_counts(path, level, ash_transform, n_classes, workers=workers, full=False,
+                        countries=countries, overview_level=overview_level)
+
+
+def damage_table(counts, area, country_names, class_info, edges=DAMAGE_EDGES):
+    """Long-Tabelle Land x LULC-Klasse x Schadensklasse (1..len(edges)) aus damage_cube().
+
+    Für jedes Land mit Asche alle Klassen aus class_info (plus sonst im Raster
+    vorkommende Codes) und alle Schadensklassen, auch mit 0 Pixeln, damit der
+    Bericht feste Zeilen hat. Code 0 (NoData) und "kein Land" ohne Asche fehlen.
+    """
+    counts = np.asarray(counts)
+    area = np.asarray(area)
+    n_damage = len(edges)
+    labels = damage_labels(edges)
+    names = ["(kein Land)"] + list(country_names)
+
+    ash = counts[:, :, 1:]
+    ctys = np.nonzero(ash.sum(axis=(1, 2)))[0]
+    codes = sorted((set(class_info) | set(np.nonzero(ash.sum(axis=(0, 2)))[0].tolist())) - {0})
+    codes = np.array([c for c in codes if c < N_CODES], dtype=np.int64)
+
+    # Land x Code x Schadensklasse als Gitter, dann flach
+    c_idx, k_idx, d_idx = np.meshgrid(ctys, codes, np.arange(1, n_damage + 1), indexing="ij")
+    c_idx, k_idx, d_idx = c_idx.ravel(), k_idx.ravel(), d_idx.ravel()
+
+    return pd.DataFrame({
+        "Land": np.asarray(names, dtype=object)[c_idx],
+        "Code": k_idx,
+        "Klasse": [class_info.get(int(c), {"name": "Unknown"})["name"] for c in k_idx],
+        "damage_class": d_idx,
+        "Schaden": [DAMAGE_CLASSES.get(int(d), {"name": str(d)})["name"] for d in d_idx],
+        "Dicke": np.asarray(labels, dtype=object)[d_idx],
+        "Pixels (Ash)": counts[c_idx, k_idx, d_idx].astype(np.int64),
+        "area_km2": area[c_idx, k_idx, d_idx].astype(float),
+    })
+
+
+def write_damage_raster(path, level, ash_transform, lulc_path, edges=DAMAGE_EDGES, tile_size=2048,
+                        overview_level=None, compress="DEFLATE"):
+    """Schadensklassen auf dem LULC-Grid als uint8-GeoTIFF (gekachelt, 0 = keine Asche).
+
+    Gleiches Grid wie das (ggf. nach EPSG:4326 gewarpte) LULC-Raster, jede
+    Pixelmitte bekommt die Klasse der Aschezelle darunter (nearest, wie in der
+    Statistik). Geschrieben werden nur Fenster mit Asche, der Rest bleibt leer
+    (SPARSE_OK, kostet keinen Platz).
+    """
+    level = np.asarray(level, dtype=np.uint8)
+    bounds = level_bounds(level, ash_transform)
+
+    with open_lulc(lulc_path, overview_level) as ds:
+        profile = dict(driver="GTiff", width=ds.width, height=ds.height, count=1, dtype="uint8",
+                       crs=ds.crs, transform=ds.transform, nodata=None, tiled=True,
+                       blockxsize=512, blockysize=512, compress=compress, sparse_ok=True,
+                       bigtiff="IF_SAFER")
+        with rasterio.open(path, "w", **profile) as dst:
+            dst.set_band_description(1, "damage class (0 = none, " + ", ".join(
+                f"{k} = {lab}" for k, lab in enumerate(damage_labels(edges)[1:], start=1)) + ")")
+            if bounds is None:
+                return path
+            for win in iter_windows(ds, tile_size):
+                if not window_intersects(window_bounds(win, ds.transform), bounds):
+                    continue
+                shape = (int(win.height), int(win.width))
+                block = sample_grid(level, ash_transform, ds.window_transform(win), shape)
+                if block.any():
+                    dst.write(block, 1, window=win)
+    return path
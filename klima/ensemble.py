@@ -0,0 +1,229 @@
+"""Monte-Carlo-Ensemble: wie sicher sind Ascheausdehnung und Flächen pro Land/Klasse?
+
+Die Dicken in tambora_ashfall.csv sind historische Angaben ("4 ft", "3.75 in",
+geschätzte Entfernungen), das Hauptskript rechnet trotzdem genau ein Feld.
+Hier werden n Realisierungen gerechnet:
+
+  - Dicke: log-normal gestört, z * exp(thickness_sigma * N(0, 1))
+  - Lage: lon/lat + position_sigma * N(0, 1) [Grad], n_layouts verschiedene
+    Lagen. Pro Lage eine Kernelmatrix, alle Dicken-Realisierungen dieser Lage
+    werden in einem Solve mit vielen rechten Seiten gelöst (rbf_interpolator
+    mit 2-D values) und gemeinsam ausgewertet.
+
+Gerechnet wird in Paketen von batch_size Realisierungen: RBF blockweise über
+die Gridzeilen, Rücktransformation/Clipping/Taper für alle auf einmal, dann
+pro Realisierung die Maske wie im Hauptlauf (klima.ash.ash_mask) und sofort
+reduziert auf
+
+  - Überschreitungswahrscheinlichkeit pro Gridzelle (Anteil Realisierungen in der Maske)
+  - Fläche pro Land x Klasse und Realisierung (über klima.lulc.cell_table,
+    das LULC-Raster wird nicht gelesen) -> Mittelwert und Perzentile
+
+Es liegen nie mehr als batch_size Felder gleichzeitig im Speicher.
+
+    python -m klima.ensemble -n 1000 --thickness-sigma 0.5 --position-sigma 0.05 -o ensemble
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from klima.ash import ash_mask
+from klima.classes import CLASS_INFO
+from klima.export import write_field_cog
+from klima.field import finish_points
+from klima.interp import iter_row_blocks, rbf_interpolator
+from klima.lulc import N_CODES
+from klima.pipeline import Pipeline, PipelineConfig
+from klima.support import apply_cutoff
+
+EXCEEDANCE = "ash_exceedance.tif"
+CLASS_COUNTRY = "ensemble_class_country.parquet"
+COUNTRY = "ensemble_country.parquet"
+
+
+def perturb_measurements(x, y, z, n_members, thickness_sigma=0.5, position_sigma=0.0, n_layouts=20,
+                         seed=0):
+    """Realisierungen ziehen, gibt (layouts, Z) zurück.
+
+    layouts = Liste von (x, y), eine pro Lage (ohne position_sigma nur die
+    Originallage). Z hat Shape (Punkte, n_members), Realisierung m gehört zu
+    Lage m % len(layouts).
+    """
+    rng = np.random.default_rng(seed)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    z = np.asarray(z, dtype=float)
+
+    if position_sigma > 0:
+        layouts = [
+            (x + position_sigma * rng.standard_normal(len(x)), y + position_sigma * rng.standard_normal(len(y)))
+            for _ in range(max(1, min(n_layouts, n_members)))
+        ]
+    else:
+        layouts = [(x, y)]
+
+    Z = z[:, None] * np.exp(thickness_sigma * rng.standard_normal((len(z), n_members)))
+    return layouts, Z
+
+
+def member_fields(x, y, Z, xi, yi, function="linear", smooth=0.005, eps=1e-3, epsilon=None,
+                  neighbors=None, lon0=118.0, lat0=-8.25, r0=3.5, r1=20.0, south_boost=2.0,
+                  chunk_size=65536, dtype=np.float64):
+    """Aschefelder für alle Spalten von Z (gleiche Lage x, y), Shape (Spalten, ny, nx).
+
+    Gleiche Rechnung wie klima.field.ash_field(), aber eine Faktorisierung für
+    alle Spalten und ein Auswertungsblock für alle Realisierungen (Speicher pro
+    Block ~ chunk_size Werte).
+    """
+    xi = np.asarray(xi, dtype=float)
+    yi = np.asarray(yi, dtype=float)
+    nx, ny = len(xi), len(yi)
+    n = Z.shape[1]
+
+    rbf = rbf_interpolator(x, y, np.log10(Z + eps), function=function, smooth=smooth,
+                           epsilon=epsilon, neighbors=neighbors)
+    taper = dict(lon0=lon0, lat0=lat0, r0=r0, r1=r1, south_boost=south_boost)
+    z_max = np.nanmax(Z, axis=0)  # Clipping pro Realisierung
+
+    out = np.empty((n, ny, nx), dtype=dtype)
+    for a, b in iter_row_blocks(nx, ny, max(nx, chunk_size // n)):
+        pts = np.column_stack([np.tile(xi, b - a), np.repeat(yi[a:b], nx)])
+        vals = rbf(pts).astype(dtype, copy=False).reshape(b - a, nx, n)
+        finish_points(vals, z_max, eps, xi[None, :, None], yi[a:b, None, None], taper)
+        out[:, a:b] = np.moveaxis(vals, -1, 0)
+    return out
+
+
+def run_ensemble(config=None, n_members=1000, thickness_sigma=0.5, position_sigma=0.0, n_layouts=20,
+                 seed=0, batch_size=32, verbose=False):
+    """Ensemble rechnen, gibt ein Dict zurück.
+
+    "exceedance": Anteil der Realisierungen mit Asche > threshold_calc pro
+    Gridzelle (ny, nx), "areas": Fläche [km²] Realisierung x Spalte,
+    "cols": Spalten-ID (Land * 256 + Klasse) zu areas, "names": Ländernamen,
+    "transform": Transformation vom Aschegrid.
+    Alles andere (Grid, RBF, Taper, Maske, dmax) kommt aus config.
+    """
+    pipe = Pipeline(config)
+    cfg = pipe.config
+    if pipe.grid_xy is not None:
+        raise ValueError("Das Ensemble rechnet in Grad (projection=None, taper_units='deg').")
+    x, y, z = pipe.measurements
+    xi, yi = pipe.grid
+    ny, nx = pipe.grid_shape
+
+    # Zellentabelle auf die vorkommenden (Land, Klasse)-Spalten verdichtet,
+    # transponiert: Fläche pro Spalte = Matrix @ Maske
+    table = pipe.cell_table
+    cols, inv = np.unique(np.asarray(table["col"]), return_inverse=True)
+    area_t = csr_matrix((np.asarray(table["area"]), (inv, np.asarray(table["cell"]))),
+                        shape=(len(cols), nx * ny))
+    dist = pipe.dist if cfg.dmax is not None else None
+
+    layouts, Z = perturb_measurements(x, y, z, n_members, thickness_sigma, position_sigma, n_layouts, seed)
+    params = cfg.field_params()
+
+    hits = np.zeros((ny, nx), dtype=np.int32)
+    areas = np.zeros((n_members, len(cols)))
+    done = 0
+    t0 = time.perf_counter()
+    for li, (lx, ly) in enumerate(layouts):
+        members = np.arange(li, n_members, len(layouts))
+        for a in range(0, len(members), batch_size):
+            batch = members[a:a + batch_size]
+            fields = member_fields(lx, ly, Z[:, batch], xi, yi, chunk_size=cfg.chunk_size,
+                                   dtype=cfg.field_dtype, **params)
+            for m, ZI in zip(batch, fields):
+                if dist is not None:
+                    apply_cutoff(ZI, dist, cfg.dmax, out=ZI)
+                mask = ash_mask(ZI, cfg.threshold_calc, min_pixels=cfg.min_pixels)
+                hits += mask
+                areas[m] = area_t @ mask.ravel().astype(np.float64)
+            done += len(batch)
+            if verbose:
+                print(f"  {done}/{n_members} Realisierungen, {time.perf_counter() - t0:.1f} s")
+
+    return {"exceedance": hits / n_members, "areas": areas, "cols": cols, "names": pipe.countries[0],
+            "transform": pipe.transform}
+
+
+def _summary(areas, percentiles):
+    out = {"mean_km2": areas.mean(axis=0)}
+    for q, vals in zip(percentiles, np.percentile(areas, percentiles, axis=0)):
+        out[f"p{q:g}_km2"] = vals
+    # Anteil Realisierungen, in denen überhaupt Asche drauf ist
+    out["p_affected"] = (areas > 0).mean(axis=0)
+    return out
+
+
+def ensemble_tables(result, class_info=CLASS_INFO, percentiles=(5, 50, 95)):
+    """(Land x Klasse, Land) mit Mittelwert, Perzentilen und p_affected der Fläche unter Asche.
+
+    Perzentile pro Zeile über die Realisierungen (nicht Summe der Perzentile!),
+    die Ländertabelle summiert erst pro Realisierung über alle Klassen.
+    """
+    areas, cols = result["areas"], result["cols"]
+    names = np.array(["(kein Land)"] + list(result["names"]), dtype=object)
+
+    keep = cols % N_CODES != 0  # 0 = NoData
+    cols, areas = cols[keep], areas[:, keep]
+    codes = cols % N_CODES
+    class_country = pd.DataFrame({
+        "Land": names[cols // N_CODES],
+        "Code": codes.astype(int),
+        "Klasse": [class_info.get(int(c), {"name": "Unknown"})["name"] for c in codes],
+        **_summary(areas, percentiles),
+    })
+
+    cty, inv = np.unique(cols // N_CODES, return_inverse=True)
+    per_country = np.zeros((areas.shape[0], len(cty)))
+    np.add.at(per_country.T, inv, areas.T)
+    country = pd.DataFrame({"Land": names[cty], **_summary(per_country, percentiles)})
+
+    return (class_country[class_country["p_affected"] > 0].reset_index(drop=True),
+            country[country["p_affected"] > 0].sort_values("p50_km2", ascending=False, kind="stable")
+            .reset_index(drop=True))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte-Carlo-Ensemble der Aschedicke (Unsicherheit der Messungen).")
+    parser.add_argument("-n", "--members", type=int, default=1000)
+    parser.add_argument("--thickness-sigma", type=float, default=0.5,
+                        help="log-normale Streuung der Dicke (Faktor exp(sigma))")
+    parser.add_argument("--position-sigma", type=float, default=0.0, help="Streuung der Lage [Grad]")
+    parser.add_argument("--layouts", type=int, default=20, help="verschiedene Lagen (je eine Kernelmatrix)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=32, help="Felder gleichzeitig im Speicher")
+    parser.add_argument("-o", "--out-dir", default="ensemble")
+    parser.add_argument("--points", default="tambora_ashfall.csv")
+    parser.add_argument("--countries", default=PipelineConfig.countries_path)
+    parser.add_argument("--lulc", default=None, help="LULC-Raster (Default: COG, falls vorhanden)")
+    parser.add_argument("--neighbors", type=int, default=None)
+    parser.add_argument("--no-cache", action="store_true", help="ohne .klima_cache")
+    args = parser.parse_args(argv)
+
+    config = PipelineConfig(
+        points_path=args.points, countries_path=args.countries, lulc_path=args.lulc,
+        neighbors=args.neighbors, cache_dir=None if args.no_cache else ".klima_cache",
+    )
+    t0 = time.perf_counter()
+    result = run_ensemble(config, args.members, args.thickness_sigma, args.position_sigma, args.layouts,
+                          args.seed, args.batch_size, verbose=True)
+    class_country, country = ensemble_tables(result)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    write_field_cog(os.path.join(args.out_dir, EXCEEDANCE), result["exceedance"], result["transform"],
+                    description=f"P(ash > {config.threshold_calc} cm)")
+    class_country.to_parquet(os.path.join(args.out_dir, CLASS_COUNTRY), index=False)
+    country.to_parquet(os.path.join(args.out_dir, COUNTRY), index=False)
+
+    print(country.head(15).to_string(index=False))
+    print(f"{args.members} Realisierungen in {time.perf_counter() - t0:.1f} s -> {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
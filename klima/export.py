@@ -0,0 +1,101 @@
+"""Ergebnisse für andere Tools auf Platte: Feld als COG, Polygone als GeoParquet, Tabellen als Parquet.
+
+Bisher gab es Feld, Aschepolygon und Statistik nur im Speicher bzw. auf der
+Konsole, die Analyse-Skripte haben mit CSV/XLSX oder abgetippten Zahlen
+gearbeitet. Pipeline.export() schreibt nach export_dir:
+
+    ash_field.tif             Aschedicke [cm], float32, COG (gekachelt, DEFLATE, Overviews)
+    ash_polygons.parquet      ein (Multi)Polygon pro Threshold (GeoParquet, Spalte thr_cm)
+    lulc_ash_stats.parquet    Klassentabelle pro Threshold (wie lulc_ash_stats_threshold_*cm.csv)
+    lulc_ash_country.parquet  Land x Klasse pro Threshold
+    ash_area_country.parquet  Aschefläche pro Land und Threshold [km²]
+    lulc_ash_damage.parquet   Land x Klasse x Schadensklasse (klima.damage)
+
+Alle Tabellen sind "long" mit Spalte threshold_cm (Schäden: damage_class), gelesen wird mit
+pd.read_parquet(path, columns=[...]) nur das, was gebraucht wird.
+"""
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import rasterio
+import rasterio.shutil
+from affine import Affine
+from rasterio.io import MemoryFile
+
+from klima.ash import polygonize
+
+FIELD_COG = "ash_field.tif"
+POLYGONS = "ash_polygons.parquet"
+CLASS_STATS = "lulc_ash_stats.parquet"
+CLASS_COUNTRY = "lulc_ash_country.parquet"
+COUNTRY_AREA = "ash_area_country.parquet"
+DAMAGE = "lulc_ash_damage.parquet"
+
+
+def write_field_cog(path, ZI, transform, blocksize=256, compress="DEFLATE", description="ash thickness [cm]"):
+    """Feld auf dem Aschegrid als float32-COG (EPSG:4326, NaN = NoData) schreiben.
+
+    Das Aschegrid steht auf dem Kopf (Zeile 0 = Süden, klima.ash.grid_transform),
+    GeoTIFFs sind üblicherweise nach Norden ausgerichtet -> Zeilen umdrehen.
+    """
+    ny, nx = ZI.shape
+    data = np.asarray(ZI, dtype=np.float32)
+    if transform.e > 0:
+        data = data[::-1]
+        transform = transform * Affine.translation(0, ny) * Affine.scale(1, -1)
+
+    profile = dict(driver="GTiff", width=nx, height=ny, count=1, dtype="float32",
+                   crs="EPSG:4326", transform=transform, nodata=np.nan)
+    with MemoryFile() as mem:
+        with mem.open(**profile) as tmp:
+            tmp.write(data, 1)
+            tmp.set_band_description(1, description)
+        with mem.open() as tmp:
+            rasterio.shutil.copy(
+                tmp, path, driver="COG", BLOCKSIZE=blocksize, COMPRESS=compress,
+                PREDICTOR="YES", OVERVIEW_RESAMPLING="AVERAGE", NUM_THREADS="ALL_CPUS",
+            )
+    return path
+
+
+def threshold_polygons(level, transform, thresholds):
+    """GeoDataFrame mit einem gelösten (Multi)Polygon pro Threshold (Spalte thr_cm).
+
+    level ist das Stufenraster aus klima.ash.threshold_levels(): Threshold k
+    umfasst alle Zellen mit Stufe >= k. Leere Thresholds fehlen in der Tabelle.
+    """
+    frames = []
+    for k, thr in enumerate(thresholds, start=1):
+        geoms = polygonize(level >= k, transform)
+        if not geoms:
+            continue
+        gdf = gpd.GeoDataFrame(geometry=geoms, crs="EPSG:4326").dissolve()
+        gdf.insert(0, "thr_cm", float(thr))
+        frames.append(gdf)
+
+    if not frames:
+        return gpd.GeoDataFrame({"thr_cm": []}, geometry=[], crs="EPSG:4326")
+    return gpd.GeoDataFrame(pd.concat(frames, ignore_index=True), crs="EPSG:4326")
+
+
+def export_pipeline(pipe, out_dir):
+    """Alle Export-Dateien einer klima.pipeline.Pipeline nach out_dir, gibt die Pfade zurück."""
+    os.makedirs(out_dir, exist_ok=True)
+    thr, level = pipe.levels
+    paths = []
+
+    path = os.path.join(out_dir, FIELD_COG)
+    paths.append(write_field_cog(path, pipe.ZI, pipe.transform))
+
+    path = os.path.join(out_dir, POLYGONS)
+    threshold_polygons(level, pipe.transform, thr).to_parquet(path, index=False)
+    paths.append(path)
+
+    for name, df in ((CLASS_STATS, pipe.class_tables), (CLASS_COUNTRY, pipe.class_country_tables),
+                     (COUNTRY_AREA, pipe.land_area_tables), (DAMAGE, pipe.damage_table)):
+        path = os.path.join(out_dir, name)
+        df.to_parquet(path, index=False)
+        paths.append(path)
+    return paths
@@ -0,0 +1,167 @@
+"""Aschefeld: RBF in log10, Rücktransformation, Clipping, anisotroper Taper.
+
+coords / taper_coords = projizierte Knotenkoordinaten [km] aus
+klima.projection (statt np.meshgrid(xi, yi) in Grad) für RBF bzw. Taper.
+
+Alles nach dem RBF läuft zeilenblockweise und in place auf dem einen
+Feld-Array (kein meshgrid, keine Grid-großen Zwischenarrays für dx, dy, r, w
+usw.), optional in float32. Damit geht der Speicher nach dem RBF nicht mehr
+mit der Anzahl der Zwischenschritte hoch, sondern bleibt bei ~1 Grid.
+"""
+import numpy as np
+
+from klima.interp import DEFAULT_CHUNK_SIZE, evaluate_coords, evaluate_grid, iter_row_blocks, rbf_interpolator
+
+
+def _taper_points(x, y, lon0, lat0, r0, r1, south_boost, dtype=np.float64):
+    """Taper an den Punkten (x, y), beide Arrays müssen zueinander broadcasten."""
+    dx = (np.asarray(x, dtype=dtype) - lon0) * np.cos(np.deg2rad(lat0))  # lon auf Breitenkreis skalieren
+    dy = (np.asarray(y, dtype=dtype) - lat0)
+
+    dy_eff = np.where(dy < 0, dy * south_boost, dy)
+
+    # effektive Distanz in Grad
+    r = np.sqrt(dx*dx + dy_eff*dy_eff)
+
+    # bis r0 -> 1, dann linear bis r1 -> 0 (clip statt drei Masken)
+    w = 1.0 - (r - r0) / (r1 - r0)
+    return np.clip(w, 0.0, 1.0, out=w)
+
+
+def _taper_rows(xi, yi, lon0, lat0, r0, r1, south_boost, dtype=np.float64):
+    """Taper für die Zeilen yi (alle Spalten xi), nur aus den 1-D Achsen."""
+    return _taper_points(np.asarray(xi)[None, :], np.asarray(yi)[:, None], lon0, lat0, r0, r1,
+                         south_boost, dtype)
+
+
+def _taper_block(xi, yi, a, b, taper, dtype, coords=None):
+    # Zeilen a:b, in Grad aus den Achsen oder in km aus den projizierten Knoten
+    if coords is None:
+        return _taper_rows(xi, yi[a:b], dtype=dtype, **taper)
+    # AEQD ist um (lon0, lat0) zentriert -> Zentrum = Ursprung, kein cos(lat0)
+    X, Y = coords
+    return _taper_points(X[a:b], Y[a:b], dtype=dtype, **dict(taper, lon0=0.0, lat0=0.0))
+
+
+def taper_weights(xi, yi, lon0=118.0, lat0=-8.25, r0=3.5, r1=20.0, south_boost=2.0,
+                  dtype=np.float64, chunk_size=DEFAULT_CHUNK_SIZE, coords=None):
+    """"Physikalisches" Ausklingen: Zentrum = Tambora, außen abfallend, Süden stärker.
+
+    Bis r0 (Grad) Gewicht 1, dann linear bis r1 -> 0. Südlich von lat0 wird
+    der Abstand mit south_boost gestreckt (Asche fällt dort schneller ab).
+    Gibt das Gewicht auf np.meshgrid(xi, yi) zurück, gerechnet zeilenblockweise.
+    coords = (X, Y) in km (klima.projection, Zentrum lon0/lat0): r0, r1 in km.
+    """
+    taper = dict(lon0=lon0, lat0=lat0, r0=r0, r1=r1, south_boost=south_boost)
+    w = np.empty((len(yi), len(xi)), dtype=dtype)
+    for a, b in iter_row_blocks(len(xi), len(yi), chunk_size):
+        w[a:b] = _taper_block(xi, yi, a, b, taper, dtype, coords)
+    return w
+
+
+def finish_field(Z, z_max, eps, xi=None, yi=None, taper=None, chunk_size=DEFAULT_CHUNK_SIZE, taper_coords=None):
+    """Fusionierter Schritt nach dem RBF, in place auf Z (log10-Feld -> Dicke [cm]).
+
+    Pro Zeilenblock: zurücktransformieren, Artefakte <= 0 -> NaN, Clipping
+    auf 1.2 * z_max und, wenn taper ein Dict mit lon0/lat0/r0/r1/south_boost
+    ist, mal Taper (wo der Taper 0 ist, ist die Dicke hart 0). taper_coords
+    wie coords in taper_weights() (Taper in km).
+    Gibt Z zurück.
+    """
+    ny, nx = Z.shape
+    for a, b in iter_row_blocks(nx, ny, chunk_size):
+        w = None if taper is None else _taper_block(xi, yi, a, b, taper, Z.dtype, taper_coords)
+        _finish_block(Z[a:b], z_max, eps, w)
+
+    return Z
+
+
+def _finish_block(block, z_max, eps, w=None):
+    # zurücktransformieren
+    np.power(10, block, out=block)
+    block -= eps
+
+    # negative/kleine Artefakte rauswerfen
+    block[block <= 0] = np.nan
+
+    # Clipping gegen Ausreißer (damit farbscale nicht kaputt ist)
+    np.clip(block, 0, 1.2*z_max, out=block)
+
+    if w is not None:
+        block *= w
+        # falls wirklich harte 0 gewollt ist (w darf kleiner sein und broadcasten)
+        block[np.broadcast_to(w == 0.0, block.shape)] = 0.0
+    return block
+
+
+def finish_points(values, z_max, eps, x=None, y=None, taper=None):
+    """Wie finish_field(), aber für einzelne Knoten (x, y) statt ganzer Zeilen, in place.
+
+    x, y und z_max müssen nur gegen values broadcasten, z.B. values mit Shape
+    (Knoten, Realisierungen), x/y mit (Knoten, 1) und z_max mit (Realisierungen,).
+    """
+    w = None if taper is None else _taper_points(x, y, dtype=values.dtype, **taper)
+    return _finish_block(values, z_max, eps, w)
+
+
+def raw_field(x, y, z, xi, yi, function="linear", smooth=0.005, eps=1e-3, epsilon=None,
+              neighbors=None, chunk_size=DEFAULT_CHUNK_SIZE, dtype=np.float64, coords=None):
+    """Aschedicke [cm] auf np.meshgrid(xi, yi) OHNE Taper.
+
+    Interpolation in log10 (thickness variiert extrem stark), danach
+    zurücktransformieren, Artefakte <= 0 -> NaN, Clipping auf 1.2 * max(z).
+    Hängt nur von den RBF-Parametern ab, nicht vom Taper -> lässt sich für
+    mehrere Taper-Varianten wiederverwenden (klima.scenarios).
+    coords = (X, Y) der Knoten, dann müssen x, y im selben System sein.
+    """
+    z_log = np.log10(z + eps)
+
+    rbf = rbf_interpolator(x, y, z_log, function=function, smooth=smooth,
+                           epsilon=epsilon, neighbors=neighbors)
+    Z = _evaluate(rbf, xi, yi, coords, chunk_size, dtype)
+    return finish_field(Z, np.nanmax(z), eps, chunk_size=chunk_size)
+
+
+def apply_taper(ZI, w, out=None):
+    """ZI * w, wo w == 0 ist hart 0 (auch wenn ZI dort NaN war).
+
+    out=ZI rechnet in place, sonst wird ein neues Array angelegt.
+    """
+    ZI = np.multiply(ZI, w, out=out)
+
+    # falls wirklich harte 0 gewollt ist
+    ZI[w == 0.0] = 0.0
+    return ZI
+
+
+def _evaluate(rbf, xi, yi, coords, chunk_size, dtype):
+    if coords is None:
+        return evaluate_grid(rbf, xi, yi, chunk_size=chunk_size, dtype=dtype)
+    return evaluate_coords(rbf, *coords, chunk_size=chunk_size, dtype=dtype)
+
+
+def ash_field(x, y, z, xi, yi, function="linear", smooth=0.005, eps=1e-3, epsilon=None,
+              neighbors=None, lon0=118.0, lat0=-8.25, r0=3.5, r1=20.0, south_boost=2.0,
+              chunk_size=DEFAULT_CHUNK_SIZE, dtype=np.float64, return_weights=True,
+              coords=None, taper_coords=None):
+    """Aschedicke [cm] auf np.meshgrid(xi, yi), gibt (ZI, w) zurück.
+
+    Wie raw_field(), der Taper wird aber im selben Durchlauf mit draufgerechnet
+    (finish_field). Wo w == 0 ist, ist ZI hart 0. return_weights=False spart
+    das Grid für w (dann ist w None), dtype=np.float32 halbiert den Speicher.
+    coords = RBF in projizierten Koordinaten (x, y ebenso), taper_coords =
+    Taper in km (r0, r1 in km), beide aus klima.projection.
+    """
+    z_log = np.log10(z + eps)
+
+    rbf = rbf_interpolator(x, y, z_log, function=function, smooth=smooth,
+                           epsilon=epsilon, neighbors=neighbors)
+    ZI = _evaluate(rbf, xi, yi, coords, chunk_size, dtype)
+
+    taper = dict(lon0=lon0, lat0=lat0, r0=r0, r1=r1, south_boost=south_boost)
+    finish_field(ZI, np.nanmax(z), eps, xi, yi, taper, chunk_size, taper_coords)
+
+    w = None
+    if return_weights:
+        w = taper_weights(xi, yi, chunk_size=chunk_size, dtype=dtype, coords=taper_coords, **taper)
+    return ZI, w
@@ -0,0 +1,145 @@
+"""Inkrementell nachrechnen, wenn in tambora_ashfall.csv Zeilen dazukommen oder sich ändern.
+
+Mit lokalen Kerneln (neighbors=k) hängt der Wert an einem Gridknoten nur
+von seinen k nächsten Messpunkten ab. Kommt eine Station dazu (oder ändert
+sich eine), ändern sich also nur die Knoten, bei denen ein geänderter Punkt
+unter den k nächsten ist (vorher oder nachher). Nur die werden neu
+ausgewertet, der Rest kommt aus dem letzten Lauf.
+Ergebnis = voller Lauf bis auf Rundung in der letzten Stelle (wie bei einem
+anderen chunk_size, scipy rechnet je nach Punktmenge minimal anders).
+
+Danach ändert sich die Aschemaske nur in wenigen Zellen: die Statistik wird
+als Differenz gerechnet (nur die LULC-Fenster unter den geänderten Zellen
+werden gelesen, siehe Pipeline.cube). Genauso für die Stufenraster von
+Sweep und Schadensklassen (jede Zelle, deren Stufe sich ändert).
+
+Geht nicht (-> voller Lauf): neighbors=None (globaler Kernel, jeder Punkt
+wirkt überall), Grid verschoben (Bounding Box der Punkte geändert) oder
+max(z) geändert (Clipping auf 1.2 * max(z) gilt fürs ganze Feld).
+"""
+import hashlib
+from collections import Counter
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from klima.field import finish_points
+from klima.interp import DEFAULT_CHUNK_SIZE, iter_row_blocks, rbf_interpolator
+
+
+def row_hashes(x, y, z):
+    """Ein Hash pro Messzeile (lon, lat, Dicke)."""
+    rows = np.ascontiguousarray(np.column_stack([x, y, z]).astype(np.float64))
+    return [hashlib.sha1(r.tobytes()).hexdigest() for r in rows]
+
+
+def _unmatched(a, b):
+    # Indizes in a, deren Hash in b nicht (oft genug) vorkommt
+    left = Counter(b)
+    out = []
+    for i, h in enumerate(a):
+        if left[h] > 0:
+            left[h] -= 1
+        else:
+            out.append(i)
+    return np.array(out, dtype=np.int64)
+
+
+def diff_rows(old, new):
+    """old/new = (x, y, z). Gibt (Zeilen weg aus old, Zeilen neu in new) zurück.
+
+    Eine geänderte Zeile taucht in beiden auf (alte Version weg, neue dazu),
+    Reihenfolge und Duplikate egal.
+    """
+    old_h, new_h = row_hashes(*old), row_hashes(*new)
+    return _unmatched(old_h, new_h), _unmatched(new_h, old_h)
+
+
+def influence_mask(xi, yi, old_xy, new_xy, changed_xy, neighbors, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Gridknoten, deren Wert sich durch changed_xy ändern kann (bool, Shape (ny, nx)).
+
+    Ein Knoten bleibt gleich, wenn kein geänderter Punkt näher ist als sein
+    k-ter Nachbar, alt und neu: dann hat er vorher und nachher dieselben k
+    nächsten Messpunkte mit denselben Werten.
+    """
+    xi = np.asarray(xi, dtype=float)
+    yi = np.asarray(yi, dtype=float)
+    nx, ny = len(xi), len(yi)
+
+    trees = [(cKDTree(xy), min(neighbors, len(xy))) for xy in (old_xy, new_xy)]
+    changed = cKDTree(changed_xy)
+
+    mask = np.empty((ny, nx), dtype=bool)
+    for a, b in iter_row_blocks(nx, ny, chunk_size):
+        pts = np.column_stack([np.tile(xi, b - a), np.repeat(yi[a:b], nx)])
+        radius = np.zeros(len(pts))
+        for tree, k in trees:
+            d, _ = tree.query(pts, k=[k], workers=-1)
+            np.maximum(radius, d[:, 0], out=radius)
+        d, _ = changed.query(pts, k=1, workers=-1)
+        # <= mit etwas Luft: bei Gleichstand kann der Punkt noch zu den k nächsten gehören
+        mask[a:b] = (d <= radius * (1 + 1e-9)).reshape(b - a, nx)
+    return mask
+
+
+def update_field(ZI_old, x, y, z, xi, yi, mask, function="linear", smooth=0.005, eps=1e-3,
+                 epsilon=None, neighbors=None, lon0=118.0, lat0=-8.25, r0=3.5, r1=20.0,
+                 south_boost=2.0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Neues Feld = ZI_old, nur an den Knoten unter mask neu aus (x, y, z) gerechnet.
+
+    Gleiche Rechnung wie klima.field.ash_field() (log10-RBF, Rücktransformation,
+    Clipping, Taper), nur für die ausgewählten Knoten. Gibt ein neues Array zurück.
+    """
+    rbf = rbf_interpolator(x, y, np.log10(z + eps), function=function, smooth=smooth,
+                           epsilon=epsilon, neighbors=neighbors)
+    taper = dict(lon0=lon0, lat0=lat0, r0=r0, r1=r1, south_boost=south_boost)
+    z_max = np.nanmax(z)
+
+    ZI = np.array(ZI_old, copy=True)
+    rows, cols = np.nonzero(mask)
+    xi = np.asarray(xi, dtype=float)
+    yi = np.asarray(yi, dtype=float)
+    for a in range(0, len(rows), chunk_size):
+        r, c = rows[a:a + chunk_size], cols[a:a + chunk_size]
+        px, py = xi[c], yi[r]
+        vals = rbf(np.column_stack([px, py])).astype(ZI.dtype)
+        ZI[r, c] = finish_points(vals, z_max, eps, px, py, taper)
+    return ZI
+
+
+def level_delta(old_level, new_level, n_levels=2):
+    """uint8-Raster für sweep_counts(): Zellen mit geänderter Stufe bekommen 1 + alt * n_levels + neu.
+
+    Stufen wie bei klima.ash.threshold_levels() (0..n_levels-1, bool-Masken
+    = 2 Stufen). Unveränderte Zellen sind 0, ein Sweep über das Ergebnis
+    (n_thresholds = delta_codes(n_levels)) liest nur Fenster um geänderte Zellen.
+    """
+    if delta_codes(n_levels) > 255:
+        raise ValueError(f"Zu viele Stufen für ein uint8-Delta: {n_levels}")
+    old_level = np.asarray(old_level, dtype=np.uint8)
+    new_level = np.asarray(new_level, dtype=np.uint8)
+    changed = old_level != new_level
+    level = np.zeros(new_level.shape, dtype=np.uint8)
+    level[changed] = 1 + old_level[changed] * n_levels + new_level[changed]
+    return level
+
+
+def delta_codes(n_levels):
+    """Höchster Code von level_delta() (= n_thresholds für sweep_counts)."""
+    return n_levels * n_levels
+
+
+def apply_delta(counts, area, delta_counts, delta_area):
+    """Würfel (..., n_levels) um das Ergebnis vom Sweep über level_delta() korrigieren."""
+    counts = np.array(counts, copy=True)
+    area = np.array(area, copy=True)
+    n_levels = counts.shape[-1]
+    for arr, delta in ((counts, delta_counts), (area, delta_area)):
+        for old in range(n_levels):
+            for new in range(n_levels):
+                if old == new:
+                    continue
+                moved = delta[..., 1 + old * n_levels + new]   # von Stufe old nach new
+                arr[..., new] += moved
+                arr[..., old] -= moved
+    return counts, area
@@ -0,0 +1,108 @@
+"""RBF-Interpolation der Aschedicke mit begrenztem Speicher.
+
+Ersetzt das alte scipy.interpolate.Rbf: rbf(XI, YI) hat die ganze
+Distanzmatrix Gridpunkte x Messpunkte auf einmal angelegt. Hier wird das Grid
+zeilenblockweise ausgewertet, optional mit lokalen Kerneln (neighbors=).
+"""
+import numpy as np
+
+from scipy.interpolate import RBFInterpolator
+
+# Rbf-Name -> (RBFInterpolator-Name, Vorzeichen neuer Kernel / alter Kernel,
+#              braucht epsilon)
+# Rbf löst (A - smooth*I) c = d, RBFInterpolator (K + smoothing*I) c = d mit
+# K = Vorzeichen * A -> smoothing = -Vorzeichen * smooth ergibt dasselbe Feld.
+LEGACY_KERNELS = {
+    "linear":       ("linear", -1, False),
+    "cubic":        ("cubic", 1, False),
+    "quintic":      ("quintic", -1, False),
+    "thin_plate":   ("thin_plate_spline", 1, False),
+    "multiquadric": ("multiquadric", -1, True),
+    "inverse":      ("inverse_multiquadric", 1, True),
+    "gaussian":     ("gaussian", 1, True),
+}
+
+# Punkte pro Auswertungsblock (Blockgröße x Messpunkte bzw. x neighbors Floats)
+DEFAULT_CHUNK_SIZE = 65536
+
+
+def legacy_epsilon(x, y):
+    """Default-epsilon vom alten Rbf ("mittlere Distanz" aus der Bounding Box)."""
+    pts = np.vstack([x, y])
+    edges = pts.max(axis=1) - pts.min(axis=1)
+    edges = edges[np.nonzero(edges)]
+    return np.power(np.prod(edges) / pts.shape[1], 1.0 / edges.size)
+
+
+def rbf_interpolator(x, y, values, function="linear", smooth=0.0, epsilon=None, neighbors=None):
+    """RBFInterpolator, der sich wie Rbf(x, y, values, function=..., smooth=...) verhält.
+
+    epsilon ist im Sinne vom alten Rbf gemeint (Länge in Grad, None = Rbf-Default).
+    neighbors=None nutzt alle Messpunkte (identisch zu Rbf), neighbors=k löst pro
+    Auswertungspunkt nur ein lokales System mit den k nächsten Messpunkten
+    (lohnt sich erst bei vielen Messpunkten, bei ~40 ist global schneller).
+    values darf auch 2-D sein (Punkte x Realisierungen), dann wird für alle
+    Spalten mit derselben Faktorisierung gelöst.
+    """
+    if function not in LEGACY_KERNELS:
+        raise ValueError(f"Unbekannte RBF-Funktion: {function!r} (erlaubt: {sorted(LEGACY_KERNELS)})")
+    kernel, sign, needs_eps = LEGACY_KERNELS[function]
+
+    kwargs = {}
+    if needs_eps:
+        if epsilon is None:
+            epsilon = legacy_epsilon(x, y)
+        kwargs["epsilon"] = 1.0 / epsilon
+
+    return RBFInterpolator(
+        np.column_stack([x, y]),
+        values,
+        kernel=kernel,
+        smoothing=-sign * smooth,
+        degree=-1,  # Rbf hat keinen Polynomanteil
+        neighbors=neighbors,
+        **kwargs,
+    )
+
+
+def iter_row_blocks(nx, ny, chunk_size=DEFAULT_CHUNK_SIZE):
+    """(r0, r1) Zeilenblöcke, so dass r1 - r0 Zeilen ca. chunk_size Punkte haben."""
+    rows = max(1, chunk_size // nx)
+    for r0 in range(0, ny, rows):
+        yield r0, min(ny, r0 + rows)
+
+
+def evaluate_grid(interp, xi, yi, chunk_size=DEFAULT_CHUNK_SIZE, dtype=np.float64):
+    """interp auf np.meshgrid(xi, yi) auswerten, blockweise über die Zeilen.
+
+    Gibt ein (len(yi), len(xi)) Array zurück (bzw. mit einer Extra-Achse, wenn
+    interp mehrere Realisierungen liefert). Speicher pro Block ~ chunk_size.
+    """
+    xi = np.asarray(xi, dtype=float)
+    yi = np.asarray(yi, dtype=float)
+    nx, ny = len(xi), len(yi)
+
+    out = None
+    for r0, r1 in iter_row_blocks(nx, ny, chunk_size):
+        pts = np.column_stack([np.tile(xi, r1 - r0), np.repeat(yi[r0:r1], nx)])
+        vals = interp(pts)
+        if out is None:
+            out = np.empty((ny, nx) + vals.shape[1:], dtype=dtype)
+        out[r0:r1] = vals.reshape((r1 - r0, nx) + vals.shape[1:])
+
+    return out
+
+
+def evaluate_coords(interp, X, Y, chunk_size=DEFAULT_CHUNK_SIZE, dtype=np.float64):
+    """Wie evaluate_grid(), aber an beliebigen Knoten X, Y (je Shape (ny, nx), z.B. projiziert)."""
+    ny, nx = X.shape
+
+    out = None
+    for r0, r1 in iter_row_blocks(nx, ny, chunk_size):
+        pts = np.column_stack([X[r0:r1].ravel(), Y[r0:r1].ravel()])
+        vals = interp(pts)
+        if out is None:
+            out = np.empty((ny, nx) + vals.shape[1:], dtype=dtype)
+        out[r0:r1] = vals.reshape((r1 - r0, nx) + vals.shape[1:])
+
+    return out
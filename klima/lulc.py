@@ -0,0 +1,494 @@
+"""LULC-Raster (MapBiomas) kachelweise in voller Auflösung auswerten.
+
+Das Indonesien-Raster ist mehrere GB groß und passt nicht am Stück in den RAM.
+Deshalb wird hier nie das ganze Raster gelesen, sondern immer nur ein Fenster
+(Vielfaches der internen Blockgröße) nach dem anderen.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+import rasterio
+from affine import Affine
+from rasterio.enums import Resampling
+from rasterio.features import geometry_mask, rasterize
+from rasterio.vrt import WarpedVRT
+from rasterio.windows import Window, bounds as window_bounds
+
+# MapBiomas-Codes passen in uint8 -> Histogramme haben immer 256 Bins
+N_CODES = 256
+
+
+@contextmanager
+def open_lulc(path, overview_level=None):
+    """Raster öffnen, immer in EPSG:4326 (sonst on the fly über WarpedVRT).
+
+    overview_level=i liest statt der vollen Auflösung die i-te interne
+    Overview (siehe klima/cog.py), None = volle Auflösung.
+    """
+    kwargs = {} if overview_level is None else {"overview_level": overview_level}
+    with rasterio.open(path, **kwargs) as src:
+        if src.crs is None:
+            raise RuntimeError(f"{path} hat kein CRS – bitte prüfen.")
+
+        if src.crs.to_string() != "EPSG:4326":
+            with WarpedVRT(src, crs="EPSG:4326") as vrt:
+                yield vrt
+        else:
+            yield src
+
+
+def choose_overview(src, out_w, out_h):
+    """Kleinste Overview-Stufe, die noch mindestens out_w x out_h Pixel hat.
+
+    None, wenn es keine Overviews gibt oder schon Stufe 0 zu klein wäre
+    (dann muss die volle Auflösung gelesen werden).
+    """
+    level = None
+    for i, factor in enumerate(src.overviews(1)):
+        if src.width // factor >= out_w and src.height // factor >= out_h:
+            level = i
+    return level
+
+
+def read_lulc_preview(path, max_size=2000):
+    """Heruntergerechnetes Raster nur fürs Plotting (max ca. max_size px pro Richtung).
+
+    Gibt (lulc, bounds) zurück. Für Statistik bitte class_counts() nehmen,
+    die Pixelzahlen hier hängen von der Auflösung ab. Hat das Raster interne
+    Overviews (COG aus klima/cog.py), wird direkt die passende Stufe gelesen.
+    """
+    with rasterio.open(path) as src:
+        if src.crs is None:
+            raise RuntimeError(f"{path} hat kein CRS – bitte prüfen.")
+
+        if src.crs.to_string() != "EPSG:4326":
+            with WarpedVRT(src, crs="EPSG:4326") as vrt:
+                width, height = vrt.width, vrt.height
+                scale = max(width / max_size, height / max_size, 1)
+                out_w = int(width / scale)
+                out_h = int(height / scale)
+
+                lulc = vrt.read(
+                    1,
+                    out_shape=(out_h, out_w),
+                    resampling=Resampling.nearest,  # Klassen -> nearest ist richtig
+                    out_dtype="uint8",
+                )
+                bounds = vrt.bounds
+        else:
+            width, height = src.width, src.height
+            scale = max(width / max_size, height / max_size, 1)
+            out_w = int(width / scale)
+            # out_h bleibt exakt wie im ursprünglichen Skript
+            out_h = int(height / max_size) if height / max_size > width / max_size else int(height / scale)
+
+            bounds = src.bounds
+            level = choose_overview(src, out_w, out_h)
+
+            if level is None:
+                lulc = src.read(
+                    1,
+                    out_shape=(out_h, out_w),
+                    resampling=Resampling.nearest,
+                    out_dtype="uint8",
+                )
+            else:
+                # COG mit Overviews: nur die passende Stufe lesen statt alles
+                with rasterio.open(path, overview_level=level) as ovr:
+                    lulc = ovr.read(
+                        1,
+                        out_shape=(out_h, out_w),
+                        resampling=Resampling.nearest,
+                        out_dtype="uint8",
+                    )
+
+    return lulc, bounds
+
+
+def iter_windows(ds, tile_size=2048):
+    """Fenster über das ganze Raster, ausgerichtet an der internen Blockgröße.
+
+    Ein Fenster hat ca. tile_size x tile_size Pixel. Bei gestreiften GeoTIFFs
+    (Block = 1 Zeile x volle Breite) werden entsprechend weniger Zeilen genommen,
+    damit der Speicher pro Fenster trotzdem begrenzt bleibt.
+    """
+    bh, bw = ds.block_shapes[0]
+
+    tw = max(bw, tile_size // bw * bw)
+    th = max(bh, (tile_size * tile_size) // tw // bh * bh)
+
+    for row in range(0, ds.height, th):
+        for col in range(0, ds.width, tw):
+            yield Window(col, row, min(tw, ds.width - col), min(th, ds.height - row))
+
+
+def window_intersects(win_bounds, geom_bounds):
+    """Überlappen sich zwei (left, bottom, right, top)-Boxen (Berühren zählt nicht)?"""
+    left, bottom, right, top = win_bounds
+    gminx, gminy, gmaxx, gmaxy = geom_bounds
+    return not (right <= gminx or left >= gmaxx or top <= gminy or bottom >= gmaxy)
+
+
+def _total_bounds(geometries):
+    if not geometries:
+        return None
+    return (
+        min(g.bounds[0] for g in geometries),
+        min(g.bounds[1] for g in geometries),
+        max(g.bounds[2] for g in geometries),
+        max(g.bounds[3] for g in geometries),
+    )
+
+
+def _count_windows(path, windows, geometries, overview_level=None):
+    """Histogramme (voll, in Asche) über eine Liste von Fenstern.
+
+    Öffnet das Raster selbst, damit die Funktion in einem Thread oder einem
+    anderen Prozess laufen kann (rasterio-Datasets nicht zwischen Threads teilen).
+    """
+    full = np.zeros(N_CODES, dtype=np.int64)
+    ash = None if geometries is None else np.zeros(N_CODES, dtype=np.int64)
+    geom_bounds = None if geometries is None else _total_bounds(geometries)
+
+    with open_lulc(path, overview_level) as ds:
+        for win in windows:
+            block = ds.read(1, window=win, out_dtype="uint8")
+            full += np.bincount(block.ravel(), minlength=N_CODES)
+
+            if geom_bounds is None:
+                continue
+
+            # Fenster ganz außerhalb vom Aschepolygon -> nichts zu rasterisieren
+            if not window_intersects(window_bounds(win, ds.transform), geom_bounds):
+                continue
+
+            inside = geometry_mask(
+                geometries,
+                out_shape=block.shape,
+                transform=ds.window_transform(win),
+                invert=True,
+            )
+            ash += np.bincount(block[inside], minlength=N_CODES)
+
+    return full, ash
+
+
+def _run_batches(func, path, windows, args, workers, pool):
+    """func(path, windows_batch, *args) über einen Pool verteilen.
+
+    Gibt die Ergebnisse in fester Paketreihenfolge zurück (deterministisch,
+    egal wie viele Worker).
+    """
+    if workers is None or workers < 1:
+        workers = os.cpu_count() or 1
+
+    if workers == 1:
+        return [func(path, windows, *args)]
+
+    if pool == "process":
+        executor = ProcessPoolExecutor(workers)
+    elif pool == "thread":
+        executor = ThreadPoolExecutor(workers)
+    else:
+        raise ValueError(f"Unbekannter pool: {pool!r} (erlaubt: 'thread', 'process')")
+
+    # ein paar Pakete mehr als Worker, damit ungleich teure Kacheln sich ausgleichen
+    n_batches = max(1, min(len(windows), workers * 4))
+    batches = [windows[i::n_batches] for i in range(n_batches)]
+
+    with executor:
+        futures = [executor.submit(func, path, batch, *args) for batch in batches]
+        return [fut.result() for fut in futures]
+
+
+def class_counts(path, geometries=None, tile_size=2048, workers=1, pool="thread", overview_level=None,
+                 full=True):
+    """Pixel pro LULC-Klasse in voller Auflösung zählen.
+
+    Gibt (counts_full, counts_ash) zurück, beides Arrays der Länge 256
+    (Index = Klassencode). counts_ash zählt nur Pixel, deren Mittelpunkt in
+    den Geometrien liegt; ohne Geometrien ist counts_ash None.
+    Code 0 (NoData) wird mitgezählt und muss beim Auswerten ignoriert werden.
+
+    workers > 1 verteilt die Fenster auf einen Pool. pool="thread" reicht
+    meistens (GDAL gibt beim Lesen/Rasterisieren den GIL frei), pool="process"
+    braucht unter Windows einen ``if __name__ == "__main__"``-Guard im Skript.
+    Das Ergebnis ist unabhängig von workers. overview_level zählt auf einer
+    Overview-Stufe statt auf der vollen Auflösung (schnell, aber gröber).
+
+    full=False liest nur Fenster, die die Geometrien berühren, und gibt
+    counts_full=None zurück (Klassensummen dann aus klima.classindex holen).
+    """
+    if geometries is not None:
+        geometries = list(geometries)
+
+    with open_lulc(path, overview_level) as ds:
+        windows = list(iter_windows(ds, tile_size))
+        if not full and geometries is not None:
+            windows = _windows_touching(ds, windows, _total_bounds(geometries))
+
+    results = _run_batches(_count_windows, path, windows, (geometries, overview_level), workers, pool)
+
+    counts_full = sum((f for f, _ in results), np.zeros(N_CODES, dtype=np.int64)) if full else None
+    counts_ash = None if geometries is None else sum((a for _, a in results), np.zeros(N_CODES, dtype=np.int64))
+    return counts_full, counts_ash
+
+
+def _windows_touching(ds, windows, bounds):
+    if bounds is None:
+        return []
+    return [win for win in windows if window_intersects(window_bounds(win, ds.transform), bounds)]
+
+
+def grid_bounds(transform, shape):
+    """(minx, miny, maxx, maxy) eines Rasters, egal ob Nord- oder Süd-oben."""
+    height, width = shape
+    xs = (transform.c, transform.c + transform.a * width)
+    ys = (transform.f, transform.f + transform.e * height)
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+# WGS84-Ellipsoid (km)
+WGS84_A = 6378.137
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+WGS84_E = np.sqrt(WGS84_E2)
+WGS84_B2 = WGS84_A**2 * (1 - WGS84_E2)
+
+
+def _zone_q(lat_rad):
+    # Fläche Äquator -> Breite pro Bogenmaß Länge = b²/2 * q(lat)
+    s = np.sin(lat_rad)
+    return s / (1 - WGS84_E2 * s * s) + np.log((1 + WGS84_E * s) / (1 - WGS84_E * s)) / (2 * WGS84_E)
+
+
+def row_cell_area_km2(transform, row_off, height):
+    """Fläche [km²] einer Rasterzelle in EPSG:4326 auf dem WGS84-Ellipsoid, eine Zahl pro Zeile.
+
+    Alle Zellen einer Zeile sind gleich groß, deshalb reicht ein Vektor
+    der Länge height statt eines ganzen Flächenrasters (Lookup pro Zeile).
+    """
+    rows = np.arange(row_off, row_off + height + 1, dtype=float)
+    lat_edges = np.deg2rad(transform.f + rows * transform.e)
+    dlon = np.deg2rad(abs(transform.a))
+    return WGS84_B2 / 2 * dlon * np.abs(np.diff(_zone_q(lat_edges)))
+
+
+def _sample_indices(win_transform, shape, ash_transform, ash_shape):
+    """Für jede Pixelmitte im Fenster: Zeile/Spalte der Aschegrid-Zelle.
+
+    Beide Raster sind achsenparallel in EPSG:4326, deshalb reichen ein
+    Zeilen- und ein Spaltenvektor (separierbar). -1 = außerhalb vom Aschegrid.
+    """
+    height, width = shape
+    lon = win_transform.c + (np.arange(width) + 0.5) * win_transform.a
+    lat = win_transform.f + (np.arange(height) + 0.5) * win_transform.e
+
+    inv = ~ash_transform
+    cols = np.floor(inv.a * lon + inv.c).astype(np.int64)
+    rows = np.floor(inv.e * lat + inv.f).astype(np.int64)
+
+    cols[(cols < 0) | (cols >= ash_shape[1])] = -1
+    rows[(rows < 0) | (rows >= ash_shape[0])] = -1
+    return rows, cols
+
+
+def sample_grid(grid, ash_transform, win_transform, shape, fill=0):
+    """Aschegrid-Werte (nearest) auf die Pixelmitten eines LULC-Fensters legen."""
+    rows, cols = _sample_indices(win_transform, shape, ash_transform, grid.shape)
+    out = grid[np.maximum(rows, 0)[:, None], np.maximum(cols, 0)[None, :]]
+    out[(rows < 0)[:, None] | (cols < 0)[None, :]] = fill
+    return out
+
+
+def _sweep_windows(path, windows, level, ash_transform, n_levels, overview_level=None, countries=None):
+    n_cty = 1 if countries is None else len(countries) + 1
+    n_bins = n_cty * N_CODES * n_levels
+    counts = np.zeros(n_bins, dtype=np.int64)
+    area = np.zeros(n_bins, dtype=np.float64)
+
+    if countries is not None:
+        country_bounds = [g.bounds for g in countries]
+
+    with open_lulc(path, overview_level) as ds:
+        for win in windows:
+            block = ds.read(1, window=win, out_dtype="uint8")
+            win_transform = ds.window_transform(win)
+
+            # kombinierter Index: (Land, Klasse, Stufe) -> ein bincount pro Fenster
+            idx = block.astype(np.int64) * n_levels
+            if level is not None:
+                idx += sample_grid(level, ash_transform, win_transform, block.shape)
+
+            if countries is not None:
+                wb = window_bounds(win, ds.transform)
+                shapes_win = [
+                    (g, i + 1) for i, (g, b) in enumerate(zip(countries, country_bounds))
+                    if window_intersects(wb, b)
+                ]
+                if shapes_win:
+                    cty = rasterize(shapes_win, out_shape=block.shape, transform=win_transform,
+                                    fill=0, dtype="uint16")
+                    idx += cty.astype(np.int64) * (N_CODES * n_levels)
+
+            row_area = row_cell_area_km2(ds.transform, win.row_off, block.shape[0])
+            counts += np.bincount(idx.ravel(), minlength=n_bins)
+            area += np.bincount(
+                idx.ravel(),
+                weights=np.repeat(row_area, block.shape[1]),
+                minlength=n_bins,
+            )
+
+    return counts, area
+
+
+def level_bounds(level, ash_transform):
+    """Bounding Box (lon/lat) aller Zellen mit Stufe > 0 auf dem Aschegrid, None wenn keine."""
+    rows = np.nonzero(level.any(axis=1))[0]
+    cols = np.nonzero(level.any(axis=0))[0]
+    if len(rows) == 0:
+        return None
+    r0, r1, c0, c1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+    return grid_bounds(ash_transform * Affine.translation(c0, r0), (r1 - r0, c1 - c0))
+
+
+def sweep_counts(path, level, ash_transform, n_thresholds, tile_size=2048, workers=1, pool="thread",
+                 overview_level=None, full=True, countries=None):
+    """2-D Histogramm Klasse x Threshold-Stufe in einem Durchlauf über das Raster.
+
+    level ist das uint8-Raster aus klima.ash.threshold_levels() auf dem
+    Aschegrid. Jede LULC-Pixelmitte bekommt die Stufe der Aschezelle, in der
+    sie liegt (0 = unter allen Thresholds / außerhalb vom Grid).
+
+    Gibt (counts, area_km2) zurück, beide mit Shape (256, n_thresholds + 1).
+    Die Fläche ist die echte Zellfläche auf dem Ellipsoid (pro Rasterzeile).
+    level=None zählt nur Klassen (alles Stufe 0), siehe class_totals().
+
+    countries = Liste von Länder-Geometrien (EPSG:4326): dann wird pro Fenster
+    ein Länder-ID-Raster gebrannt (ID = Listenindex + 1, 0 = kein Land) und das
+    Ergebnis hat Shape (len(countries) + 1, 256, n_thresholds + 1).
+
+    full=False überspringt Fenster ohne Asche (Stufe 0 ist dann unvollständig,
+    die Klassensummen müssen aus klima.classindex kommen).
+    """
+    n_levels = n_thresholds + 1
+    if level is not None:
+        level = np.asarray(level, dtype=np.uint8)
+    if countries is not None:
+        countries = list(countries)
+
+    with open_lulc(path, overview_level) as ds:
+        windows = list(iter_windows(ds, tile_size))
+        if not full and level is not None:
+            windows = _windows_touching(ds, windows, level_bounds(level, ash_transform))
+
+    results = _run_batches(
+        _sweep_windows, path, windows, (level, ash_transform, n_levels, overview_level, countries),
+        workers, pool,
+    )
+
+    n_cty = 1 if countries is None else len(countries) + 1
+    n_bins = n_cty * N_CODES * n_levels
+    counts = sum((c for c, _ in results), np.zeros(n_bins, dtype=np.int64))
+    area = sum((a for _, a in results), np.zeros(n_bins))
+
+    shape = (N_CODES, n_levels) if countries is None else (n_cty, N_CODES, n_levels)
+    return counts.reshape(shape), area.reshape(shape)
+
+
+def class_totals(path, tile_size=2048, workers=1, pool="thread", overview_level=None):
+    """Pixel und Fläche [km²] pro Klasse über das ganze Raster (je Länge 256)."""
+    counts, area = sweep_counts(
+        path, None, None, 0, tile_size=tile_size, workers=workers, pool=pool,
+        overview_level=overview_level,
+    )
+    return counts[:, 0], area[:, 0]
+
+
+def _cell_windows(path, windows, ash_transform, ash_shape, overview_level=None, countries=None):
+    n_cols = (1 if countries is None else len(countries) + 1) * N_CODES
+    ash_bounds = grid_bounds(ash_transform, ash_shape)
+    if countries is not None:
+        country_bounds = [g.bounds for g in countries]
+
+    keys, counts, area = [], [], []
+    with open_lulc(path, overview_level) as ds:
+        for win in windows:
+            wb = window_bounds(win, ds.transform)
+            if not window_intersects(wb, ash_bounds):
+                continue
+
+            block = ds.read(1, window=win, out_dtype="uint8")
+            win_transform = ds.window_transform(win)
+            rows, cols = _sample_indices(win_transform, block.shape, ash_transform, ash_shape)
+
+            # Spalte der Tabelle: (Land, Klasse) wie in _sweep_windows
+            col = block.astype(np.int64)
+            if countries is not None:
+                shapes_win = [
+                    (g, i + 1) for i, (g, b) in enumerate(zip(countries, country_bounds))
+                    if window_intersects(wb, b)
+                ]
+                if shapes_win:
+                    cty = rasterize(shapes_win, out_shape=block.shape, transform=win_transform,
+                                    fill=0, dtype="uint16")
+                    col += cty.astype(np.int64) * N_CODES
+
+            # NoData (Code 0) und Pixel außerhalb vom Aschegrid brauchen keine Zeile
+            valid = (block != 0) & (rows >= 0)[:, None] & (cols >= 0)[None, :]
+            cell = rows[:, None] * ash_shape[1] + cols[None, :]
+            key = (cell * n_cols + col)[valid]
+            row_area = row_cell_area_km2(ds.transform, win.row_off, block.shape[0])
+            px_area = np.broadcast_to(row_area[:, None], block.shape)[valid]
+
+            uniq, inv = np.unique(key, return_inverse=True)
+            keys.append(uniq)
+            counts.append(np.bincount(inv, minlength=len(uniq)))
+            area.append(np.bincount(inv, weights=px_area, minlength=len(uniq)))
+
+    if not keys:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0)
+    return _reduce_keys(np.concatenate(keys), np.concatenate(counts), np.concatenate(area))
+
+
+def _reduce_keys(keys, counts, area):
+    uniq, inv = np.unique(keys, return_inverse=True)
+    return (
+        uniq,
+        np.bincount(inv, weights=counts, minlength=len(uniq)).astype(np.int64),
+        np.bincount(inv, weights=area, minlength=len(uniq)),
+    )
+
+
+def cell_table(path, ash_transform, ash_shape, tile_size=2048, workers=1, pool="thread",
+               overview_level=None, countries=None):
+    """Dünn besetzte Tabelle Aschezelle x (Land, Klasse) über das ganze LULC-Raster.
+
+    Jede LULC-Pixelmitte wird (nearest, wie sample_grid) ihrer Aschegrid-Zelle
+    zugeordnet. Gibt (cell, col, pixels, area_km2) zurück, sortiert nach
+    (cell, col): cell = Zeile * Breite + Spalte im Aschegrid, col = Land * 256
+    + Klasse (ohne countries nur die Klasse). NoData (Code 0) fehlt.
+
+    Damit ist jede Maske auf dem Aschegrid nur noch eine Summe über Zeilen
+    dieser Tabelle, ohne das Raster nochmal zu lesen (klima.scenarios).
+    """
+    if countries is not None:
+        countries = list(countries)
+    n_cols = (1 if countries is None else len(countries) + 1) * N_CODES
+
+    with open_lulc(path, overview_level) as ds:
+        windows = list(iter_windows(ds, tile_size))
+
+    results = _run_batches(
+        _cell_windows, path, windows, (ash_transform, tuple(ash_shape), overview_level, countries),
+        workers, pool,
+    )
+    keys, counts, area = _reduce_keys(
+        np.concatenate([k for k, _, _ in results]),
+        np.concatenate([c for _, c, _ in results]),
+        np.concatenate([a for _, _, a in results]),
+    )
+    return keys // n_cols, keys % n_cols, counts, area
@@ -0,0 +1,817 @@
+"""Der Tambora-Workflow als importierbare Pipeline mit faulen Zwischenschritten.
+
+Jeder Schritt (Messpunkte, Grid, Feld, Maske, Polygon, LULC-Würfel, Länder,
+Tabellen) ist ein cached_property: er wird erst beim ersten Zugriff gerechnet
+und danach wiederverwendet. Wer nur die Ländertabelle will, bekommt keinen
+Plot, kein Colormap-Gebastel und kein pyplot/geodatasets-Import.
+
+Die Statistik braucht kein Aschepolygon: jede LULC-Pixelmitte wird direkt in
+den Index vom Aschegrid umgerechnet (klima.lulc.sample_grid) und liest dort die
+Maske (Threshold + Morphologie auf dem Grid). Das Polygon (ash_union) wird nur
+gebaut, wenn es wirklich gebraucht wird: country_mode="overlay" oder Export
+als Shapefile (ash_shapes_path).
+
+    from klima.pipeline import Pipeline, PipelineConfig
+
+    pipe = Pipeline(PipelineConfig(countries_path="data/ne_110m_admin_0_countries.shp"))
+    pipe.land_area          # Fläche pro Land [km²]
+    pipe.class_country      # Land x Klasse unter Asche
+
+Der Plot kommt aus klima.plot (pipe.figure()), erst dann wird matplotlib geladen.
+"""
+import os
+import sys
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from rasterio.coords import BoundingBox
+
+from klima.ash import ash_mask, grid_transform, polygonize, threshold_levels
+from klima.cache import FieldCache
+from klima.classes import CLASS_INFO
+from klima.classindex import load_class_index, index_totals, raster_signature
+from klima.countries import (
+    country_table, cached_country_id_grid, country_areas, country_areas_overlay, load_countries,
+)
+from klima.lulc import cell_table, read_lulc_preview, sweep_counts
+from klima.projection import PROJECTIONS, TAPER_UNITS
+from klima.stats import (
+    class_country_table, class_country_tables, threshold_table, threshold_tables, write_threshold_tables,
+)
+from klima.store import ArrayStore
+
+
+@dataclass
+class PipelineConfig:
+    """Alle Einstellungen vom Hauptskript an einer Stelle (Defaults = bisherige Werte)."""
+
+    points_path: str = "tambora_ashfall.csv"
+    countries_path: str = os.path.join("data", "ne_110m_admin_0_countries.shp")
+    # None = indo_agri_map_cog.tif, falls vorhanden, sonst indo_agri_map.tif
+    lulc_path: str = None
+    lulc_workers: int = field(default_factory=os.cpu_count)
+    preview_max_size: int = 2000
+
+    # Grid: Bounding Box der Messpunkte + pad * Ausdehnung auf jeder Seite
+    nx: int = 600
+    ny: int = 600
+    pad: float = 0.9
+
+    # RBF (klima.field.ash_field)
+    function: str = "linear"
+    smooth: float = 0.005
+    eps: float = 1e-3
+    neighbors: int = None
+    chunk_size: int = 65536  # = klima.interp.DEFAULT_CHUNK_SIZE (Import hier zu teuer)
+    # "float32" halbiert den Speicher fürs Feld (reicht für Masken/Plot locker)
+    field_dtype: str = "float64"
+
+    # Taper: Zentrum = Tambora, bis r0 voll, dann linear bis r1 -> 0, Süden stärker
+    lon0: float = 118.0
+    lat0: float = -8.25
+    r0: float = 3.5
+    r1: float = 20.0
+    south_boost: float = 2.0
+
+    # Metrisch statt in Grad (klima.projection, AEQD mit Zentrum lon0/lat0):
+    # projection="aeqd" -> RBF auf km-Koordinaten, taper_units="km" -> r0/r1 in km
+    projection: str = None
+    taper_units: str = "deg"
+
+    # Datenabdeckung (klima.support), nur gerechnet, wenn eins von beiden an ist:
+    # dmax = harter Cutoff in Grad (ZI = NaN weiter weg von jeder Messung), None = aus
+    # plot_support = Linien gleicher Distanz zur nächsten Messung in der Karte
+    dmax: float = None
+    plot_support: bool = False
+    support_levels: tuple = (2.0, 5.0, 10.0)
+
+    threshold_calc: float = 0.1     # Rechen-Threshold [cm]
+    threshold_plot: float = 100.0   # Plot-Threshold [cm]
+    min_pixels: int = 500
+
+    # None = kein Sweep, sonst z.B. [0.1, 1, 10, 100]
+    sweep_thresholds: list = None
+    sweep_out_dir: str = "."
+
+    # "raster" (ID-Raster + bincount) oder "overlay" (exakte Verschneidung)
+    country_mode: str = "raster"
+    country_supersample: int = 4
+
+    # Aschepolygon (threshold_calc) als Shapefile schreiben, None = aus
+    ash_shapes_path: str = None
+    # Feld (COG), Threshold-Polygone (GeoParquet) und Tabellen (Parquet) für die
+    # Analyse-Skripte, Thresholds = sweep_thresholds (sonst nur threshold_calc). None = aus
+    export_dir: str = None
+    # Schadensklassen (klima.damage, Damage_Assessment.txt): Untergrenzen [cm] der Klassen 1..4,
+    # Tabelle geht mit in den Export, damage_raster_path = uint8-GeoTIFF auf dem LULC-Grid
+    damage_edges: tuple = (0.1, 1.0, 10.0, 100.0)
+    damage_raster_path: str = None
+
+    # None = ohne Feld-Cache
+    cache_dir: str = ".klima_cache"
+    cache_max_bytes: int = 2 * 1024**3
+    # große Grids (LULC-Vorschau, Länder-IDs, Distanz, Zellentabelle) als .npy unter
+    # cache_dir/mmap, memory-mapped gelesen (klima.store); False = mit ins .npz
+    mmap_store: bool = True
+    # neue/geänderte Zeilen in points_path: Feld und Würfel aus dem letzten Lauf
+    # nachführen statt neu rechnen (klima.incremental), braucht cache_dir und neighbors
+    incremental: bool = False
+    # feines Grid (z.B. nx=ny=5000) adaptiv statt Knoten für Knoten (klima.adaptive):
+    # RBF nur an Konturen der Thresholds (threshold_calc/plot, sweep_thresholds,
+    # damage_edges), um Messungen und über Land (bis adaptive_land_cell Knoten),
+    # sonst bilinear. adaptive_margin = Sicherheitsfaktor um jeden Threshold
+    adaptive: bool = False
+    adaptive_max_cell: int = 64
+    adaptive_land_cell: int = 8
+    adaptive_margin: float = 1.25
+
+    def field_params(self):
+        """Parameter für ash_field() (und den Cache-Schlüssel)."""
+        return dict(
+            function=self.function, smooth=self.smooth, eps=self.eps, neighbors=self.neighbors,
+            lon0=self.lon0, lat0=self.lat0, r0=self.r0, r1=self.r1, south_boost=self.south_boost,
+        )
+
+
+def load_points(path):
+    """Messdaten laden, Thickness_cm ("12 cm" o.ä.) -> Zahl in Thickness_cm_clean."""
+    df = pd.read_csv(path)
+
+    df["Thickness_cm_clean"] = (
+        df["Thickness_cm"]
+        .astype(str)
+        .str.extract(r"([\d.]+)")
+        .astype(float)
+        .fillna(0)
+    )
+
+    return gpd.GeoDataFrame(
+        df,
+        geometry=gpd.points_from_xy(df["Longitude"], df["Latitude"]),
+        crs="EPSG:4326",
+    )
+
+
+def grid_axes(lon, lat, nx, ny, pad=0.9):
+    """xi, yi (np.linspace) über die Bounding Box + pad * Ausdehnung Rand."""
+    lon_min, lon_max = np.min(lon), np.max(lon)
+    lat_min, lat_max = np.min(lat), np.max(lat)
+    lon_pad = pad * (lon_max - lon_min)
+    lat_pad = pad * (lat_max - lat_min)
+
+    xi = np.linspace(lon_min - lon_pad, lon_max + lon_pad, nx)
+    yi = np.linspace(lat_min - lat_pad, lat_max + lat_pad, ny)
+    return xi, yi
+
+
+def _any_level(counts, area):
+    # Würfel (..., n + 1) -> (..., 2): Stufe 0 bleibt, 1..n = unter Asche
+    return (np.stack([counts[..., 0], counts[..., 1:].sum(axis=-1)], axis=-1),
+            np.stack([area[..., 0], area[..., 1:].sum(axis=-1)], axis=-1))
+
+
+def default_lulc_path():
+    # vorverarbeitetes COG (python -m klima.cog) bevorzugen
+    return "indo_agri_map_cog.tif" if os.path.exists("indo_agri_map_cog.tif") else "indo_agri_map.tif"
+
+
+class Pipeline:
+    """Ein Lauf mit fester Konfiguration. Alle Schritte faul und gememoized."""
+
+    def __init__(self, config=None, class_info=CLASS_INFO):
+        self.config = config if config is not None else PipelineConfig()
+        self.class_info = class_info
+        # was inkrementell nachgeführt wurde (für den Report), siehe klima.incremental
+        self.updates = {}
+
+    # --- Eingangsdaten -------------------------------------------------------
+
+    @cached_property
+    def cache(self):
+        cfg = self.config
+        return None if cfg.cache_dir is None else FieldCache(cfg.cache_dir, max_bytes=cfg.cache_max_bytes)
+
+    @cached_property
+    def store(self):
+        """Ablage für große Grids: memory-mapped (klima.store.ArrayStore) oder der normale Cache."""
+        cfg = self.config
+        if cfg.cache_dir is None or not cfg.mmap_store:
+            return self.cache
+        return ArrayStore(os.path.join(cfg.cache_dir, "mmap"), max_bytes=cfg.cache_max_bytes)
+
+    @cached_property
+    def points(self):
+        return load_points(self.config.points_path)
+
+    @cached_property
+    def world_countries(self):
+        return load_countries(self.config.countries_path)
+
+    @cached_property
+    def countries(self):
+        """(Namen, Geometrien), Raster-ID = Listenindex + 1."""
+        return country_table(self.world_countries)
+
+    @cached_property
+    def measurements(self):
+        """x, y, z der Messpunkte mit thickness > 0 (sonst geht log nicht)."""
+        gdf = self.points
+        pos = gdf["Thickness_cm_clean"] > 0
+        x = gdf.loc[pos, "Longitude"].values
+        y = gdf.loc[pos, "Latitude"].values
+        z = gdf.loc[pos, "Thickness_cm_clean"].values
+
+        # Schutz, damit RBF nicht komplett Müll macht
+        if len(z) < 5:
+            raise RuntimeError("Zu wenige valide Messpunkte für eine sinnvolle Interpolation.")
+        return x, y, z
+
+    @cached_property
+    def lulc_path(self):
+        return self.config.lulc_path or default_lulc_path()
+
+    # --- Aschefeld -----------------------------------------------------------
+
+    @cached_property
+    def grid(self):
+        gdf = self.points
+        return grid_axes(gdf["Longitude"], gdf["Latitude"], self.config.nx, self.config.ny, self.config.pad)
+
+    @property
+    def grid_shape(self):
+        """(ny, nx) vom Aschegrid."""
+        return self.config.ny, self.config.nx
+
+    @cached_property
+    def grid_xy(self):
+        """(X, Y) [km] der Gridknoten in AEQD um (lon0, lat0), gecacht; None, wenn nicht gebraucht."""
+        cfg = self.config
+        if cfg.projection not in PROJECTIONS:
+            raise ValueError(f"Unbekannte projection: {cfg.projection!r} (None/aeqd)")
+        if cfg.taper_units not in TAPER_UNITS:
+            raise ValueError(f"Unbekannte taper_units: {cfg.taper_units!r} (deg/km)")
+        if cfg.projection is None and cfg.taper_units == "deg":
+            return None
+        from klima.projection import cached_grid_coords
+
+        return cached_grid_coords(self.store, *self.grid, cfg.lon0, cfg.lat0, chunk_size=cfg.chunk_size)
+
+    @cached_property
+    def interp_inputs(self):
+        """(x, y, z, coords) für die RBF: in Grad (coords=None) oder projiziert in km."""
+        cfg = self.config
+        x, y, z = self.measurements
+        if self.grid_xy is None or cfg.projection is None:
+            return x, y, z, None
+        from klima.projection import project_points
+
+        return (*project_points(x, y, cfg.lon0, cfg.lat0), z, self.grid_xy)
+
+    @property
+    def taper_coords(self):
+        """Knoten in km für den Taper (taper_units="km"), sonst None."""
+        return self.grid_xy if self.config.taper_units == "km" else None
+
+    @cached_property
+    def transform(self):
+        # Zeile 0 = ymin (Süden!), siehe klima.ash.grid_transform
+        return grid_transform(*self.grid)
+
+    @cached_property
+    def field(self):
+        """{"ZI", "transform"}, über den Feld-Cache, falls an."""
+        cfg = self.config
+        xi, yi = self.grid
+        params = cfg.field_params()
+
+        def compute():
+            # erst hier: scipy.interpolate kostet ~0.3 s Import, bei Cache-Treffer unnötig
+            from klima.field import ash_field
+
+            x, y, z, coords = self.interp_inputs
+            if cfg.adaptive:
+                return self._adaptive_field(x, y, z, coords)
+            ZI, _ = ash_field(x, y, z, xi, yi, chunk_size=cfg.chunk_size, dtype=cfg.field_dtype,
+                              return_weights=False, coords=coords, taper_coords=self.taper_coords, **params)
+            return {"ZI": ZI, "transform": np.array(self.transform)[:6]}
+
+        if self.cache is None:
+            return compute()
+        key = self.cache.key(
+            self.points[["Longitude", "Latitude", "Thickness_cm_clean"]],
+            dict(params, nx=cfg.nx, ny=cfg.ny, dtype=cfg.field_dtype, **self._grid_params(),
+                 **self._metric_params(), **self._adaptive_params()),
+        )
+        # inkrementell nur in Grad (klima.incremental rechnet Knoten aus xi/yi) und ohne Quadtree
+        if cfg.incremental and cfg.neighbors is not None and self.grid_xy is None and not cfg.adaptive:
+            return self._incremental_field(key, compute)
+        return self.cache.get_or_compute(key, compute)
+
+    def _grid_params(self):
+        # Gridachsen (hängen von pad und der Bounding Box ab) wie in klima.support
+        xi, yi = self.grid
+        return {"grid": [float(xi[0]), float(xi[-1]), len(xi), float(yi[0]), float(yi[-1]), len(yi)]}
+
+    def _metric_params(self):
+        # nur im Schlüssel, wenn an -> alte Cache-Einträge (in Grad) bleiben gültig
+        cfg = self.config
+        out = {}
+        if cfg.projection is not None:
+            out["projection"] = cfg.projection
+        if cfg.taper_units != "deg":
+            out["taper_units"] = cfg.taper_units
+        return out
+
+    @property
+    def adaptive_thresholds(self):
+        """Alle Thresholds [cm], an deren Konturen der Quadtree bis auf Knoten verfeinert."""
+        cfg = self.config
+        thr = [cfg.threshold_calc, cfg.threshold_plot, *(cfg.sweep_thresholds or ()), *cfg.damage_edges]
+        return tuple(sorted(set(float(t) for t in thr)))
+
+    @cached_property
+    def land_grid(self):
+        """bool (ny, nx): Gridknoten über Land (Länderpolygone, all_touched)."""
+        from klima.adaptive import land_mask
+
+        return land_mask(self.countries[1], self.transform, self.grid_shape)
+
+    def _adaptive_params(self):
+        # wie _metric_params: nur im Schlüssel, wenn an
+        cfg = self.config
+        if not cfg.adaptive:
+            return {}
+        return dict(adaptive_max_cell=cfg.adaptive_max_cell, adaptive_land_cell=cfg.adaptive_land_cell,
+                    adaptive_margin=cfg.adaptive_margin, adaptive_thresholds=list(self.adaptive_thresholds),
+                    countries=os.path.abspath(cfg.countries_path))
+
+    def _adaptive_field(self, x, y, z, coords):
+        """Feld über den Quadtree (klima.adaptive), gleiche Rückgabe wie compute() in field."""
+        from klima.adaptive import adaptive_field
+
+        cfg = self.config
+        xi, yi = self.grid
+        ZI, n_eval = adaptive_field(
+            x, y, z, xi, yi, self.adaptive_thresholds, max_cell=cfg.adaptive_max_cell, land=self.land_grid,
+            land_cell=cfg.adaptive_land_cell, margin=cfg.adaptive_margin, chunk_size=cfg.chunk_size,
+            dtype=cfg.field_dtype, coords=coords, taper_coords=self.taper_coords, **cfg.field_params(),
+        )
+        self.updates["adaptiv (field)"] = f"RBF an {n_eval} von {ZI.size} Knoten ({n_eval / ZI.size:.1%})"
+        return {"ZI": ZI, "transform": np.array(self.transform)[:6]}
+
+    def _lineage_key(self, what, params):
+        # ein Eintrag pro Messdatei (nicht pro Inhalt): "der letzte Lauf mit dieser CSV"
+        return self.cache.key(np.zeros((0, 3)), dict(params, what=what,
+                                                      points=os.path.abspath(self.config.points_path)))
+
+    def _incremental_field(self, key, compute):
+        """Feld aus dem letzten Lauf mit derselben CSV nachführen, nur Knoten um geänderte Zeilen neu."""
+        from klima.incremental import diff_rows, influence_mask, update_field
+        from klima.interp import LEGACY_KERNELS
+
+        cached = self.cache.load(key)
+        if cached is not None:
+            return cached
+
+        cfg = self.config
+        params = cfg.field_params()
+        x, y, z = self.measurements
+        xi, yi = self.grid
+        transform = np.array(self.transform)[:6]
+
+        lineage_key = self._lineage_key("field_lineage", dict(params, nx=cfg.nx, ny=cfg.ny, dtype=cfg.field_dtype,
+                                                              **self._grid_params()))
+        old = self.cache.load(lineage_key)
+        old_field = None if old is None else self.cache.load(str(old["field_key"]))
+
+        # Formparameter (multiquadric, ...) = legacy_epsilon aus allen Punkten -> jede neue
+        # Station ändert jeden Knoten, nicht nur die in ihrer Nachbarschaft
+        if LEGACY_KERNELS[cfg.function][2]:
+            out = compute()
+            self.updates["inkrementell (field)"] = f"voll gerechnet ({cfg.function} hat einen Formparameter)"
+        # Grid verschoben oder anderes max(z) (Clipping) -> jeder Knoten ändert sich
+        elif (old_field is None or not np.array_equal(old_field["transform"], transform)
+                or np.nanmax(old["z"]) != np.nanmax(z)):
+            out = compute()
+            self.updates["inkrementell (field)"] = "voll gerechnet"
+        else:
+            removed, added = diff_rows((old["x"], old["y"], old["z"]), (x, y, z))
+            old_xy = np.column_stack([old["x"], old["y"]])
+            new_xy = np.column_stack([x, y])
+            changed = np.concatenate([old_xy[removed], new_xy[added]])
+            ZI = old_field["ZI"]
+            n_nodes = 0
+            if len(changed):
+                nodes = influence_mask(xi, yi, old_xy, new_xy, changed, cfg.neighbors, cfg.chunk_size)
+                ZI = update_field(ZI, x, y, z, xi, yi, nodes, chunk_size=cfg.chunk_size, **params)
+                n_nodes = int(nodes.sum())
+            out = {"ZI": ZI, "transform": transform}
+            self.updates["inkrementell (field)"] = (f"{len(removed)} Zeilen weg, {len(added)} dazu, "
+                                     f"{n_nodes} von {ZI.size} Knoten neu")
+
+        self.cache.store(key, **out)
+        self.cache.store(lineage_key, x=x, y=y, z=z, field_key=np.array(key))
+        return out
+
+    def raw_field(self, **interp):
+        """Ungetapertes Feld (klima.field.raw_field) auf dem Grid, über den Feld-Cache.
+
+        interp überschreibt function/smooth/eps/neighbors aus der Konfiguration.
+        Für alles, was nur den Taper variiert (Szenarien, Animationen).
+        """
+        from klima.field import raw_field
+
+        cfg = self.config
+        params = {k: v for k, v in cfg.field_params().items() if k in ("function", "smooth", "eps", "neighbors")}
+        params.update(interp)
+        xi, yi = self.grid
+
+        def compute():
+            x, y, z, coords = self.interp_inputs
+            return {"ZI": raw_field(x, y, z, xi, yi, chunk_size=cfg.chunk_size, coords=coords, **params)}
+
+        if self.cache is None:
+            return compute()["ZI"]
+        # projizierte Knoten hängen vom Zentrum ab
+        metric = {"projection": cfg.projection, "lon0": cfg.lon0, "lat0": cfg.lat0} if cfg.projection else {}
+        key = self.cache.key(
+            self.points[["Longitude", "Latitude", "Thickness_cm_clean"]],
+            dict(params, nx=cfg.nx, ny=cfg.ny, what="raw_field", **self._grid_params(), **metric),
+        )
+        return self.cache.get_or_compute(key, compute)["ZI"]
+
+    @cached_property
+    def ZI(self):
+        """Aschedicke [cm] auf dem Grid, mit dmax-Cutoff falls gesetzt."""
+        if self.config.dmax is None:
+            return self.field["ZI"]
+        from klima.support import apply_cutoff
+
+        return apply_cutoff(self.field["ZI"], self.dist, self.config.dmax)
+
+    @cached_property
+    def taper(self):
+        """Taper-Gewicht w auf dem Grid (steckt schon in ZI, nur für Auswertungen)."""
+        from klima.field import taper_weights
+
+        cfg = self.config
+        return taper_weights(*self.grid, cfg.lon0, cfg.lat0, cfg.r0, cfg.r1, cfg.south_boost,
+                             chunk_size=cfg.chunk_size, coords=self.taper_coords)
+
+    @cached_property
+    def dist(self):
+        """Distanz jeder Gridzelle zur nächsten Messung [Grad], gecacht.
+
+        Wird nur angefasst, wenn dmax oder plot_support gesetzt ist (der harte
+        Cutoff sorgt für ein unsauberes Bild, deshalb standardmäßig aus).
+        """
+        from klima.support import cached_distance_to_data
+
+        x, y, _ = self.measurements
+        return cached_distance_to_data(
+            self.store, self.points[["Longitude", "Latitude", "Thickness_cm_clean"]],
+            x, y, *self.grid, chunk_size=self.config.chunk_size,
+        )
+
+    @cached_property
+    def mask(self):
+        return ash_mask(self.ZI, self.config.threshold_calc, min_pixels=self.config.min_pixels)
+
+    @cached_property
+    def levels(self):
+        """(thresholds, level): Stufenraster (klima.ash.threshold_levels) für Sweep und Export.
+
+        Thresholds = sweep_thresholds (sortiert), ohne Sweep nur threshold_calc.
+        """
+        cfg = self.config
+        if cfg.sweep_thresholds is None:
+            return np.array([float(cfg.threshold_calc)]), self.mask.astype(np.uint8)
+        thr = np.sort(np.asarray(cfg.sweep_thresholds, dtype=float))
+        return thr, threshold_levels(self.ZI, thr, min_pixels=cfg.min_pixels)
+
+    @cached_property
+    def ash_union(self):
+        """Aschemaske als ein (Multi)Polygon (dissolve über alle Teile).
+
+        Nur für country_mode="overlay" und den Shapefile-Export, die Statistik
+        liest die Maske direkt auf dem Grid (sweep_counts/cell_table).
+        """
+        geoms = polygonize(self.mask, self.transform)
+        union = gpd.GeoDataFrame(geometry=geoms, crs="EPSG:4326").dissolve()
+        union["thr_cm"] = self.config.threshold_calc
+        return union
+
+    def write_ash_shapes(self, path=None):
+        """ash_union als Shapefile (o.ä., Format aus der Endung) schreiben, gibt den Pfad zurück.
+
+        path=None nimmt config.ash_shapes_path, ist der auch None, passiert nichts.
+        """
+        path = path or self.config.ash_shapes_path
+        if path is None:
+            return None
+        self.ash_union.to_file(path)
+        return path
+
+    # --- LULC ----------------------------------------------------------------
+
+    @cached_property
+    def lulc_preview(self):
+        """(lulc, bounds) heruntergerechnet, nur fürs Plotten (gecacht pro Raster + Größe)."""
+        max_size = self.config.preview_max_size
+        if self.store is None:
+            return read_lulc_preview(self.lulc_path, max_size=max_size)
+
+        def compute():
+            lulc, bounds = read_lulc_preview(self.lulc_path, max_size=max_size)
+            return {"lulc": lulc, "bounds": np.array(bounds, dtype=float)}
+
+        key = self.store.key(np.array([max_size], dtype=float),
+                             {"what": "lulc_preview", "raster": raster_signature(self.lulc_path)})
+        data = self.store.get_or_compute(key, compute)
+        return data["lulc"], BoundingBox(*data["bounds"])
+
+    @cached_property
+    def class_totals(self):
+        """(pixels, area_km2) pro Klasse im ganzen Raster, aus dem Sidecar-Index."""
+        index = load_class_index(self.lulc_path, workers=self.config.lulc_workers)
+        if index is None:
+            raise FileNotFoundError(f"LULC-Raster und Klassenindex fehlen: {self.lulc_path} (lulc_path)")
+        return index_totals(index)
+
+    @cached_property
+    def cube(self):
+        """(counts, area_km2) Land x Klasse x (Asche ja/nein), ein Durchlauf übers Raster.
+
+        Fängt der Sweep oder die Schadensklassen bei threshold_calc an, ist deren
+        Stufe >= 1 genau self.mask -> Stufen 1..n zusammenlegen statt nochmal lesen.
+        """
+        cfg = self.config
+        thr = float(cfg.threshold_calc)
+        if cfg.sweep_thresholds is not None and self.sweep[0][0] == thr:
+            return _any_level(*self.sweep[1:])
+        if len(cfg.damage_edges) and float(cfg.damage_edges[0]) == thr:
+            return _any_level(*self.damage_cube)
+        return self._level_cube("cube", self.mask.astype(np.uint8), [thr])
+
+    def _level_cube(self, what, level, thresholds):
+        """sweep_counts() über ein Stufenraster, mit incremental=True nur über geänderte Zellen."""
+        cfg = self.config
+        if cfg.incremental and self.cache is not None:
+            return self._incremental_cube(what, level, thresholds)
+        return sweep_counts(self.lulc_path, level, self.transform, len(thresholds), workers=cfg.lulc_workers,
+                            full=False, countries=self.countries[1])
+
+    def _incremental_cube(self, what, level, thresholds):
+        """Würfel aus dem letzten Lauf korrigieren, gelesen werden nur Fenster um geänderte Zellen."""
+        from klima.incremental import apply_delta, delta_codes, level_delta
+
+        cfg = self.config
+        n_levels = len(thresholds) + 1
+        transform = np.array(self.transform)[:6]
+        st = os.stat(cfg.countries_path)
+        lineage_key = self._lineage_key(f"{what}_lineage", {
+            "raster": raster_signature(self.lulc_path), "countries": os.path.abspath(cfg.countries_path),
+            "size": st.st_size, "mtime_ns": st.st_mtime_ns, "n_countries": len(self.countries[0]),
+            "thresholds": [float(t) for t in thresholds],
+        })
+        old = self.cache.load(lineage_key)
+
+        # Codes von level_delta() müssen in uint8 passen (bis 15 Thresholds), sonst voller Sweep
+        if (old is None or not np.array_equal(old["transform"], transform) or old["level"].shape != level.shape
+                or delta_codes(n_levels) > 255):
+            counts, area = sweep_counts(self.lulc_path, level, self.transform, len(thresholds),
+                                        workers=cfg.lulc_workers, full=False, countries=self.countries[1])
+            self.updates[f"inkrementell ({what})"] = "voll gerechnet"
+        else:
+            # Code = 1 + alte Stufe * n_levels + neue Stufe: ein Sweep nur über geänderte Zellen
+            delta = level_delta(old["level"], level, n_levels)
+            counts, area = old["counts"], old["area"]
+            n_cells = int(np.count_nonzero(delta))
+            if n_cells:
+                d_counts, d_area = sweep_counts(self.lulc_path, delta, self.transform, delta_codes(n_levels),
+                                                workers=cfg.lulc_workers, full=False,
+                                                countries=self.countries[1])
+                counts, area = apply_delta(counts, area, d_counts, d_area)
+            self.updates[f"inkrementell ({what})"] = f"{n_cells} Aschezellen geändert"
+
+        self.cache.store(lineage_key, counts=counts, area=area, level=level, transform=transform)
+        return counts, area
+
+    @cached_property
+    def cell_table(self):
+        """{"cell", "col", "pixels", "area"}: Aschezelle x (Land, Klasse), siehe klima.lulc.cell_table.
+
+        Hängt nur vom Grid, vom Raster und den Ländern ab (nicht vom Feld),
+        wird deshalb einmal gerechnet und im Cache abgelegt.
+        """
+        cfg = self.config
+        names, shapes_ = self.countries
+
+        def compute():
+            cell, col, pixels, area = cell_table(
+                self.lulc_path, self.transform, self.grid_shape,
+                workers=cfg.lulc_workers, countries=shapes_,
+            )
+            return {"cell": cell, "col": col, "pixels": pixels, "area": area}
+
+        if self.store is None:
+            return compute()
+        st = os.stat(cfg.countries_path)
+        key = self.store.key(
+            np.array(list(self.transform)[:6] + list(self.grid_shape), dtype=float),
+            {"what": "cell_table", "raster": raster_signature(self.lulc_path),
+             "countries": os.path.abspath(cfg.countries_path), "size": st.st_size,
+             "mtime_ns": st.st_mtime_ns, "n_countries": len(names)},
+        )
+        return self.store.get_or_compute(key, compute)
+
+    @cached_property
+    def class_table(self):
+        """Klassen unter Asche > threshold_calc (Pixel, Anteile, Fläche)."""
+        cnt, area = self.cube
+        return threshold_table(cnt.sum(axis=0), area.sum(axis=0), 1, self.class_info,
+                               totals=self.class_totals[0])
+
+    @cached_property
+    def sweep(self):
+        """(thresholds, counts, area) Land x Klasse x Stufe für sweep_thresholds, None wenn aus.
+
+        Ein Durchlauf übers Raster liefert Klassen- und Ländertabellen für alle Thresholds.
+        """
+        cfg = self.config
+        if cfg.sweep_thresholds is None:
+            return None
+        thr, level = self.levels
+        cnt, area = self._level_cube("sweep", level, thr)
+        return thr, cnt, area
+
+    @cached_property
+    def threshold_cube(self):
+        """(thresholds, counts, area) wie sweep, ohne Sweep nur threshold_calc (= cube)."""
+        if self.sweep is not None:
+            return self.sweep
+        return (self.levels[0],) + self.cube
+
+    def write_sweep_tables(self):
+        """lulc_ash_stats_threshold_*cm.csv für alle Sweep-Thresholds, gibt Pfade zurück."""
+        if self.sweep is None:
+            return []
+        thr, cnt, area = self.sweep
+        return write_threshold_tables(cnt.sum(axis=0), area.sum(axis=0), thr, self.class_info,
+                                      self.config.sweep_out_dir, totals=self.class_totals[0])
+
+    @cached_property
+    def class_tables(self):
+        """Klassentabellen aller Thresholds (threshold_cm + Spalten von class_table)."""
+        thr, cnt, area = self.threshold_cube
+        return threshold_tables(cnt.sum(axis=0), area.sum(axis=0), thr, self.class_info,
+                                totals=self.class_totals[0])
+
+    @cached_property
+    def class_country_tables(self):
+        """Land x Klasse aller Thresholds (threshold_cm + Spalten von class_country)."""
+        thr, cnt, area = self.threshold_cube
+        return class_country_tables(cnt, area, thr, self.countries[0], self.class_info)
+
+    @cached_property
+    def damage_levels(self):
+        """uint8-Raster Schadensklasse 0..len(damage_edges) auf dem Aschegrid (klima.damage)."""
+        from klima.damage import damage_levels
+
+        return damage_levels(self.ZI, self.config.damage_edges, min_pixels=self.config.min_pixels)
+
+    @cached_property
+    def damage_cube(self):
+        """(counts, area) Land x Klasse x Schadensklasse, ein Durchlauf (oder der Sweep, falls gleich).
+
+        Gleicher Sweep wie klima.damage.damage_cube(), mit incremental=True nur über geänderte Zellen.
+        """
+        cfg = self.config
+        edges = np.asarray(cfg.damage_edges, dtype=float)
+        if self.sweep is not None and np.array_equal(self.sweep[0], edges):
+            return self.sweep[1:]
+        return self._level_cube("damage", self.damage_levels, edges)
+
+    @cached_property
+    def damage_table(self):
+        """Land x Klasse x Schadensklasse (alle Klassen aus class_info), siehe klima.damage.damage_table."""
+        from klima.damage import damage_table
+
+        cnt, area = self.damage_cube
+        return damage_table(cnt, area, self.countries[0], self.class_info, self.config.damage_edges)
+
+    def write_damage_raster(self, path=None):
+        """Schadensklassen auf dem LULC-Grid als GeoTIFF, path=None nimmt config.damage_raster_path."""
+        from klima.damage import write_damage_raster
+
+        path = path or self.config.damage_raster_path
+        if path is None:
+            return None
+        return write_damage_raster(path, self.damage_levels, self.transform, self.lulc_path,
+                                   self.config.damage_edges)
+
+    # --- Länder --------------------------------------------------------------
+
+    @cached_property
+    def land_area(self):
+        """Fläche unter Asche pro Land [km²] (Series, absteigend)."""
+        cfg = self.config
+        if cfg.country_mode == "overlay":
+            return country_areas_overlay(self.world_countries, self.ash_union)
+        if cfg.country_mode != "raster":
+            raise ValueError(f"Unbekannter country_mode: {cfg.country_mode!r} (raster/overlay)")
+
+        return country_areas(self.mask, self.country_ids, self.transform, self.countries[0],
+                             cfg.country_supersample)
+
+    @cached_property
+    def country_ids(self):
+        """Länder-ID-Raster auf dem Aschegrid (country_supersample-fach feiner, gecacht)."""
+        cfg = self.config
+        return cached_country_id_grid(
+            self.store, cfg.countries_path, self.countries[1], self.transform, self.grid_shape,
+            cfg.country_supersample,
+        )
+
+    @cached_property
+    def land_area_tables(self):
+        """Aschefläche pro Land [km²] für alle Thresholds (threshold_cm, Land, area_km2).
+
+        Immer über das Länder-ID-Raster (wie country_mode="raster").
+        """
+        cfg = self.config
+        thr, level = self.levels
+        frames = []
+        for k, t in enumerate(thr, start=1):
+            areas = country_areas(level >= k, self.country_ids, self.transform, self.countries[0],
+                                  cfg.country_supersample)
+            frames.append(pd.DataFrame({"threshold_cm": float(t), "Land": areas.index,
+                                        "area_km2": areas.values}))
+        return pd.concat(frames, ignore_index=True)
+
+    @cached_property
+    def class_country(self):
+        """Tidy-Tabelle Land x Klasse unter Asche > threshold_calc."""
+        cnt, area = self.cube
+        return class_country_table(cnt, area, 1, self.countries[0], self.class_info)
+
+    # --- Ausgabe -------------------------------------------------------------
+
+    def report(self, file=None):
+        """Die Tabellen vom Hauptskript ausgeben (und Sweep-Tabellen schreiben, falls an)."""
+        out = file or sys.stdout
+        thr = self.config.threshold_calc
+
+        print(f"\n=== LULC-Klassen mit Asche > {thr} cm (volle Auflösung) ===\n", file=out)
+        print("Code | Klasse                      | Pixels (Ash) | Anteil an Ash | Anteil Klasse belegt",
+              file=out)
+        print("-"*90, file=out)
+        for _, row in self.class_table.iterrows():
+            name = self.class_info.get(row["Code"], {"name": "Unknown"})["name"]
+            print(f"{row['Code']:4d} | {name:27s} | {row['Pixels (Ash)']:11d} | "
+                  f"{row['Anteil an Ash [%]']:11.2f}% | {row['Anteil Klasse belegt [%]']:18.2f}%", file=out)
+
+        for path in self.write_sweep_tables():
+            print("geschrieben:", path, file=out)
+        if self.config.ash_shapes_path is not None:
+            print("geschrieben:", self.write_ash_shapes(), file=out)
+        if self.config.damage_raster_path is not None:
+            print("geschrieben:", self.write_damage_raster(), file=out)
+        for path in self.export():
+            print("geschrieben:", path, file=out)
+        for step, info in self.updates.items():
+            print(f"{step}: {info}", file=out)
+
+        print("Betroffene Länder:", file=out)
+        for c in sorted(self.land_area.index):
+            print(" -", c, file=out)
+        print(self.land_area, file=out)
+
+        print(f"\n=== LULC-Fläche unter Asche > {thr} cm pro Land [km²] ===\n", file=out)
+        print(self.class_country.groupby("Land")["area_km2"].sum().sort_values(ascending=False), file=out)
+
+        area_idn = self.class_country[self.class_country["Land"] == "Indonesia"]
+        for _, row in area_idn.iterrows():
+            print(f"{row['Code']:3d}  {row['Klasse']:27s}  {row['area_km2']:10.1f} km² unter Asche > "
+                  f"{thr} cm in Indonesien", file=out)
+
+    def export(self, out_dir=None):
+        """Feld, Threshold-Polygone und Tabellen nach out_dir (klima.export), gibt Pfade zurück.
+
+        out_dir=None nimmt config.export_dir, ist der auch None, passiert nichts.
+        """
+        out_dir = out_dir or self.config.export_dir
+        if out_dir is None:
+            return []
+        from klima.export import export_pipeline
+
+        return export_pipeline(self, out_dir)
+
+    def figure(self):
+        """Übersichtskarte (klima.plot.overview_figure), gibt (fig, ax) zurück."""
+        from klima.plot import overview_figure
+
+        return overview_figure(self)
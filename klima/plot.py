@@ -0,0 +1,150 @@
+"""Übersichtskarte: Weltkarte, LULC-Overlay, Aschefeld, Messpunkte, Legende.
+
+Nur dieses Modul importiert matplotlib/geodatasets, damit reine
+Rechen-Läufe (klima.pipeline ohne Plot) schnell starten.
+"""
+import geodatasets
+import geopandas as gpd
+import matplotlib.patches as mpatches
+import matplotlib.pyplot as plt
+import numpy as np
+
+from matplotlib.colors import LogNorm, ListedColormap, to_rgba
+from scipy.ndimage import binary_fill_holes, binary_closing
+
+
+def world_land():
+    """Weltkarte als Hintergrund (nur Landflächen)."""
+    return gpd.read_file(geodatasets.get_path("naturalearth.land"))
+
+
+def lulc_colormap(class_info, max_code):
+    """Colormap als Array: Index ist direkt der LULC-Code im Raster."""
+    cmap_arr = np.zeros((max_code + 1, 4))
+    for code, info in class_info.items():
+        if code <= max_code:
+            cmap_arr[code] = to_rgba(info["color"])
+    return ListedColormap(cmap_arr)
+
+
+def plot_mask(ZI, threshold):
+    """Maske fürs Plotten: nur ZI >= threshold, Löcher zu (gröber als ash_mask)."""
+    M = (ZI >= threshold) & np.isfinite(ZI)
+    M = binary_fill_holes(M)
+    M = binary_closing(M, iterations=2)
+    return binary_fill_holes(M)
+
+
+def class_legend(ax, class_info):
+    """Legende für die LULC-Klassen (ersetzt die Legende der Messpunkte)."""
+    legend_patches = [
+        mpatches.Patch(color=info["color"], label=f"{code}: {info['name']}")
+        for code, info in class_info.items()
+        if code != 0
+    ]
+    ax.legend(handles=legend_patches, title="MapBiomas Classes", loc="lower left", fontsize=7)
+
+
+def field_norm(ZI):
+    """Log-Norm fürs Aschefeld (colormap log-skaliert, damit man alles sieht)."""
+    vmin = max(np.nanmin(ZI[ZI > 0]), 0.05)
+    vmax = np.nanmax(ZI)
+    return LogNorm(vmin=vmin, vmax=vmax)
+
+
+def base_map(pipe, norm, figsize=(12, 6)):
+    """Statische Ebenen: Weltkarte, LULC, Messpunkte, Achsen, Legende. Gibt (fig, ax) zurück.
+
+    norm ist die Log-Norm vom Aschefeld (Messpunkte > 0 werden damit eingefärbt).
+    """
+    world = world_land()
+
+    fig, ax = plt.subplots(figsize=figsize)
+    world.plot(ax=ax, color="#dddddd", edgecolor="#555555", linewidth=0.5)
+
+    # LULC Raster, zorder=1: vor Weltkarte, unter Ash overlay
+    lulc, bounds = pipe.lulc_preview
+    ax.imshow(
+        lulc,
+        cmap=lulc_colormap(pipe.class_info, int(np.max(lulc))),
+        extent=(bounds.left, bounds.right, bounds.bottom, bounds.top),
+        origin="upper",
+        zorder=1,
+    )
+
+    # Messpunkte > 0 als Scatter (knapp über dem Ash overlay, zorder 2)
+    x, y, z = pipe.measurements
+    ax.scatter(x, y, c=z, cmap="inferno", norm=norm, s=40, edgecolor="#555555",
+               linewidth=0.5, zorder=2.1, label="Measurements > 0")
+
+    # Messpunkte = 0 separat (sonst gehen die in der log cmap unter)
+    gdf = pipe.points
+    zero = gdf["Thickness_cm_clean"] == 0
+    ax.scatter(gdf.loc[zero, "Longitude"].values, gdf.loc[zero, "Latitude"].values,
+               s=35, c="#4aa3ff", edgecolor="#333333", linewidth=0.4, zorder=3,
+               label="Measurements = 0")
+
+    # damit die Karte nicht irgendwo "reinzoomt": Grenzen der ganzen Welt setzen
+    minx, miny, maxx, maxy = world.total_bounds
+    ax.set_xlim(minx, maxx)
+    ax.set_ylim(miny, maxy)
+
+    ax.set_xlabel("Longitude")
+    ax.set_ylabel("Latitude")
+    class_legend(ax, pipe.class_info)
+    return fig, ax
+
+
+def ash_overlay(ax, xi, yi, ZI_masked, norm, image=False):
+    """Aschefeld als QuadMesh (1-D Achsen statt meshgrid), gibt das Artist zurück.
+
+    image=True zeichnet dasselbe (reguläres) Grid als Bild mit nearest-Interpolation:
+    sieht gleich aus, rendert aber um ein Vielfaches schneller (Animationen).
+    """
+    if not image:
+        return ax.pcolormesh(xi, yi, ZI_masked, shading="auto", cmap="inferno", norm=norm,
+                             alpha=0.55, zorder=2.0)
+
+    # Zellgrenzen wie bei shading="auto": halbe Zelle um die Knoten
+    dx = (xi[-1] - xi[0]) / (len(xi) - 1) / 2
+    dy = (yi[-1] - yi[0]) / (len(yi) - 1) / 2
+    aspect = ax.get_aspect()  # imshow würde das Seitenverhältnis der Karte überschreiben
+    im = ax.imshow(ZI_masked, cmap="inferno", norm=norm, alpha=0.55, zorder=2.0,
+                   extent=(xi[0] - dx, xi[-1] + dx, yi[0] - dy, yi[-1] + dy),
+                   origin="lower", interpolation="nearest")
+    ax.set_aspect(aspect)
+    return im
+
+
+def ash_colorbar(im, ax):
+    """Colorbar + sinnvolle log ticks."""
+    vmin, vmax = im.norm.vmin, im.norm.vmax
+    cbar = plt.colorbar(im, ax=ax, shrink=0.85)
+    cbar.set_label("Ash thickness [cm] (log scale)")
+    ticks = np.array([0.1, 0.3, 1, 3, 10, 30, 100])
+    ticks = ticks[(ticks >= vmin) & (ticks <= vmax)]
+    cbar.set_ticks(ticks)
+    cbar.set_ticklabels([str(t) for t in ticks])
+    return cbar
+
+
+def overview_figure(pipe, figsize=(12, 6)):
+    """Karte wie im Hauptskript für eine klima.pipeline.Pipeline, gibt (fig, ax) zurück."""
+    ZI = pipe.ZI
+    norm = field_norm(ZI)
+    fig, ax = base_map(pipe, norm, figsize)
+
+    # außerhalb der Plot-Maske unsichtbar (masked array statt Kopie mit NaN)
+    ZI_masked = np.ma.array(ZI, mask=~plot_mask(ZI, pipe.config.threshold_plot))
+    xi, yi = pipe.grid
+    im = ash_overlay(ax, xi, yi, ZI_masked, norm)
+
+    # optional: wie weit ist die nächste Messung weg (Unsicherheit der Interpolation)
+    if pipe.config.plot_support:
+        cs = ax.contour(xi, yi, pipe.dist, levels=list(pipe.config.support_levels), colors="#333333",
+                        linewidths=0.6, linestyles="--", zorder=2.5)
+        ax.clabel(cs, fmt="%g°", fontsize=6)
+
+    ash_colorbar(im, ax)
+    fig.tight_layout()
+    return fig, ax
@@ -0,0 +1,68 @@
+"""Metrisch statt in Grad: lokale abstandstreue Projektion (AEQD) um Tambora.
+
+Die RBF rechnet normalerweise in lon/lat-Grad, ein Grad Länge ist bei -8°
+aber kürzer als ein Grad Breite, und der Taper nähert das nur über
+dx * cos(lat0) an. Mit projection="aeqd" werden Messpunkte und Gridknoten in
+eine azimutal abstandstreue Projektion mit Zentrum (lon0, lat0) umgerechnet
+(Einheit km): Distanzen vom Zentrum sind exakt, in der Umgebung fast exakt.
+Mit taper_units="km" ist der Taper (r0, r1) in km vom Zentrum.
+
+Das Grid bleibt ein lon/lat-Raster (Overlay, Masken, Statistik unverändert),
+nur die Koordinaten der Knoten für RBF/Taper kommen von hier. Die werden
+einmal pro Grid gerechnet und gecacht, ein Lauf kostet danach so viel wie in Grad.
+
+Kein klima.interp auf Modulebene (zieht scipy.interpolate, ~0.3 s): die
+Pipeline importiert PROJECTIONS/TAPER_UNITS von hier schon beim Start.
+"""
+import numpy as np
+from pyproj import Transformer
+
+DEFAULT_CHUNK_SIZE = 65536  # = klima.interp.DEFAULT_CHUNK_SIZE
+
+PROJECTIONS = (None, "aeqd")
+TAPER_UNITS = ("deg", "km")
+
+
+def aeqd_transformer(lon0, lat0):
+    """EPSG:4326 -> AEQD [km] mit Zentrum (lon0, lat0), Achsen (lon, lat) -> (x, y)."""
+    return Transformer.from_crs(
+        "EPSG:4326", f"+proj=aeqd +lat_0={lat0} +lon_0={lon0} +datum=WGS84 +units=km", always_xy=True,
+    )
+
+
+def project_points(lon, lat, lon0, lat0):
+    """(x, y) in km relativ zu (lon0, lat0)."""
+    x, y = aeqd_transformer(lon0, lat0).transform(np.asarray(lon, dtype=float), np.asarray(lat, dtype=float))
+    return np.asarray(x), np.asarray(y)
+
+
+def grid_coords(xi, yi, lon0, lat0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """(X, Y) in km für alle Knoten von np.meshgrid(xi, yi), je Shape (ny, nx)."""
+    from klima.interp import iter_row_blocks
+
+    xi = np.asarray(xi, dtype=float)
+    yi = np.asarray(yi, dtype=float)
+    nx, ny = len(xi), len(yi)
+    transformer = aeqd_transformer(lon0, lat0)
+
+    X = np.empty((ny, nx))
+    Y = np.empty((ny, nx))
+    for a, b in iter_row_blocks(nx, ny, chunk_size):
+        lon, lat = np.meshgrid(xi, yi[a:b])
+        X[a:b], Y[a:b] = transformer.transform(lon, lat)
+    return X, Y
+
+
+def cached_grid_coords(cache, xi, yi, lon0, lat0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """grid_coords() über den Cache (Schlüssel = Gridachsen + Zentrum), cache=None rechnet direkt."""
+    def compute():
+        X, Y = grid_coords(xi, yi, lon0, lat0, chunk_size)
+        return {"X": X, "Y": Y}
+
+    if cache is None:
+        data = compute()
+    else:
+        key = cache.key(np.concatenate([np.asarray(xi, dtype=float), np.asarray(yi, dtype=float)]),
+                        {"what": "aeqd_grid", "nx": len(xi), "ny": len(yi), "lon0": lon0, "lat0": lat0})
+        data = cache.get_or_compute(key, compute)
+    return data["X"], data["Y"]
@@ -0,0 +1,237 @@
+"""Sensitivitätsläufe: viele Taper-/RBF-/Threshold-Varianten in einem Rutsch.
+
+Statt tambora_int_data.py für jede Kombination anzupassen und neu zu starten:
+
+    python -m klima.scenarios szenarien.yaml -o szenarien.parquet --workers 8
+
+Szenarien kommen aus einer CSV (eine Zeile pro Szenario) oder einer YAML
+(Liste von Szenarien, oder Mapping Parameter -> Liste von Werten = alle
+Kombinationen). Nicht angegebene Parameter kommen aus PipelineConfig.
+
+Was geteilt wird:
+  - RBF: einmal pro Kombination (function, smooth, eps, neighbors), alle
+    Szenarien, die sich nur in Taper/Threshold unterscheiden, nehmen dasselbe Feld
+  - LULC: die Tabelle Aschezelle x (Land, Klasse) (klima.lulc.cell_table) wird
+    einmal gebaut, ein Szenario ist danach nur noch Maske -> Summe über Zeilen.
+    Das LULC-Raster wird pro Szenario gar nicht mehr gelesen.
+
+Taper + Maske + Summe laufen über einen Prozess-Pool. Ergebnis ist eine
+Tidy-Tabelle Szenario x Land x Klasse (Parameter als Spalten) als Parquet.
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from klima.ash import ash_mask
+from klima.field import apply_taper, taper_weights
+from klima.lulc import N_CODES
+from klima.pipeline import Pipeline, PipelineConfig
+from klima.support import apply_cutoff
+
+# RBF-Parameter: gleiche Werte -> gleiches (ungetapertes) Feld
+INTERP_PARAMS = ("function", "smooth", "eps", "neighbors")
+# Reihenfolge wie in taper_weights()
+TAPER_PARAMS = ("lon0", "lat0", "r0", "r1", "south_boost")
+MASK_PARAMS = ("threshold_calc", "min_pixels", "dmax")
+SCENARIO_PARAMS = INTERP_PARAMS + TAPER_PARAMS + MASK_PARAMS
+
+
+def expand_grid(grid):
+    """{Parameter: [Werte]} -> DataFrame mit allen Kombinationen (Skalare = ein Wert)."""
+    names = list(grid)
+    values = [v if isinstance(v, (list, tuple)) else [v] for v in grid.values()]
+    return pd.DataFrame(list(itertools.product(*values)), columns=names)
+
+
+def load_scenarios(path):
+    """Szenarien aus .csv (sep "," oder ";") oder .yaml/.yml laden (noch nicht normalisiert)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return pd.read_csv(path, sep=None, engine="python")
+
+    if ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as err:
+            raise ImportError("YAML-Szenarien brauchen PyYAML (pip install pyyaml), sonst CSV nehmen.") from err
+
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f)
+        if isinstance(data, dict):
+            return expand_grid(data)
+        if isinstance(data, list):
+            return pd.DataFrame(data)
+        raise ValueError(f"{path}: erwartet Liste von Szenarien oder Mapping Parameter -> Werte.")
+
+    raise ValueError(f"Unbekanntes Szenario-Format: {path!r} (erlaubt: .csv, .yaml, .yml)")
+
+
+def scenario_table(scenarios, config=None):
+    """Szenarien prüfen und mit den Defaults aus config auffüllen.
+
+    Gibt einen DataFrame mit Spalte "scenario" (ID) + allen SCENARIO_PARAMS zurück.
+    """
+    config = config if config is not None else PipelineConfig()
+    df = pd.DataFrame(scenarios).reset_index(drop=True)
+
+    unknown = set(df.columns) - set(SCENARIO_PARAMS) - {"scenario"}
+    if unknown:
+        raise ValueError(f"Unbekannte Szenario-Parameter: {sorted(unknown)} (erlaubt: {list(SCENARIO_PARAMS)})")
+
+    if "scenario" not in df.columns:
+        df.insert(0, "scenario", np.arange(len(df)))
+    if df["scenario"].duplicated().any():
+        raise ValueError("Szenario-IDs (Spalte scenario) müssen eindeutig sein.")
+
+    for name in SCENARIO_PARAMS:
+        default = getattr(config, name)
+        if name not in df.columns:
+            df[name] = [default] * len(df)
+        else:
+            df[name] = df[name].astype(object).where(df[name].notna(), default)
+
+    # CSV liefert alles als float, leere Felder als NaN
+    df["neighbors"] = [None if pd.isna(v) else int(v) for v in df["neighbors"]]
+    df["min_pixels"] = df["min_pixels"].astype(int)
+    df["dmax"] = [None if pd.isna(v) else float(v) for v in df["dmax"]]
+    for name in ("smooth", "eps", "threshold_calc") + TAPER_PARAMS:
+        df[name] = df[name].astype(float)
+    return df[["scenario", *SCENARIO_PARAMS]]
+
+
+def _cell_matrices(cell, col, pixels, area, n_cells, n_cols):
+    shape = (n_cells, n_cols)
+    return (
+        csr_matrix((pixels, (cell, col)), shape=shape),
+        csr_matrix((area, (cell, col)), shape=shape),
+    )
+
+
+# pro Worker-Prozess einmal gesetzt (_init_worker), nicht pro Aufgabe verschickt:
+# (Pixel-Matrix, Flächen-Matrix, Distanz zur nächsten Messung oder None,
+#  Knoten in km für taper_units="km" oder None)
+_SHARED = None
+
+
+def _init_worker(cell, col, pixels, area, n_cells, n_cols, dist, taper_coords):
+    global _SHARED
+    _SHARED = _cell_matrices(cell, col, pixels, area, n_cells, n_cols) + (dist, taper_coords)
+
+
+def _evaluate_batch(ZI_raw, xi, yi, scenarios, shared=None):
+    """Taper, Cutoff, Maske und Summe über die Zellentabelle für eine Liste von Szenarien.
+
+    Gibt pro Szenario (id, Spalten != 0, Pixel, Fläche) zurück.
+    """
+    pixels_m, area_m, dist, taper_coords = shared if shared is not None else _SHARED
+
+    tapers = {}
+    out = []
+    for sc in scenarios:
+        tkey = tuple(sc[p] for p in TAPER_PARAMS)
+        if tkey not in tapers:
+            tapers[tkey] = taper_weights(xi, yi, *tkey, coords=taper_coords)
+
+        ZI = apply_taper(ZI_raw, tapers[tkey])
+        if sc["dmax"] is not None:
+            apply_cutoff(ZI, dist, sc["dmax"], out=ZI)
+        mask = ash_mask(ZI, sc["threshold_calc"], min_pixels=sc["min_pixels"])
+
+        # Maske @ Tabelle: nur die Zeilen der Aschezellen aufsummieren
+        rows = np.flatnonzero(mask.ravel())
+        pixels = np.asarray(pixels_m[rows].sum(axis=0)).ravel()
+        area = np.asarray(area_m[rows].sum(axis=0)).ravel()
+
+        cols = np.flatnonzero(pixels)
+        out.append((sc["scenario"], cols, pixels[cols].astype(np.int64), area[cols]))
+    return out
+
+
+def run_scenarios(scenarios, config=None, workers=1, batch_size=8):
+    """Alle Szenarien rechnen, gibt die Tidy-Tabelle zurück.
+
+    Spalten: scenario, alle SCENARIO_PARAMS, Land, Code, Klasse, Pixels (Ash),
+    area_km2 (nur Zeilen mit Pixeln unter Asche, ohne NoData).
+    workers > 1 verteilt Pakete von batch_size Szenarien auf einen Prozess-Pool
+    (unter Windows nur mit ``if __name__ == "__main__"``-Guard im Skript).
+    """
+    pipe = Pipeline(config)
+    scenarios = scenario_table(scenarios, pipe.config)
+    if workers is None or workers < 1:
+        workers = os.cpu_count() or 1
+
+    names, _ = pipe.countries
+    n_cols = (len(names) + 1) * N_CODES
+    n_cells = pipe.grid_shape[0] * pipe.grid_shape[1]
+    table = pipe.cell_table
+    table_args = (table["cell"], table["col"], table["pixels"], table["area"], n_cells, n_cols)
+    # Distanzfeld nur, wenn ein Szenario einen Cutoff will (gecacht pro Grid)
+    dist = pipe.dist if scenarios["dmax"].notna().any() else None
+    xi, yi = pipe.grid
+    taper_coords = pipe.taper_coords
+    if taper_coords is not None and (
+            (scenarios["lon0"] != pipe.config.lon0).any() or (scenarios["lat0"] != pipe.config.lat0).any()):
+        # die km-Koordinaten sind um das feste Zentrum projiziert
+        raise ValueError("lon0/lat0 lassen sich mit taper_units='km' nicht variieren.")
+
+    # RBF einmal pro Gruppe, Szenarien der Gruppe in Paketen
+    tasks = []
+    for _, group in scenarios.groupby(list(INTERP_PARAMS), dropna=False, sort=False):
+        first = group.iloc[0]
+        ZI_raw = pipe.raw_field(**{p: first[p] for p in INTERP_PARAMS})
+        records = group.to_dict("records")
+        for i in range(0, len(records), batch_size):
+            tasks.append((ZI_raw, records[i:i + batch_size]))
+
+    if workers == 1:
+        shared = _cell_matrices(*table_args) + (dist, taper_coords)
+        results = [_evaluate_batch(ZI_raw, xi, yi, batch, shared) for ZI_raw, batch in tasks]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=table_args + (dist, taper_coords)) as executor:
+            futures = [executor.submit(_evaluate_batch, ZI_raw, xi, yi, batch) for ZI_raw, batch in tasks]
+            results = [fut.result() for fut in futures]
+
+    rows = [r for batch in results for r in batch]
+    cols = np.concatenate([c for _, c, _, _ in rows]) if rows else np.zeros(0, np.int64)
+    land_names = np.array(["(kein Land)"] + list(names), dtype=object)
+    codes = cols % N_CODES
+
+    tidy = pd.DataFrame({
+        "scenario": np.repeat([sid for sid, c, _, _ in rows], [len(c) for _, c, _, _ in rows]),
+        "Land": land_names[cols // N_CODES],
+        "Code": codes.astype(int),
+        "Klasse": [pipe.class_info.get(int(c), {"name": "Unknown"})["name"] for c in codes],
+        "Pixels (Ash)": np.concatenate([p for _, _, p, _ in rows]) if rows else np.zeros(0, np.int64),
+        "area_km2": np.concatenate([a for _, _, _, a in rows]) if rows else np.zeros(0),
+    })
+    return scenarios.merge(tidy, on="scenario", how="inner")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sensitivitätsläufe (Taper/RBF/Threshold) als Parquet-Tabelle.")
+    parser.add_argument("scenarios", help="Szenarien als .csv oder .yaml")
+    parser.add_argument("-o", "--output", default="scenarios.parquet")
+    parser.add_argument("--points", default="tambora_ashfall.csv")
+    parser.add_argument("--countries", default=PipelineConfig.countries_path)
+    parser.add_argument("--lulc", default=None, help="LULC-Raster (Default: COG, falls vorhanden)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--no-cache", action="store_true", help="ohne .klima_cache")
+    args = parser.parse_args(argv)
+
+    config = PipelineConfig(
+        points_path=args.points, countries_path=args.countries, lulc_path=args.lulc,
+        lulc_workers=args.workers, cache_dir=None if args.no_cache else ".klima_cache",
+    )
+    tidy = run_scenarios(load_scenarios(args.scenarios), config, args.workers, args.batch_size)
+    tidy.to_parquet(args.output, index=False)
+    print(f"{tidy['scenario'].nunique()} Szenarien, {len(tidy)} Zeilen -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
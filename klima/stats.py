@@ -0,0 +1,121 @@
+"""LULC-Statistik-Tabellen (lulc_ash_stats_threshold_*cm) aus den Histogrammen bauen."""
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def threshold_label(thr):
+    """0.1 -> "0.1", 10.0 -> "10" (so wie die Analyse-Skripte die Dateien suchen)."""
+    return str(int(thr)) if float(thr).is_integer() else str(thr)
+
+
+def threshold_table(counts, area, k, class_info, totals=None):
+    """Tabelle für Threshold Nummer k (1-basiert) aus dem Sweep-Histogramm.
+
+    counts/area haben Shape (256, n_thresholds + 1), Stufe j heißt
+    "Asche über den Thresholds 1..j" -> für Threshold k zählen alle Stufen >= k.
+    totals = Pixel pro Klasse im ganzen Raster (klima.classindex); None =
+    aus counts summieren (nur richtig, wenn der Sweep alle Fenster gelesen hat).
+    """
+    cnt_ash = counts[:, k:].sum(axis=1)
+    area_ash = area[:, k:].sum(axis=1)
+    cnt_total = counts.sum(axis=1) if totals is None else np.asarray(totals)
+
+    codes = np.nonzero(cnt_ash)[0]
+    codes = codes[codes != 0]  # 0 = NoData
+    total_pixels_ash = cnt_ash[codes].sum()
+
+    rows = []
+    for code in codes:
+        name = class_info.get(int(code), {"name": "Unknown"})["name"]
+        cnt = int(cnt_ash[code])
+        rows.append({
+            "Code": int(code),
+            "Klasse": f"{int(code)}: {name}",
+            "Pixels (Ash)": cnt,
+            "Anteil an Ash [%]": cnt / total_pixels_ash * 100 if total_pixels_ash > 0 else 0.0,
+            "Anteil Klasse belegt [%]": cnt / cnt_total[code] * 100 if cnt_total[code] > 0 else 0.0,
+            "area_km2": float(area_ash[code]),
+        })
+
+    return pd.DataFrame(rows, columns=[
+        "Code", "Klasse", "Pixels (Ash)", "Anteil an Ash [%]",
+        "Anteil Klasse belegt [%]", "area_km2",
+    ])
+
+
+def write_threshold_tables(counts, area, thresholds, class_info, out_dir=".", totals=None):
+    """Für jeden Threshold eine lulc_ash_stats_threshold_<thr>cm.csv schreiben (sep=";").
+
+    Gibt die geschriebenen Pfade zurück.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for k, thr in enumerate(thresholds, start=1):
+        df = threshold_table(counts, area, k, class_info, totals)
+        path = os.path.join(out_dir, f"lulc_ash_stats_threshold_{threshold_label(thr)}cm.csv")
+        df.to_csv(path, sep=";", index=False)
+        paths.append(path)
+    return paths
+
+
+def class_country_table(counts, area, k, country_names, class_info):
+    """Tidy-Tabelle Land x Klasse für Threshold Nummer k aus dem Länder-Würfel.
+
+    counts/area haben Shape (Länder + 1, 256, n_thresholds + 1) wie aus
+    sweep_counts(..., countries=...). Land-ID 0 heißt "kein Land" (Meer o.ä.).
+    Nur Zeilen mit Pixeln unter Asche, NoData (Code 0) fliegt raus.
+    """
+    cnt = counts[:, :, k:].sum(axis=2)
+    ar = area[:, :, k:].sum(axis=2)
+
+    names = ["(kein Land)"] + list(country_names)
+    rows = []
+    for cty, code in zip(*np.nonzero(cnt)):
+        if code == 0:
+            continue
+        rows.append({
+            "Land": names[cty],
+            "Code": int(code),
+            "Klasse": class_info.get(int(code), {"name": "Unknown"})["name"],
+            "Pixels (Ash)": int(cnt[cty, code]),
+            "area_km2": float(ar[cty, code]),
+        })
+
+    return pd.DataFrame(rows, columns=["Land", "Code", "Klasse", "Pixels (Ash)", "area_km2"])
+
+
+def threshold_tables(counts, area, thresholds, class_info, totals=None):
+    """threshold_table() für alle Thresholds untereinander, mit Spalte threshold_cm vorne.
+
+    Ist die Maske eines Thresholds leer (z.B. 100 cm nach dem Sieve), kommt
+    pro Klasse aus class_info eine Nullzeile -> Leser sehen "exportiert,
+    keine Asche" statt "Threshold fehlt" (und suchen nicht nach den CSVs).
+    """
+    frames = []
+    for k, thr in enumerate(thresholds, start=1):
+        df = threshold_table(counts, area, k, class_info, totals)
+        if df.empty:
+            codes = sorted(int(c) for c in class_info if int(c) != 0)
+            df = pd.DataFrame({
+                "Code": codes,
+                "Klasse": [f"{c}: {class_info[c]['name']}" for c in codes],
+                "Pixels (Ash)": 0,
+                "Anteil an Ash [%]": 0.0,
+                "Anteil Klasse belegt [%]": 0.0,
+                "area_km2": 0.0,
+            }, columns=df.columns)
+        df.insert(0, "threshold_cm", float(thr))
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def class_country_tables(counts, area, thresholds, country_names, class_info):
+    """class_country_table() für alle Thresholds untereinander, mit Spalte threshold_cm vorne."""
+    frames = []
+    for k, thr in enumerate(thresholds, start=1):
+        df = class_country_table(counts, area, k, country_names, class_info)
+        df.insert(0, "threshold_cm", float(thr))
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
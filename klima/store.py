@@ -0,0 +1,90 @@
+"""Memory-mapped Ablage für große Zwischen-Grids (LULC-Vorschau, Länder-IDs, Distanz, Zellentabelle).
+
+klima.cache.FieldCache speichert komprimierte .npz: jeder Prozess entpackt
+beim Laden eine eigene Kopie in den RAM. Hier liegt jedes Array als
+unkomprimierte .npy in einem Ordner pro Schlüssel und wird mit
+np.load(mmap_mode="r") geöffnet:
+
+  - Laden kostet nichts, gelesen wird erst beim Zugriff (und nur was gebraucht wird)
+  - mehrere Prozesse (Abbildungen, Szenario-Worker, Analyse-Skripte) teilen sich
+    dieselbe Kopie über den Page Cache
+  - die Arrays sind schreibgeschützt: wer ändern will, muss selbst kopieren
+
+Gleiche Schnittstelle wie FieldCache (key, load, store, get_or_compute).
+"""
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from klima.cache import FieldCache
+
+
+class ArrayStore(FieldCache):
+    """Inhaltsadressierte .npy-Ordner, memory-mapped geladen, LRU-Verdrängung nach Größe."""
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def load(self, key):
+        """Dict mit schreibgeschützten memmaps oder None, wenn nicht im Store."""
+        path = self._path(key)
+        if not os.path.isdir(path):
+            return None
+
+        out = {}
+        for name in os.listdir(path):
+            if name.endswith(".npy"):
+                out[name[:-4]] = np.load(os.path.join(path, name), mmap_mode="r", allow_pickle=False)
+
+        # "zuletzt benutzt" merken -> LRU über die mtime vom Ordner
+        os.utime(path)
+        return out
+
+    def store(self, key, **arrays):
+        """Arrays unter key ablegen (atomar: erst temporärer Ordner, dann umbenennen)."""
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix=".tmp")
+        try:
+            for name, arr in arrays.items():
+                np.save(os.path.join(tmp, f"{name}.npy"), np.asarray(arr), allow_pickle=False)
+            try:
+                os.replace(tmp, self._path(key))
+            except OSError:
+                # gleichzeitig von einem anderen Prozess geschrieben -> dessen Version gilt
+                if not os.path.isdir(self._path(key)):
+                    raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".tmp") or not os.path.isdir(path):
+                continue
+            size = sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+            entries.append((os.stat(path).st_mtime, size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                shutil.rmtree(path)
+            except OSError:
+                # unter Windows lassen sich gemappte Dateien nicht löschen -> beim nächsten Mal
+                continue
+            total -= size
+
+    def get_or_compute(self, key, compute):
+        """Aus dem Store laden oder compute() aufrufen; gibt (wenn möglich) die memmaps zurück."""
+        cached = self.load(key)
+        if cached is not None:
+            return cached
+        arrays = compute()
+        self.store(key, **arrays)
+        loaded = self.load(key)
+        # größer als max_bytes -> sofort wieder verdrängt, dann eben die Arrays im RAM
+        return loaded if loaded is not None else arrays
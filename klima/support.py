@@ -0,0 +1,59 @@
+"""Datenabdeckung: Distanz jeder Gridzelle zur nächsten Messung (in Grad).
+
+Früher lief im Hauptskript bei jedem Lauf ein cKDTree-Query über alle
+Gridknoten, obwohl das Ergebnis ("dist") gar nicht benutzt wurde. Jetzt wird
+die Distanz nur gerechnet, wenn ein Cutoff (dmax) oder das Overlay im Plot
+gewünscht ist, blockweise über alle Kerne und über den Feld-Cache wiederverwendet.
+"""
+import numpy as np
+
+from scipy.spatial import cKDTree
+
+from klima.interp import DEFAULT_CHUNK_SIZE, iter_row_blocks
+
+
+def distance_to_data(x, y, xi, yi, chunk_size=DEFAULT_CHUNK_SIZE, workers=-1, dtype=np.float32):
+    """Distanz jedes Knotens von np.meshgrid(xi, yi) zur nächsten Messung (x, y).
+
+    Zeilenblockweise (Speicher pro Block ~ chunk_size Punkte), workers=-1
+    verteilt jeden Query auf alle Kerne.
+    """
+    xi = np.asarray(xi, dtype=float)
+    yi = np.asarray(yi, dtype=float)
+    nx, ny = len(xi), len(yi)
+
+    tree = cKDTree(np.column_stack([x, y]))
+    dist = np.empty((ny, nx), dtype=dtype)
+    for a, b in iter_row_blocks(nx, ny, chunk_size):
+        pts = np.column_stack([np.tile(xi, b - a), np.repeat(yi[a:b], nx)])
+        d, _ = tree.query(pts, k=1, workers=workers)
+        dist[a:b] = d.reshape(b - a, nx)
+    return dist
+
+
+def cached_distance_to_data(cache, table, x, y, xi, yi, chunk_size=DEFAULT_CHUNK_SIZE):
+    """distance_to_data() über klima.cache.FieldCache (None = ohne Cache).
+
+    Schlüssel: Messtabelle + Grid. Hängt nicht von RBF, Taper oder
+    Threshold ab -> ein Eintrag reicht für alle Szenarien auf demselben Grid.
+    """
+    if cache is None:
+        return distance_to_data(x, y, xi, yi, chunk_size)
+
+    key = cache.key(table, {
+        "what": "distance_to_data", "n_points": len(x),
+        "grid": [float(xi[0]), float(xi[-1]), len(xi), float(yi[0]), float(yi[-1]), len(yi)],
+    })
+    data = cache.get_or_compute(key, lambda: {"dist": distance_to_data(x, y, xi, yi, chunk_size)})
+    return data["dist"]
+
+
+def apply_cutoff(ZI, dist, dmax, out=None):
+    """Harter Cutoff: ZI = NaN, wo die nächste Messung weiter als dmax (Grad) weg ist.
+
+    out=ZI rechnet in place, sonst wird ein neues Array angelegt.
+    """
+    if out is None:
+        out = np.array(ZI, copy=True)
+    out[dist > dmax] = np.nan
+    return out
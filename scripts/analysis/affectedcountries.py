@@ -1,3 +1,5 @@
+import os
+
 import numpy as np
 import pandas as pd
 import geopandas as gpd
@@ -27,13 +29,27 @@ ash_area_km2 = {
     "East Timor":     1.471082e+04,
     "Brunei":         1.069880e+04,
 }
+
+# --- or straight from the export of the main script (EXPORT_DIR) ---
+# ash area per country at ASH_THRESHOLD; without export (or threshold) the numbers above are used
+ASH_THRESHOLD = 0.1
+AREA_PARQUET = os.path.join(os.environ.get("KLIMA_EXPORT_DIR", "export"), "ash_area_country.parquet")
+
+if os.path.exists(AREA_PARQUET):
+    exported = pd.read_parquet(AREA_PARQUET, columns=["threshold_cm", "Land", "area_km2"])
+    exported = exported[np.isclose(exported["threshold_cm"], ASH_THRESHOLD)]
+    if len(exported):
+        ash_area_km2 = dict(zip(exported["Land"], exported["area_km2"]))
+
 # Optional: only if your shapefile uses different naming
 name_alias = {
     # "East Timor": "Timor-Leste",
 }
 
 # --- load countries + compute total country areas (Equal Area) ---
-path = r"C:\Users\jjona\Documents\Uni\Master\Klima\python_tambora\ne_110m_admin_0_countries.shp"
+# KLIMA_COUNTRIES (set by python -m klima figures) or the shapefile in data/ of the repo
+path = os.environ.get("KLIMA_COUNTRIES", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "ne_110m_admin_0_countries.shp"))
 world_countries = gpd.read_file(path)
 
 world_eq = world_countries.to_crs("EPSG:6933")
@@ -1,3 +1,5 @@
+import os
+
 import numpy as np
 import pandas as pd
 import geopandas as gpd
@@ -59,13 +61,26 @@ data = {
     ],
 }
 
-df = pd.DataFrame(data)
+# Export vom Hauptskript (EXPORT_DIR, mit SWEEP_THRESHOLDS): ersetzt die Zahlen oben
+AREA_PARQUET = os.path.join(os.environ.get("KLIMA_EXPORT_DIR", "export"), "ash_area_country.parquet")
+
+if os.path.exists(AREA_PARQUET):
+    exported = pd.read_parquet(AREA_PARQUET, columns=["threshold_cm", "Land", "area_km2"])
+    df = (
+        exported.pivot(index="threshold_cm", columns="Land", values="area_km2")
+        .rename_axis(index="Threshold [cm]", columns=None)
+        .reset_index()
+    )
+else:
+    df = pd.DataFrame(data)
 
 # ============================================================
 # 2) Load country areas (Equal Area)
 # ============================================================
 
-path = r"C:\Users\jjona\Documents\Uni\Master\Klima\python_tambora\ne_110m_admin_0_countries.shp"
+# KLIMA_COUNTRIES (set by python -m klima figures) or the shapefile in data/ of the repo
+path = os.environ.get("KLIMA_COUNTRIES", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "ne_110m_admin_0_countries.shp"))
 world = gpd.read_file(path)
 
 world_eq = world.to_crs("EPSG:6933")
@@ -1,8 +1,13 @@
 import os
+import sys
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+# klima/ liegt im Repo-Root, das Skript in scripts/analysis/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from klima.classindex import load_class_index, index_totals
+
 
 THRESHOLDS = np.array([0.1, 1, 10, 100])
 AGRI_CODES = [21, 31, 35, 40]
@@ -14,6 +19,14 @@ CODE_NAMES = {
     40: "Rice paddy",
 }
 
+# LULC-Raster bzw. dessen Sidecar-Index (<raster>.classes.json) für die echte
+# Gesamtfläche pro Klasse; ohne Index wird sie aus den Tabellen geschätzt
+LULC_PATH = os.environ.get("KLIMA_LULC", "indo_agri_map.tif")
+
+# Export vom Hauptskript (EXPORT_DIR bzw. KLIMA_EXPORT_DIR): alle Thresholds in einer Parquet-Tabelle.
+# Fehlt die Datei oder der Threshold, werden die lulc_ash_stats_threshold_*cm.csv/.xlsx gelesen
+STATS_PARQUET = os.path.join(os.environ.get("KLIMA_EXPORT_DIR", "export"), "lulc_ash_stats.parquet")
+
 OUT_DIR = "agri_analysis"
 os.makedirs(OUT_DIR, exist_ok=True)
 
@@ -23,12 +36,26 @@ OUT_PNG = os.path.join(OUT_DIR, "agri_combined_absolute_with_percent_axis.png")
 # Helper: Datei laden
 
 def read_stats(thr):
+    if os.path.exists(STATS_PARQUET):
+        # nur die gebrauchten Spalten lesen
+        df = pd.read_parquet(STATS_PARQUET, columns=["threshold_cm", "Code", "area_km2", "Anteil Klasse belegt [%]"])
+        df = df[np.isclose(df["threshold_cm"], float(thr))].copy()
+        if len(df):
+            df["code"] = df["Code"].astype(int)
+            return df
+
     thr_str = str(int(thr)) if float(thr).is_integer() else str(thr)
 
     xlsx = f"lulc_ash_stats_threshold_{thr_str}cm.xlsx"
     csv  = f"lulc_ash_stats_threshold_{thr_str}cm.csv"
 
-    if os.path.exists(xlsx):
+    # der Threshold-Sweep (SWEEP_THRESHOLDS im Hauptskript) schreibt .csv ->
+    # wenn beides da ist, gewinnt die neuere Datei
+    use_xlsx = os.path.exists(xlsx) and (
+        not os.path.exists(csv) or os.path.getmtime(xlsx) >= os.path.getmtime(csv)
+    )
+
+    if use_xlsx:
         df = pd.read_excel(xlsx)
     else:
         df = pd.read_csv(csv, sep=";")
@@ -71,11 +98,18 @@ for thr in THRESHOLDS:
 
 out = pd.DataFrame(rows).sort_values("threshold")
 
-# robust: median über alle Thresholds je Klasse
-total_agri_km2 = 0.0
-for c, vals in total_area_estimates.items():
-    if len(vals) > 0:
-        total_agri_km2 += float(np.median(vals))
+# Gesamt-Agriculture-Fläche: exakt aus dem Klassenindex, falls vorhanden
+class_index = load_class_index(LULC_PATH, build=False)
+
+if class_index is not None:
+    _, class_area_km2 = index_totals(class_index)
+    total_agri_km2 = float(sum(class_area_km2[c] for c in AGRI_CODES))
+else:
+    # Fallback: robust über Median über alle Thresholds je Klasse
+    total_agri_km2 = 0.0
+    for c, vals in total_area_estimates.items():
+        if len(vals) > 0:
+            total_agri_km2 += float(np.median(vals))
 
 if total_agri_km2 <= 0:
     raise RuntimeError(
@@ -83,7 +117,8 @@ if total_agri_km2 <= 0:
         "Prüfe, ob in deinen Dateien die Spalten 'Anteil Klasse belegt [%]' und 'area_km2' korrekt sind."
     )
 
-print(f"[DEBUG] Estimated TOTAL agriculture area (21+31+35+40): {total_agri_km2:.2f} km²")
+print(f"[DEBUG] TOTAL agriculture area (21+31+35+40): {total_agri_km2:.2f} km²"
+      f" ({'Klassenindex' if class_index is not None else 'geschätzt'})")
 
 
 
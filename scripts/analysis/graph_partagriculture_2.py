@@ -24,6 +24,10 @@ COLORS = {
     40: "#c71585",
 }
 
+# Export vom Hauptskript (EXPORT_DIR bzw. KLIMA_EXPORT_DIR): alle Thresholds in einer Parquet-Tabelle.
+# Fehlt die Datei oder der Threshold, werden die lulc_ash_stats_threshold_*cm.csv/.xlsx gelesen
+STATS_PARQUET = os.path.join(os.environ.get("KLIMA_EXPORT_DIR", "export"), "lulc_ash_stats.parquet")
+
 OUT_DIR = "agri_analysis"
 os.makedirs(OUT_DIR, exist_ok=True)
 
@@ -34,12 +38,26 @@ OUT_PNG = os.path.join(OUT_DIR, "agri_relative_exposure_area.png")
 
 def read_stats(thr):
 
+    if os.path.exists(STATS_PARQUET):
+        # nur die gebrauchten Spalten lesen
+        df = pd.read_parquet(STATS_PARQUET, columns=["threshold_cm", "Code", "Anteil Klasse belegt [%]"])
+        df = df[np.isclose(df["threshold_cm"], float(thr))].copy()
+        if len(df):
+            df["code"] = df["Code"].astype(int)
+            return df
+
     thr_str = str(int(thr)) if float(thr).is_integer() else str(thr)
 
     xlsx = f"lulc_ash_stats_threshold_{thr_str}cm.xlsx"
     csv  = f"lulc_ash_stats_threshold_{thr_str}cm.csv"
 
-    if os.path.exists(xlsx):
+    # der Threshold-Sweep (SWEEP_THRESHOLDS im Hauptskript) schreibt .csv ->
+    # wenn beides da ist, gewinnt die neuere Datei
+    use_xlsx = os.path.exists(xlsx) and (
+        not os.path.exists(csv) or os.path.getmtime(xlsx) >= os.path.getmtime(csv)
+    )
+
+    if use_xlsx:
         df = pd.read_excel(xlsx)
     else:
         df = pd.read_csv(csv, sep=";")
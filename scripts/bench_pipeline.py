@@ -0,0 +1,287 @@
+"""Benchmark: Laufzeit und Speicher pro Pipeline-Schritt auf synthetischen Daten.
+
+Läuft ohne Plot (kein plt.show, matplotlib wird gar nicht importiert) und
+schreibt alles in eine JSON-Datei, die man zwischen Commits vergleichen kann:
+
+    python scripts/bench_pipeline.py -o bench_new.json
+    python scripts/bench_pipeline.py -o bench_new.json --compare bench_old.json
+
+Synthetische Messpunkte: 40 -> 10k Punkte um Tambora, Thickness fällt mit
+der Distanz ab. Synthetische LULC-Raster: 1k² -> 30k² Pixel (uint8, gekachelt).
+Die großen Fälle (--full) brauchen ein paar GB Platte und dauern entsprechend.
+
+peak_mb ist der tracemalloc-Peak (nur Python/numpy-Allokationen, GDAL nicht),
+maxrss_mb der Peak-RSS des ganzen Prozesses bis zu diesem Schritt.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# klima/ liegt im Repo-Root, das Skript in scripts/
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import geopandas as gpd
+import rasterio
+from rasterio.features import geometry_mask
+from rasterio.transform import from_bounds
+
+from klima.ash import ash_mask, grid_transform, polygonize, threshold_levels
+from klima.countries import (
+    country_table, country_id_grid, country_areas, country_areas_overlay, load_countries,
+)
+from klima.field import ash_field, taper_weights
+from klima.lulc import class_counts, sweep_counts
+from klima.support import distance_to_data
+
+COUNTRIES_SHP = ROOT / "data" / "ne_110m_admin_0_countries.shp"
+
+# Bounding Box wie im Hauptskript (Messdaten + 90 % Rand)
+XMIN, XMAX, YMIN, YMAX = 77.36, 154.83, -24.57, 18.33
+# LULC-Raster deckt Indonesien ab
+LULC_BOUNDS = (95.0, -11.0, 141.0, 6.0)
+
+LON0, LAT0 = 118.0, -8.25
+
+
+def _maxrss_mb():
+    # Linux: KiB, macOS: Bytes
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024**2 if sys.platform == "darwin" else rss / 1024
+
+
+def measure(results, stage, case, func, repeat=1):
+    """func() repeat-mal laufen lassen, beste Zeit + tracemalloc-Peak merken."""
+    best = float("inf")
+    peak = 0
+    out = None
+    for _ in range(repeat):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        out = func()
+        dt = time.perf_counter() - t0
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        best = min(best, dt)
+
+    row = {
+        "stage": stage,
+        "case": case,
+        "seconds": best,
+        "peak_mb": peak / 1024**2,
+        "maxrss_mb": _maxrss_mb(),
+    }
+    results.append(row)
+    print(f"{stage:24s} {json.dumps(case):48s} {best:9.3f} s  {row['peak_mb']:9.1f} MB")
+    return out
+
+
+def synthetic_points(n, seed=0):
+    """n Messpunkte: log-Dicke fällt mit der Distanz zu Tambora, plus Rauschen."""
+    rng = np.random.default_rng(seed)
+    r = rng.gamma(2.0, 3.0, n)
+    phi = rng.uniform(0, 2 * np.pi, n)
+    x = LON0 + r * np.cos(phi)
+    y = LAT0 + 0.6 * r * np.sin(phi)
+    z = 120.0 * np.exp(-r / 2.5) * 10 ** rng.normal(0, 0.2, n)
+    return x, y, z
+
+
+def synthetic_raster(path, size, seed=0):
+    """Quadratisches uint8-LULC-Raster (size x size), blockige Klassen, gekachelt."""
+    rng = np.random.default_rng(seed)
+    codes = np.array([0, 3, 5, 9, 13, 21, 24, 31, 33, 35, 40, 76], dtype=np.uint8)
+    transform = from_bounds(*LULC_BOUNDS, size, size)
+
+    with rasterio.open(
+        path, "w", driver="GTiff", width=size, height=size, count=1, dtype="uint8",
+        crs="EPSG:4326", transform=transform, tiled=True, blockxsize=512, blockysize=512,
+        compress="deflate",
+    ) as dst:
+        for _, win in dst.block_windows(1):
+            coarse = codes[rng.integers(0, len(codes), (win.height // 16 + 1, win.width // 16 + 1))]
+            block = np.kron(coarse, np.ones((16, 16), dtype=np.uint8))[:win.height, :win.width]
+            dst.write(block, 1, window=win)
+
+
+def bench_field(results, n_points, grid, repeat):
+    x, y, z = synthetic_points(n_points)
+    xi = np.linspace(XMIN, XMAX, grid)
+    yi = np.linspace(YMIN, YMAX, grid)
+    case = {"points": n_points, "grid": grid}
+
+    # ab ein paar tausend Punkten ist das globale System zu groß -> lokale Kernel
+    neighbors = None if n_points <= 2000 else 50
+    if neighbors is not None:
+        case["neighbors"] = neighbors
+
+    ZI, _ = measure(results, "rbf+taper", case,
+                    lambda: ash_field(x, y, z, xi, yi, neighbors=neighbors), repeat)
+    measure(results, "taper", case, lambda: taper_weights(xi, yi), repeat)
+
+    measure(results, "distance_to_data", case, lambda: distance_to_data(x, y, xi, yi), repeat)
+    return ZI, xi, yi
+
+
+def bench_masks(results, ZI, xi, yi, repeat):
+    case = {"grid": ZI.shape[0]}
+    transform = grid_transform(xi, yi)
+
+    mask = measure(results, "mask", case, lambda: ash_mask(ZI, 0.1), repeat)
+    level = measure(results, "threshold_levels", dict(case, thresholds=4),
+                    lambda: threshold_levels(ZI, [0.1, 1, 10, 100]), repeat)
+
+    def shapes_dissolve():
+        geoms = polygonize(mask, transform)
+        return gpd.GeoDataFrame(geometry=geoms, crs="EPSG:4326").dissolve()
+
+    ash_union = measure(results, "polygonize+dissolve", case, shapes_dissolve, repeat)
+    return mask, level, transform, ash_union
+
+
+def bench_countries(results, mask, transform, ash_union, repeat):
+    case = {"grid": mask.shape[0]}
+    world = load_countries(COUNTRIES_SHP)
+    names, shapes_ = country_table(world)
+
+    measure(results, "country_overlay", case,
+            lambda: country_areas_overlay(world, ash_union), repeat)
+    ids = measure(results, "country_id_grid", dict(case, supersample=4),
+                  lambda: country_id_grid(shapes_, transform, mask.shape, 4), repeat)
+    measure(results, "country_bincount", dict(case, supersample=4),
+            lambda: country_areas(mask, ids, transform, names, 4), repeat)
+    return shapes_
+
+
+def bench_raster(results, tmpdir, size, mask, level, transform, ash_union, countries, workers, repeat):
+    path = os.path.join(tmpdir, f"lulc_{size}.tif")
+    if not os.path.exists(path):
+        synthetic_raster(path, size)
+    case = {"raster": size, "workers": workers}
+
+    if size <= 8000:
+        # alter Weg: ganzes Raster in den RAM + geometry_mask über alles
+        def in_memory():
+            with rasterio.open(path) as src:
+                lulc = src.read(1)
+                inside = geometry_mask(ash_union.geometry, out_shape=lulc.shape,
+                                       transform=src.transform, invert=True)
+            return np.bincount(lulc[inside], minlength=256)
+
+        measure(results, "geometry_mask_in_ram", case, in_memory, repeat)
+
+    measure(results, "class_counts_polygon", case,
+            lambda: class_counts(path, ash_union.geometry, workers=workers), repeat)
+    measure(results, "sweep_counts", dict(case, thresholds=4),
+            lambda: sweep_counts(path, level, transform, 4, workers=workers), repeat)
+    measure(results, "sweep_counts_countries", case,
+            lambda: sweep_counts(path, mask.astype(np.uint8), transform, 1, workers=workers,
+                                 countries=countries), repeat)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(new, old_path, tolerance, min_seconds=0.05):
+    """Laufzeiten gegen eine ältere JSON vergleichen, Regressionen > tolerance melden.
+
+    Schritte unter min_seconds (in beiden Läufen) rauschen zu stark und zählen nicht.
+    """
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+
+    def key(row):
+        return row["stage"], json.dumps(row["case"], sort_keys=True)
+
+    old_rows = {key(r): r for r in old["results"]}
+    regressions = 0
+    print(f"\n=== Vergleich mit {old_path} ({old['meta'].get('commit')}) ===\n")
+    for row in new["results"]:
+        ref = old_rows.get(key(row))
+        if ref is None or ref["seconds"] <= 0:
+            continue
+        ratio = row["seconds"] / ref["seconds"]
+        slower = ratio > tolerance and row["seconds"] >= min_seconds
+        flag = "  <-- langsamer" if slower else ""
+        regressions += slower
+        print(f"{row['stage']:24s} {key(row)[1]:48s} {ref['seconds']:9.3f} -> {row['seconds']:9.3f} s"
+              f"  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--points", type=int, nargs="+", default=[40, 200, 1000, 10000])
+    parser.add_argument("--grid", type=int, default=600, help="Aschegrid nx = ny")
+    parser.add_argument("--rasters", type=int, nargs="+", default=[1000, 4000],
+                        help="Kantenlängen der synthetischen LULC-Raster")
+    parser.add_argument("--full", action="store_true",
+                        help="zusätzlich 10k² und 30k² Raster (braucht Zeit und Platte)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--compare", help="ältere JSON zum Vergleichen")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="Faktor, ab dem ein Schritt als Regression zählt")
+    parser.add_argument("--tmpdir", help="Ordner für die synthetischen Raster (werden wiederverwendet)")
+    args = parser.parse_args(argv)
+
+    rasters = list(args.rasters) + ([10000, 30000] if args.full else [])
+    results = []
+
+    ZI = xi = yi = None
+    for n in args.points:
+        out = bench_field(results, n, args.grid, args.repeat)
+        if n == args.points[0]:
+            ZI, xi, yi = out
+
+    mask, level, transform, ash_union = bench_masks(results, ZI, xi, yi, args.repeat)
+    countries = bench_countries(results, mask, transform, ash_union, args.repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmpdir = args.tmpdir or tmp
+        os.makedirs(tmpdir, exist_ok=True)
+        for size in rasters:
+            bench_raster(results, tmpdir, size, mask, level, transform, ash_union,
+                         countries, args.workers, args.repeat)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "rasterio": rasterio.__version__,
+            "gdal": rasterio.__gdal_version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    print(f"\ngeschrieben: {args.output}")
+
+    if args.compare:
+        return 1 if compare(report, args.compare, args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
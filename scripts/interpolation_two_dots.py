@@ -4,11 +4,15 @@ import matplotlib.pyplot as plt
 import geodatasets
 from matplotlib.colors import LogNorm, ListedColormap
 import numpy as np
-from scipy.interpolate import Rbf
 
-import rasterio
-from rasterio.enums import Resampling
-from rasterio.vrt import WarpedVRT
+import os
+import sys
+from pathlib import Path
+
+# klima/ liegt im Repo-Root, das Skript in scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from klima.interp import rbf_interpolator, evaluate_grid
+from klima.lulc import read_lulc_preview
 
 # ---------------------------------------------------------
 # 1) Tambora-Daten laden
@@ -43,41 +47,9 @@ world.plot(ax=ax, color="#dddddd", edgecolor="#555555", linewidth=0.5)
 # 3) Agriculture-Map (indo_agri_map.tif) über den GANZEN Bereich
 # ---------------------------------------------------------
 
-with rasterio.open("indo_agri_map.tif") as src:
-    if src.crs is None:
-        raise RuntimeError("indo_agri_map.tif hat kein CRS – bitte prüfen.")
-
-    # alles am Ende in EPSG:4326
-    if src.crs.to_string() != "EPSG:4326":
-        with WarpedVRT(src, crs="EPSG:4326") as vrt:
-            width, height = vrt.width, vrt.height
-
-            max_size = 2000  # max. Pixel pro Dimension
-            scale = max(width / max_size, height / max_size, 1)
-            out_w = int(width / scale)
-            out_h = int(height / scale)
-
-            lulc = vrt.read(
-                1,
-                out_shape=(out_h, out_w),
-                resampling=Resampling.nearest,
-                out_dtype="uint8",
-            )
-            bounds = vrt.bounds
-    else:
-        width, height = src.width, src.height
-        max_size = 2000
-        scale = max(width / max_size, height / max_size, 1)
-        out_w = int(width / scale)
-        out_h = int(height / max_size) if height / max_size > width / max_size else int(height / scale)
-
-        lulc = src.read(
-            1,
-            out_shape=(out_h, out_w),
-            resampling=Resampling.nearest,
-            out_dtype="uint8",
-        )
-        bounds = src.bounds
+# liest nur eine passende Overview, falls es das COG gibt (python -m klima.cog ...)
+lulc_path = "indo_agri_map_cog.tif" if os.path.exists("indo_agri_map_cog.tif") else "indo_agri_map.tif"
+lulc, bounds = read_lulc_preview(lulc_path, max_size=2000)
 
 # Extent des Rasters (jetzt in lon/lat)
 extent = (bounds.left, bounds.right, bounds.bottom, bounds.top)
@@ -146,8 +118,8 @@ XI, YI = np.meshgrid(xi, yi)
 eps = 1e-2
 z_log = np.log10(z + eps)
 
-rbf = Rbf(x, y, z_log, function="multiquadric", smooth=0.005)
-ZI_log = rbf(XI, YI)
+rbf = rbf_interpolator(x, y, z_log, function="multiquadric", smooth=0.005)
+ZI_log = evaluate_grid(rbf, xi, yi)
 ZI = (10**ZI_log) - eps
 ZI[ZI <= 0] = np.nan
 
@@ -0,0 +1,37 @@
+"""Länderflächen aus dem ID-Raster (klima.countries) gegen den exakten Overlay."""
+import os
+
+import geopandas as gpd
+import numpy as np
+import pytest
+
+from klima.ash import grid_transform, polygonize
+from klima.countries import (
+    country_areas, country_areas_overlay, country_id_grid, country_table, load_countries,
+)
+
+COUNTRIES = os.path.join(os.path.dirname(__file__), "..", "data", "ne_110m_admin_0_countries.shp")
+
+
+def test_raster_areas_match_overlay():
+    world = load_countries(COUNTRIES)
+    names, shapes = country_table(world)
+
+    # Grid wie in der Pipeline (Zeile 0 = Süden), Maske = Ellipse um Tambora bis über Timor
+    xi = np.linspace(108.0, 132.0, 241)
+    yi = np.linspace(-18.0, -2.0, 161)
+    XI, YI = np.meshgrid(xi, yi)
+    mask = np.hypot((XI - 118.0) / 9.0, (YI + 8.25) / 6.0) < 1.0
+    transform = grid_transform(xi, yi)
+
+    ids = country_id_grid(shapes, transform, mask.shape, supersample=4)
+    raster = country_areas(mask, ids, transform, names, supersample=4)
+
+    ash_union = gpd.GeoDataFrame(geometry=polygonize(mask, transform), crs="EPSG:4326").dissolve()
+    overlay = country_areas_overlay(world, ash_union)
+
+    big = overlay[overlay > 10000].index
+    assert {"Indonesia", "East Timor"} <= set(big)
+    assert set(big) <= set(raster.index)
+    # Unterschied nur an Küsten/Grenzen (Teilzellen 0.025°)
+    assert raster[big].to_numpy() == pytest.approx(overlay[big].to_numpy(), rel=0.01)
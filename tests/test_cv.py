@@ -0,0 +1,37 @@
+"""LOO nach Rippa (klima.cv) gegen echte Neufits."""
+import numpy as np
+import pytest
+
+from klima.cv import evaluate_setting, loo_residuals, refit_residuals
+from klima.interp import LEGACY_KERNELS, legacy_epsilon
+
+
+def _points(n=40, seed=1):
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(112, 124, n)
+    y = rng.uniform(-12, -4, n)
+    z = 100 * np.exp(-np.hypot(x - 118.0, y + 8.25) / 1.5)
+    return x, y, z
+
+
+@pytest.mark.parametrize("smooth", [0.0, 0.005])
+@pytest.mark.parametrize("function", sorted(LEGACY_KERNELS))
+def test_loo_matches_refits(function, smooth):
+    x, y, z = _points()
+    values = np.log10(z + 1e-3)
+    # Formparameter fest wie in evaluate_setting(), sonst rechnet jeder Neufit seinen eigenen Default
+    epsilon = legacy_epsilon(x, y) if LEGACY_KERNELS[function][2] else None
+
+    loo = loo_residuals(x, y, values, function, smooth, epsilon)
+    refit = refit_residuals(x, y, values, np.arange(len(values)), function, smooth, epsilon)
+    np.testing.assert_allclose(loo, refit, rtol=0, atol=1e-10)
+
+
+def test_evaluate_setting_loo_paths_agree():
+    x, y, z = _points()
+    setting = dict(function="multiquadric", smooth=0.005, eps=1e-3, epsilon=None, neighbors=None)
+
+    fast = evaluate_setting(x, y, z, setting)
+    slow = evaluate_setting(x, y, z, setting, n_folds=len(x))
+    assert fast["method"] == "loo (Rippa)" and slow["method"] == f"{len(x)}-fold"  # Neufit pro Punkt
+    assert fast["rmse_log"] == pytest.approx(slow["rmse_log"], rel=1e-9)
@@ -0,0 +1,81 @@
+"""Inkrementelles Feld und Würfel (klima.incremental) gegen eine volle Neuberechnung."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+from klima.pipeline import Pipeline, PipelineConfig
+
+COUNTRIES = os.path.join(os.path.dirname(__file__), "..", "data", "ne_110m_admin_0_countries.shp")
+
+
+def _write_points(path, n, seed=0):
+    rng = np.random.default_rng(seed)
+    lon = 118.0 + rng.uniform(-6, 6, n)
+    lat = -8.25 + rng.uniform(-4, 4, n)
+    r = np.hypot(lon - 118.0, lat + 8.25)
+    thickness = np.round(120 * np.exp(-r / 1.5) + 0.05, 3)
+    thickness[0] = 120.0  # max(z) bleibt beim Hinzufügen gleich
+    pd.DataFrame({"Location": [f"P{i}" for i in range(n)], "Latitude": lat, "Longitude": lon,
+                  "Thickness_cm": thickness}).to_csv(path, index=False)
+
+
+def _add_station(path):
+    df = pd.read_csv(path)
+    row = {"Location": "neu", "Latitude": -7.0, "Longitude": 119.5, "Thickness_cm": 3.0}
+    pd.concat([df, pd.DataFrame([row])], ignore_index=True).to_csv(path, index=False)
+
+
+def _write_lulc(path, seed=0):
+    # kleines LULC-Raster über den Messpunkten, ein paar Klassen zufällig
+    codes = np.array([3, 21, 35, 40], dtype=np.uint8)
+    data = np.random.default_rng(seed).choice(codes, size=(400, 600))
+    with rasterio.open(path, "w", driver="GTiff", width=600, height=400, count=1, dtype="uint8",
+                       crs="EPSG:4326", transform=from_origin(108.0, -2.0, 0.04, 0.04)) as dst:
+        dst.write(data, 1)
+
+
+@pytest.mark.parametrize("function", ["linear", "multiquadric"])
+def test_incremental_field_matches_full(tmp_path, function):
+    points = tmp_path / "points.csv"
+    _write_points(points, 40)
+    params = dict(points_path=str(points), nx=120, ny=100, neighbors=10, function=function)
+    inc = dict(params, cache_dir=str(tmp_path / "cache"), incremental=True)
+
+    Pipeline(PipelineConfig(**inc)).field  # Lauf vor der neuen Station (Lineage)
+    _add_station(points)
+    pipe = Pipeline(PipelineConfig(**inc))
+    ZI = pipe.field["ZI"]
+    full = Pipeline(PipelineConfig(**params, cache_dir=None)).field["ZI"]
+
+    info = pipe.updates["inkrementell (field)"]
+    # linear: nur Knoten um die neue Station, multiquadric (Formparameter): alles neu
+    assert ("Knoten neu" in info) == (function == "linear")
+    np.testing.assert_allclose(ZI, full, rtol=1e-10, atol=1e-12, equal_nan=True)
+
+
+@pytest.mark.parametrize("n_thresholds", [4, 20])
+def test_incremental_sweep_matches_full(tmp_path, n_thresholds):
+    # 20 Thresholds = 21 Stufen: Delta-Codes passen nicht in uint8 -> voller Sweep statt Fehler
+    points = tmp_path / "points.csv"
+    lulc = tmp_path / "lulc.tif"
+    _write_points(points, 40)
+    _write_lulc(lulc)
+    params = dict(points_path=str(points), lulc_path=str(lulc), countries_path=COUNTRIES, lulc_workers=1,
+                  nx=120, ny=100, neighbors=10, min_pixels=20,
+                  sweep_thresholds=list(np.geomspace(0.1, 100, n_thresholds)))
+    inc = dict(params, cache_dir=str(tmp_path / "cache"), incremental=True)
+
+    Pipeline(PipelineConfig(**inc)).sweep
+    _add_station(points)
+    pipe = Pipeline(PipelineConfig(**inc))
+    _, counts, area = pipe.sweep
+    _, full_counts, full_area = Pipeline(PipelineConfig(**params, cache_dir=None)).sweep
+
+    info = pipe.updates["inkrementell (sweep)"]
+    assert ("geändert" in info) == (n_thresholds <= 15)
+    np.testing.assert_array_equal(counts, full_counts)
+    np.testing.assert_allclose(area, full_area, rtol=1e-9, atol=1e-9)
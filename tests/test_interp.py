@@ -0,0 +1,30 @@
+"""RBF-Ersatz (klima.interp) gegen das alte scipy Rbf."""
+import warnings
+
+import numpy as np
+import pytest
+from scipy.interpolate import Rbf
+
+from klima.interp import LEGACY_KERNELS, rbf_interpolator
+
+
+def _points(n=40, seed=1):
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(112, 124, n)
+    y = rng.uniform(-12, -4, n)
+    z = 100 * np.exp(-np.hypot(x - 118.0, y + 8.25) / 1.5)
+    return x, y, z
+
+
+@pytest.mark.parametrize("smooth", [0.0, 0.005])
+@pytest.mark.parametrize("function", sorted(LEGACY_KERNELS))
+def test_rbf_interpolator_matches_legacy_rbf(function, smooth):
+    x, y, z = _points()
+    values = np.log10(z + 1e-3)
+    px, py = np.random.default_rng(2).uniform([112, -12], [124, -4], (500, 2)).T
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)  # Rbf ist legacy
+        old = Rbf(x, y, values, function=function, smooth=smooth)(px, py)
+    new = rbf_interpolator(x, y, values, function=function, smooth=smooth)(np.column_stack([px, py]))
+    np.testing.assert_allclose(new, old, rtol=0, atol=1e-10)
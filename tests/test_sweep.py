@@ -0,0 +1,44 @@
+"""Sweep über alle Thresholds (klima.lulc.sweep_counts) gegen einen Lauf pro Threshold."""
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+from klima.ash import ash_mask, polygonize, threshold_levels
+from klima.lulc import class_counts, sweep_counts
+
+THRESHOLDS = [0.1, 1.0, 10.0, 100.0]
+
+
+def _ash_grid():
+    # Aschegrid 0.2° (Nord oben), eine LULC-Zelle = 5 x 5 Pixel -> keine Pixelmitte auf einer Zellkante
+    transform = from_origin(108.0, -2.0, 0.2, 0.2)
+    rows, cols = np.mgrid[0:80, 0:120]
+    lon, lat = transform * (cols + 0.5, rows + 0.5)
+    r = np.hypot(lon - 118.0, (lat + 8.25) * 1.5)
+    return 200 * np.exp(-r / 1.2), transform
+
+
+def _write_lulc(path, seed=0):
+    codes = np.array([0, 3, 21, 35, 40], dtype=np.uint8)
+    data = np.random.default_rng(seed).choice(codes, size=(400, 600))
+    with rasterio.open(path, "w", driver="GTiff", width=600, height=400, count=1, dtype="uint8",
+                       crs="EPSG:4326", transform=from_origin(108.0, -2.0, 0.04, 0.04)) as dst:
+        dst.write(data, 1)
+
+
+def test_sweep_matches_per_threshold_counts(tmp_path):
+    lulc = tmp_path / "lulc.tif"
+    _write_lulc(lulc)
+    ZI, transform = _ash_grid()
+    level = threshold_levels(ZI, THRESHOLDS, min_pixels=20)
+
+    counts, _ = sweep_counts(str(lulc), level, transform, len(THRESHOLDS), tile_size=128)
+    full, _ = class_counts(str(lulc), tile_size=128)
+    np.testing.assert_array_equal(counts.sum(axis=1), full)
+
+    # Stufe >= k entspricht der Maske von Threshold k (verschachtelt) -> wie früher ein Lauf pro Threshold
+    for k, thr in enumerate(THRESHOLDS, start=1):
+        mask = ash_mask(ZI, thr, min_pixels=20)
+        assert mask.any()
+        _, ash = class_counts(str(lulc), polygonize(mask, transform), tile_size=128)
+        np.testing.assert_array_equal(counts[:, k:].sum(axis=1), ash)